@@ -0,0 +1,192 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv('LINKEDIN_ARCHIVE_DIR', '')  # vacío = archivo desactivado
+ARCHIVE_LEVEL = int(os.getenv('LINKEDIN_ARCHIVE_LEVEL', 3))
+# Entradas del índice existente que se agregan de una vez al conjunto de deduplicación
+INDEX_LOAD_CHUNK = 10000
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional; sin él se comprime con zlib
+    zstandard = None
+
+DEFAULT_CODEC = 'zstd' if zstandard is not None else 'zlib'
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("El archivo contiene bloques zstd pero zstandard no está instalado")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class ResponseArchive:
+    """
+    Archivo local append-only de respuestas crudas, direccionado por contenido.
+
+    Cada proceso escribe su propio segmento (segments/<fecha>-<pid>.bin) con un bloque comprimido
+    por contenido distinto, y su propio índice JSONL (index/<fecha>-<pid>.jsonl) con una línea por
+    descarga: kind, key (job id o shard de búsqueda), fetched_at, sha256 y la ubicación del bloque.
+    Un contenido ya archivado solo agrega la línea de índice.
+
+    Los sha256 de los índices existentes se cargan en un thread de fondo desde el primer put: la
+    descarga nunca espera esa lectura, y mientras dura solo se deduplica contra lo escrito por
+    este proceso (un contenido repetido en ese lapso se guarda otra vez, sin más costo que el espacio).
+    """
+    def __init__(self, root: str, level: int = ARCHIVE_LEVEL, codec: str = DEFAULT_CODEC):
+        self.root = root
+        self.level = level
+        self.codec = codec
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._segment = None
+        self._index = None
+        self._segment_name = None
+        # sha256 -> (segmento, offset, largo, codec)
+        self._blocks: Dict[str, Tuple[str, int, int, str]] = {}
+        self._loader: Optional[threading.Thread] = None
+        os.makedirs(os.path.join(root, 'segments'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'index'), exist_ok=True)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == 'zstd':
+            # ZstdCompressor no es thread-safe: uno por thread
+            compressor = getattr(self._local, 'compressor', None)
+            if compressor is None:
+                compressor = zstandard.ZstdCompressor(level=self.level)
+                self._local.compressor = compressor
+            return compressor.compress(data)
+        return zlib.compress(data, min(self.level, 9))
+
+    def _open_files(self):
+        name = f"{datetime.now(timezone.utc):%Y%m%d}-{os.getpid()}"
+        if name != self._segment_name:
+            if self._segment is not None:
+                self._segment.close()
+                self._index.close()
+            self._segment = open(os.path.join(self.root, 'segments', f"{name}.bin"), 'ab')
+            self._index = open(os.path.join(self.root, 'index', f"{name}.jsonl"), 'a', encoding='utf-8')
+            self._segment_name = name
+
+    def _start_loading(self):
+        """Lanza la carga de los índices existentes (una vez). Se llama con self._lock tomado."""
+        if self._loader is None:
+            self._loader = threading.Thread(target=self._load_blocks, name="archive-index", daemon=True)
+            self._loader.start()
+
+    def _load_blocks(self):
+        start = time.perf_counter()
+        chunk = {}
+        try:
+            for entry in self.iter_entries():
+                chunk.setdefault(entry['sha256'], (entry['segment'], entry['offset'], entry['length'], entry['codec']))
+                if len(chunk) >= INDEX_LOAD_CHUNK:
+                    self._merge_blocks(chunk)
+                    chunk = {}
+            self._merge_blocks(chunk)
+        except Exception as e:
+            # Sin los índices viejos el archivo sigue funcionando; solo deduplica menos
+            logger.warning(f"No se pudieron cargar los índices del archivo: {e}")
+            return
+        logger.info(f"Índices del archivo cargados: {len(self._blocks)} contenidos en {time.perf_counter() - start:.1f}s")
+
+    def _merge_blocks(self, chunk: Dict[str, tuple]):
+        with self._lock:
+            for sha256, block in chunk.items():
+                self._blocks.setdefault(sha256, block)
+
+    def put(self, kind: str, key: str, url: str, content: bytes, fetched_at: Optional[datetime] = None, **meta):
+        """Archiva una respuesta. kind: 'job' o 'search'; meta se guarda en la línea de índice."""
+        sha256 = hashlib.sha256(content).hexdigest()
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        compressed = None
+        with self._lock:
+            self._start_loading()
+            known = sha256 in self._blocks
+        if not known:
+            compressed = self._compress(content)
+
+        with self._lock:
+            self._open_files()
+            block = self._blocks.get(sha256)
+            if block is None:
+                offset = self._segment.tell()
+                self._segment.write(compressed)
+                self._segment.flush()
+                block = (self._segment_name, offset, len(compressed), self.codec)
+                self._blocks[sha256] = block
+            segment, offset, length, codec = block
+            entry = {
+                'kind': kind, 'key': key, 'url': url, 'fetched_at': fetched_at.isoformat(), 'sha256': sha256,
+                'size': len(content), 'segment': segment, 'offset': offset, 'length': length, 'codec': codec, **meta,
+            }
+            self._index.write(json.dumps(entry) + '\n')
+            self._index.flush()
+
+    def iter_entries(self, kind: Optional[str] = None) -> Iterator[dict]:
+        for path in sorted(glob.glob(os.path.join(self.root, 'index', '*.jsonl'))):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Línea truncada por una caída durante la escritura
+                        continue
+                    if kind is None or entry['kind'] == kind:
+                        yield entry
+
+    def read(self, entry: dict) -> bytes:
+        return read_block(self.root, entry)
+
+    def close(self):
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._index.close()
+                self._segment = self._index = self._segment_name = None
+
+
+def read_block(root: str, entry: dict, handles: Optional[dict] = None) -> bytes:
+    """Lee y descomprime el bloque de una entrada. `handles` permite reutilizar archivos abiertos."""
+    path = os.path.join(root, 'segments', f"{entry['segment']}.bin")
+    if handles is not None:
+        f = handles.get(path)
+        if f is None:
+            f = handles[path] = open(path, 'rb')
+        f.seek(entry['offset'])
+        return _decompress(entry['codec'], f.read(entry['length']))
+    with open(path, 'rb') as f:
+        f.seek(entry['offset'])
+        return _decompress(entry['codec'], f.read(entry['length']))
+
+
+_archive: Optional[ResponseArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> Optional[ResponseArchive]:
+    """Retorna el archivo del proceso, o None si LINKEDIN_ARCHIVE_DIR no está configurado."""
+    global _archive
+    if not ARCHIVE_DIR:
+        return None
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                _archive = ResponseArchive(ARCHIVE_DIR)
+    return _archive
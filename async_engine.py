@@ -0,0 +1,118 @@
+"""
+Motor de extracción asyncio (LINKEDIN_EXTRACTION_ENGINE=async o job_extractor.py --engine async).
+
+Las descargas corren como corrutinas en un event loop propio, con un httpx.AsyncClient y su pool
+de conexiones keep-alive (http_client.AsyncHttpClient), así se pueden tener cientos de solicitudes
+en vuelo (LINKEDIN_ASYNC_CONCURRENCY) sin un thread por cada una. El limitador, el pool de salidas
+y las estadísticas son los del HttpClient del proceso.
+
+Lo bloqueante sale del loop: el archivo, el parseo (o el envío al pool de procesos de parse_stage)
+y el JobWriter corren en un ThreadPoolExecutor chico (LINKEDIN_ASYNC_OFFLOAD_THREADS) con las mismas
+funciones que el motor de threads (handle_page, handle_request_error), así los códigos de estado,
+reintentos y fallos se tratan igual. run_extraction sigue reclamando y despachando desde su thread:
+submit() entrega cada job al loop con run_coroutine_threadsafe.
+"""
+import asyncio
+import os
+import threading
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Optional, Set
+
+import requests
+from dotenv import load_dotenv
+
+from http_client import AsyncHttpClient, get_client
+from job_extractor import handle_page, handle_request_error, parse_failed
+from job_parser import job_url
+from retry_scheduler import MAX_ATTEMPTS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Jobs en vuelo (descargando, parseando o encolando) y conexiones del pool de httpx
+ASYNC_CONCURRENCY = int(os.getenv('LINKEDIN_ASYNC_CONCURRENCY', 200))
+# Threads para lo bloqueante: archivo, parseo inline y JobWriter
+ASYNC_OFFLOAD_THREADS = int(os.getenv('LINKEDIN_ASYNC_OFFLOAD_THREADS', 4))
+
+
+async def process_job_async(client: AsyncHttpClient, offload: ThreadPoolExecutor, job_id, country, writer, attempts=0,
+                            scheduler=None, parse_stage=None, trace=None):
+    """Como job_extractor.process_job, pero la descarga es una corrutina; retorna True, False o None."""
+    loop = asyncio.get_running_loop()
+    url = job_url(job_id)
+    logger.info(f"Procesando ID {job_id} (intento {attempts + 1} de {MAX_ATTEMPTS})...")
+    if trace is not None:
+        trace.add('queue_wait', time.perf_counter() - trace.started)
+
+    response = None
+    try:
+        response = await client.get(url, timeout=10, phase='extraction', trace=trace)
+        response.raise_for_status()
+        result = await loop.run_in_executor(offload, handle_page, job_id, country, url, response, writer, parse_stage, trace)
+        if isinstance(result, Future):
+            # El parseo sigue en el pool de procesos
+            result = await asyncio.wrap_future(result)
+        return result
+    except requests.exceptions.RequestException as e:
+        return await loop.run_in_executor(offload, handle_request_error, job_id, country, attempts, writer, scheduler,
+                                          response, e, trace)
+    except Exception as e:
+        return await loop.run_in_executor(offload, parse_failed, job_id, writer, e, trace)
+
+
+class AsyncEngine:
+    """
+    Motor para run_extraction: un thread con el event loop y un pool chico de threads para lo
+    bloqueante. Al salir del bloque with espera los jobs enviados y cierra el cliente y el loop.
+    """
+    name = 'async'
+
+    def __init__(self, concurrency: int = ASYNC_CONCURRENCY, offload_threads: int = ASYNC_OFFLOAD_THREADS):
+        self.max_in_flight = max(1, concurrency)
+        self.offload_threads = max(1, offload_threads)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._offload: Optional[ThreadPoolExecutor] = None
+        self._client: Optional[AsyncHttpClient] = None
+        self._pending: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, country, writer, attempts, scheduler, parse_stage, trace) -> Future:
+        future = asyncio.run_coroutine_threadsafe(
+            process_job_async(self._client, self._offload, job_id, country, writer, attempts, scheduler, parse_stage, trace),
+            self._loop,
+        )
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-extraction", daemon=True)
+        self._thread.start()
+        self._offload = ThreadPoolExecutor(max_workers=self.offload_threads, thread_name_prefix="async-offload")
+
+        async def create_client():
+            return AsyncHttpClient(get_client(), self.max_in_flight)
+
+        self._client = asyncio.run_coroutine_threadsafe(create_client(), self._loop).result()
+        logger.info(f"Motor asyncio: hasta {self.max_in_flight} jobs en vuelo, {self.offload_threads} threads para parseo y escritura")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._offload.shutdown(wait=True)
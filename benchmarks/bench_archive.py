@@ -0,0 +1,84 @@
+"""
+Benchmark del archivo de respuestas: tamaño en disco vs bytes crudos, throughput de escritura
+y de lectura, y replay (parseo sin red) con 1 y N procesos.
+
+Uso:
+    python benchmarks/bench_archive.py --pages 5000 --processes 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+from archive import ResponseArchive, read_block  # noqa: E402
+import replay  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'job_posting.html')
+WORDS = "datos python sql equipo cliente producto desarrollo plataforma nube análisis experiencia".split()
+
+
+def synthetic_pages(count: int, duplicate_ratio: float):
+    template = open(FIXTURE, encoding='utf-8').read()
+    rng = random.Random(42)
+    previous = None
+    for i in range(count):
+        if previous is not None and rng.random() < duplicate_ratio:
+            # Mismo aviso re-publicado: contenido idéntico
+            yield str(4000000000 + i), previous
+            continue
+        description = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(150, 600)))
+        page = template.replace('Data Engineer (Señor)', f"Data Engineer {i}").replace(
+            'Requisitos: 3+ años de experiencia.', description)
+        previous = page.encode('utf-8')
+        yield str(4000000000 + i), previous
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(dirpath, name)) for dirpath, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=5000)
+    parser.add_argument('--duplicates', type=float, default=0.2, help="Fracción de páginas con contenido repetido")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    pages = list(synthetic_pages(args.pages, args.duplicates))
+    raw_bytes = sum(len(content) for _, content in pages)
+
+    with tempfile.TemporaryDirectory() as root:
+        archive = ResponseArchive(root)
+        start = time.perf_counter()
+        for job_id, content in pages:
+            archive.put('job', job_id, f"https://www.linkedin.com/jobs/api/jobPosting/{job_id}", content, country='Chile')
+        write_seconds = time.perf_counter() - start
+        archive.close()
+
+        segments_bytes = directory_size(os.path.join(root, 'segments'))
+        index_bytes = directory_size(os.path.join(root, 'index'))
+        print(f"codec: {archive.codec}  páginas: {args.pages}  crudo: {raw_bytes / 1e6:.1f} MB")
+        print(f"segmentos: {segments_bytes / 1e6:.2f} MB  índice: {index_bytes / 1e6:.2f} MB  "
+              f"ratio: {raw_bytes / (segments_bytes + index_bytes):.1f}x")
+        print(f"escritura: {args.pages / write_seconds:.0f} páginas/s ({raw_bytes / write_seconds / 1e6:.1f} MB/s crudos)")
+
+        entries = list(archive.iter_entries(kind='job'))
+        handles = {}
+        start = time.perf_counter()
+        read_bytes = sum(len(read_block(root, entry, handles)) for entry in entries)
+        read_seconds = time.perf_counter() - start
+        for f in handles.values():
+            f.close()
+        print(f"lectura: {len(entries) / read_seconds:.0f} páginas/s ({read_bytes / read_seconds / 1e6:.1f} MB/s crudos)")
+
+        for processes in sorted({1, args.processes}):
+            summary = replay.replay(root, processes, dry_run=True)
+            print(f"replay {processes} proceso(s): {summary['jobs_per_second']} jobs/s")
+
+
+if __name__ == "__main__":
+    main()
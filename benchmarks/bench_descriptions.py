@@ -0,0 +1,115 @@
+"""
+Benchmark del almacenamiento de descripciones: texto en cada detalle (antes) vs tabla deduplicada
+por hash (después). Escribe --jobs detalles sintéticos con el JobWriter, repartidos entre
+--distinct descripciones (avisos republicados), y reporta WAL escrito por job, crecimiento de las
+tablas y jobs/seg. Luego migra las filas en línea con migrate_descriptions y verifica que la vista
+devuelva el mismo texto.
+
+Usa la base de DATABASE_URL (mejor una dedicada: el WAL medido es el de todo el servidor).
+
+Uso:
+    DATABASE_URL=postgresql://localhost/scraper python benchmarks/bench_descriptions.py --jobs 20000 --distinct 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from sqlalchemy import delete, select, text  # noqa: E402
+
+from db_writer import JobWriter  # noqa: E402
+from migrate_descriptions import migrate  # noqa: E402
+from models import DETAILS_TABLE, DETAILS_VIEW, SessionLocal, ScraperLinkedinJobDescription, ScraperLinkedinJobDetail  # noqa: E402
+
+TABLES = (DETAILS_TABLE, 'scraper_linkedin_job_descriptions')
+WORDS = ("experiencia equipo desarrollo cliente proyectos gestión requisitos conocimientos beneficios "
+         "postular empresa trabajo híbrido python sql datos liderar oportunidad crecimiento").split()
+
+
+def make_descriptions(count: int, words: int, rng: random.Random):
+    return [' '.join(rng.choice(WORDS) for _ in range(words)) + f" ref-{i}" for i in range(count)]
+
+
+def server_position(session):
+    sizes = session.execute(text(
+        "SELECT " + ", ".join(f"pg_total_relation_size('{table}')" for table in TABLES)
+    )).one()
+    wal = session.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+    return sum(sizes), wal
+
+
+def wal_bytes(session, since: str) -> int:
+    return int(session.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :since)"), {"since": since}).scalar())
+
+
+def run(label, prefix, jobs, descriptions, dedupe, batch_size, rng):
+    rows = [
+        {"id": f"{prefix}{i}", "job_title": f"Job {i}", "company_name": "Empresa", "country": "bench",
+         "job_description": rng.choice(descriptions), "url": f"https://example.com/{i}", "extract_date": datetime.utcnow(),
+         "status": "completed"}
+        for i in range(jobs)
+    ]
+    with SessionLocal() as session:
+        size_before, wal_before = server_position(session)
+    start = time.perf_counter()
+    writer = JobWriter(batch_size=batch_size, flush_interval=0.5, dedupe_descriptions=dedupe).start()
+    for row in rows:
+        writer.add_detail(row)
+    writer.close()
+    elapsed = time.perf_counter() - start
+    with SessionLocal() as session:
+        size_after, _ = server_position(session)
+        wal = wal_bytes(session, wal_before)
+    print(f"{label:<10} {jobs / elapsed:9.1f} jobs/s  WAL {wal / jobs:9.1f} bytes/job  "
+          f"tablas +{(size_after - size_before) / 1e6:7.2f} MB  descripciones enviadas {writer.flushed_descriptions}")
+    return rows
+
+
+def cleanup(prefixes, hashes_before):
+    with SessionLocal() as session:
+        for prefix in prefixes:
+            session.execute(delete(ScraperLinkedinJobDetail).where(ScraperLinkedinJobDetail.id.like(f"{prefix}%")))
+        session.execute(delete(ScraperLinkedinJobDescription).where(
+            ScraperLinkedinJobDescription.content_hash.not_in(hashes_before)))
+        session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=20000)
+    parser.add_argument('--distinct', type=int, default=2000, help="Descripciones distintas entre todos los jobs")
+    parser.add_argument('--words', type=int, default=400, help="Palabras por descripción (~3 KB con 400)")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    descriptions = make_descriptions(args.distinct, args.words, rng)
+    stamp = int(time.time())
+    inline_prefix, dedupe_prefix = f"benchdesc{stamp}i", f"benchdesc{stamp}d"
+    with SessionLocal() as session:
+        hashes_before = list(session.execute(select(ScraperLinkedinJobDescription.content_hash)).scalars())
+
+    try:
+        inline_rows = run("en línea", inline_prefix, args.jobs, descriptions, False, args.batch_size, rng)
+        run("dedupe", dedupe_prefix, args.jobs, descriptions, True, args.batch_size, rng)
+
+        start = time.perf_counter()
+        totals = migrate()
+        print(f"migración {totals['rows']} filas, {totals['descriptions']} descripciones nuevas en {time.perf_counter() - start:.2f}s")
+        expected = {row["id"]: row["job_description"] for row in inline_rows}
+        with SessionLocal() as session:
+            found = dict(session.execute(text(
+                f"SELECT id, job_description FROM {DETAILS_VIEW} WHERE id LIKE :prefix"
+            ), {"prefix": f"{inline_prefix}%"}).all())
+        mismatches = sum(1 for job_id, description in expected.items() if found.get(job_id) != description)
+        print(f"vista {DETAILS_VIEW}: {len(found)} filas, {mismatches} descripciones distintas a las originales")
+    finally:
+        cleanup([inline_prefix, dedupe_prefix], hashes_before)
+
+
+if __name__ == "__main__":
+    main()
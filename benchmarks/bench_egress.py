@@ -0,0 +1,107 @@
+"""
+Benchmark del pool de salidas (egress.py) con proxies locales de benchmarks/fake_proxy.py delante
+del servidor falso. Cada proxy responde 429 por encima de --proxy-rate req/s, como el límite por IP.
+
+    healthy N   N proxies sanos: el rendimiento útil (respuestas 200/s) debería crecer con N
+    mala        --healthy proxies sanos más uno malo (errores, timeouts y latencia), con el
+                circuito activado y desactivado
+    caída       --healthy proxies sanos más uno que responde 503 la primera mitad de la corrida;
+                con el circuito las solicitudes a la salida caída se cortan y, cumplido el
+                enfriamiento, una prueba la devuelve al reparto
+
+Uso:
+    python benchmarks/bench_egress.py --proxies 1,2,4 --proxy-rate 15 --seconds 10 --threads 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from fake_linkedin import FakeConfig, FakeLinkedIn, JOB_PATH  # noqa: E402
+from fake_proxy import FakeProxy, ProxyConfig  # noqa: E402
+from egress import EgressPool  # noqa: E402
+from http_client import DEFAULT_HEADERS, HttpClient  # noqa: E402
+from rate_limiter import AdaptiveRateLimiter  # noqa: E402
+
+
+def run(label: str, base_url: str, proxies, args, breaker: bool = True):
+    def limiter_factory():
+        return AdaptiveRateLimiter(initial_rate=args.proxy_rate / 2, max_rate=args.proxy_rate * 2,
+                                   increase=args.proxy_rate / 4, burst=2)
+
+    breaker_options = {} if breaker else {"failure_threshold": 0, "min_score": 0}
+    pool = EgressPool([proxy.url for proxy in proxies], args.threads, DEFAULT_HEADERS, limiter_factory=limiter_factory,
+                      cooldown=args.cooldown, **breaker_options)
+    client = HttpClient(pool_size=args.threads, egress_pool=pool)
+    deadline = time.monotonic() + args.seconds
+    counter = iter(range(10**9))
+    counter_lock = threading.Lock()
+
+    def worker():
+        while time.monotonic() < deadline:
+            with counter_lock:
+                job_id = 4_100_000_000 + next(counter)
+            try:
+                client.get(f"{base_url}{JOB_PATH}{job_id}", timeout=args.timeout, phase='extraction')
+            except Exception:
+                pass
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = client.stats.snapshot()
+    ok = stats["by_status"].get(200, 0)
+    print(f"{label:<24} {ok / elapsed:7.1f} ok/s  429: {stats['by_status'].get(429, 0):>5}  "
+          f"5xx: {sum(n for status, n in stats['by_status'].items() if status >= 500):>4}  errores: {stats['errors']:>4}  "
+          f"p50 {stats['p50_seconds'] * 1000:6.1f} ms  p99 {stats['p99_seconds'] * 1000:7.1f} ms", flush=True)
+    for name, egress in pool.snapshot().items():
+        print(f"    {name:<20} {egress}", flush=True)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--proxies', default='1,2,4', help="Cantidades de proxies sanos a medir")
+    parser.add_argument('--proxy-rate', type=float, default=15, help="Req/s por proxy antes de recibir 429")
+    parser.add_argument('--healthy', type=int, default=3, help="Proxies sanos en el escenario con una salida mala")
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=2.0)
+    parser.add_argument('--cooldown', type=float, default=5.0)
+    parser.add_argument('--latency', type=float, default=0.01, help="Latencia del servidor falso")
+    args = parser.parse_args()
+
+    fake = FakeLinkedIn(FakeConfig(latency=args.latency)).start()
+    counts = [int(count) for count in args.proxies.split(',')]
+    for count in counts:
+        proxies = [FakeProxy(ProxyConfig(rate_limit=args.proxy_rate, seed=i)).start() for i in range(count)]
+        run(f"healthy {count}", fake.base_url, proxies, args)
+        for proxy in proxies:
+            proxy.stop()
+
+    scenarios = {
+        "mala": ProxyConfig(rate_limit=args.proxy_rate, rate_error=0.3, rate_timeout=0.2,
+                            timeout_seconds=args.timeout * 2, latency=0.3, seed=99),
+        "caída": ProxyConfig(rate_limit=args.proxy_rate, down=True, seed=99),
+    }
+    for scenario, bad_config in scenarios.items():
+        for breaker in (False, True):
+            proxies = [FakeProxy(ProxyConfig(rate_limit=args.proxy_rate, seed=i)).start() for i in range(args.healthy)]
+            bad = FakeProxy(ProxyConfig(**vars(bad_config))).start()
+            if bad_config.down:
+                threading.Timer(args.seconds / 2, lambda bad=bad: setattr(bad.config, 'down', False)).start()
+            run(f"{args.healthy}+1 {scenario}, circuito {'sí' if breaker else 'no'}", fake.base_url, proxies + [bad], args, breaker)
+            for proxy in proxies + [bad]:
+                proxy.stop()
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
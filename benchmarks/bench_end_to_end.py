@@ -0,0 +1,267 @@
+"""
+Benchmark de punta a punta sin LinkedIn: levanta benchmarks/fake_linkedin.py, corre el
+descubrimiento (main.py) y la extracción (job_extractor.py) contra él y contra la base de datos
+de DATABASE_URL, y reporta páginas/seg, jobs/seg, latencia p50/p99 y RSS pico por fase.
+
+Cada fase corre en su propio proceso. Los resultados se guardan en --output-dir como JSON y
+--compare contrasta la corrida con un resultado anterior (sale con código 1 si hay regresión).
+
+La extracción reclama todos los jobs pendientes de la base: usar una base de datos dedicada.
+
+Uso:
+    DATABASE_URL=postgresql://localhost/scraper python benchmarks/bench_end_to_end.py \\
+        --searches 4 --jobs-per-search 500 --latency 0.02 --workers 8 --threads 8 --label baseline
+    python benchmarks/bench_end_to_end.py ... --compare benchmarks/results/<anterior>.json
+"""
+import argparse
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+from fake_linkedin import add_arguments  # noqa: E402
+
+DEFAULT_OUTPUT_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Métricas comparadas: (fase, clave, True si más alto es mejor)
+COMPARED = [
+    ('discovery', 'pages_per_second', True),
+    ('discovery', 'p50_seconds', False),
+    ('discovery', 'p99_seconds', False),
+    ('discovery', 'peak_rss_mb', False),
+    ('extraction', 'jobs_per_second', True),
+    ('extraction', 'p50_seconds', False),
+    ('extraction', 'p99_seconds', False),
+    ('extraction', 'peak_rss_mb', False),
+]
+
+
+def run_phase(phase: str, result_file: str):
+    """Se ejecuta en el proceso hijo: corre la fase completa y escribe sus números en result_file."""
+    import metrics
+    from http_client import get_client
+
+    if phase == 'discovery':
+        import main as module
+    else:
+        import job_extractor as module
+
+    start = time.perf_counter()
+    if phase == 'discovery':
+        module.main()
+    else:
+        # Sin los argumentos del benchmark: la configuración va por variables de entorno
+        module.main([])
+    elapsed = time.perf_counter() - start
+
+    stats = get_client().stats.snapshot()
+    result = {
+        "seconds": round(elapsed, 3),
+        "requests": stats["requests"],
+        "by_status": stats["by_status"],
+        "p50_seconds": stats["p50_seconds"],
+        "p99_seconds": stats["p99_seconds"],
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if phase == 'discovery':
+        pages = stats["by_status"].get(200, 0)
+        new_ids = sum(metrics.IDS_DISCOVERED.value(location=location, new='true') for location in module.LOCATIONS)
+        result.update(pages=pages, ids_found=int(metrics.IDS_DISCOVERED.total()), new_ids=int(new_ids),
+                      light_jobs=int(metrics.LIGHT_JOBS.total()),
+                      pages_per_second=round(pages / elapsed, 1) if elapsed else 0.0)
+    else:
+        saved = int(metrics.JOBS_PROCESSED.value(result='saved'))
+        jobs = saved + int(metrics.JOBS_PROCESSED.value(result='failed'))
+        result.update(jobs=jobs, saved=saved, retried=int(metrics.JOBS_PROCESSED.value(result='retry')),
+                      jobs_per_second=round(jobs / elapsed, 1) if elapsed else 0.0)
+    with open(result_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_fake_server(args) -> (subprocess.Popen, str):
+    command = [
+        sys.executable, os.path.join(BENCH_DIR, 'fake_linkedin.py'), '--port', str(free_port()),
+        '--jobs-per-search', str(args.jobs_per_search), '--page-size', str(args.page_size),
+        '--result-cap', str(args.result_cap),
+        '--latency', str(args.latency), '--latency-jitter', str(args.latency_jitter),
+        '--burst-429-every', str(args.burst_429_every), '--burst-429-length', str(args.burst_429_length),
+        '--rate-404', str(args.rate_404), '--rate-empty', str(args.rate_empty), '--seed', str(args.seed),
+        '--rate-bare-card', str(args.rate_bare_card),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline().strip()
+    if not line.startswith('LINKEDIN_BASE_URL='):
+        process.kill()
+        raise RuntimeError(f"El servidor falso no arrancó: {line!r}")
+    return process, line.split('=', 1)[1]
+
+
+def phase_env(args, base_url: str, locations: list) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'LINKEDIN_BASE_URL': base_url,
+        'LINKEDIN_LOCATIONS': ','.join(locations),
+        'LINKEDIN_STEPS': str(args.page_size),
+        'LINKEDIN_MAX_RANGE': str(args.jobs_per_search + args.page_size),
+        'LINKEDIN_SEARCH_RESULT_CAP': str(args.result_cap or args.jobs_per_search + args.page_size),
+        'LINKEDIN_MAX_WORKERS': str(args.workers),
+        'LINKEDIN_MAX_THREADS': str(args.threads),
+        'LINKEDIN_RATE_LIMIT_ENABLED': 'true' if args.rate_limit else 'false',
+        'GRAFANA_LOKI_URL': '',
+    })
+    if args.parse_processes is not None:
+        env['LINKEDIN_PARSE_PROCESSES'] = str(args.parse_processes)
+    if args.light_mode is not None:
+        env['LINKEDIN_LIGHT_MODE'] = args.light_mode
+    if args.engine is not None:
+        env['LINKEDIN_EXTRACTION_ENGINE'] = args.engine
+    if args.concurrency is not None:
+        env['LINKEDIN_ASYNC_CONCURRENCY'] = str(args.concurrency)
+    return env
+
+
+def run_child(phase: str, env: dict, output_dir: str) -> dict:
+    result_file = os.path.join(output_dir, f".{phase}-{os.getpid()}.json")
+    log_file = os.path.join(output_dir, f"{phase}.log")
+    with open(log_file, 'w', encoding='utf-8') as log:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--phase', phase, '--result-file', result_file],
+            env=env, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT, check=True,
+        )
+    with open(result_file, encoding='utf-8') as f:
+        result = json.load(f)
+    os.remove(result_file)
+    return result
+
+
+def cleanup(locations: list):
+    from sqlalchemy import delete, select
+    from models import SessionLocal, ScraperLinkedinJob, ScraperLinkedinJobDetail
+
+    with SessionLocal() as session:
+        ids = select(ScraperLinkedinJob.id).where(ScraperLinkedinJob.country.in_(locations))
+        session.execute(delete(ScraperLinkedinJobDetail).where(ScraperLinkedinJobDetail.id.in_(ids)))
+        session.execute(delete(ScraperLinkedinJob).where(ScraperLinkedinJob.country.in_(locations)))
+        session.commit()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare(current: dict, previous: dict, tolerance: float) -> bool:
+    """Imprime la comparación y retorna True si alguna métrica empeoró más que tolerance."""
+    print(f"\nComparación con {previous.get('label')} ({previous.get('timestamp')}, {previous.get('commit')})")
+    regression = False
+    for phase, key, higher_is_better in COMPARED:
+        old = previous.get('phases', {}).get(phase, {}).get(key)
+        new = current['phases'].get(phase, {}).get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = ''
+        if worse > tolerance:
+            flag = '  <-- regresión'
+            regression = True
+        print(f"  {phase:<11} {key:<17} {old:>10} -> {new:>10}  ({change:+.1%}){flag}")
+    return regression
+
+
+def print_report(result: dict):
+    discovery = result['phases']['discovery']
+    extraction = result['phases']['extraction']
+    print(f"\n{result['label']} ({result['commit']})")
+    print(f"  descubrimiento: {discovery['pages']} páginas, {discovery['ids_found']} IDs ({discovery.get('new_ids', '-')} nuevos, "
+          f"{discovery.get('light_jobs', 0)} del modo liviano) "
+          f"en {discovery['seconds']}s "
+          f"-> {discovery['pages_per_second']} páginas/s, p50 {discovery['p50_seconds']}s, p99 {discovery['p99_seconds']}s, "
+          f"RSS pico {discovery['peak_rss_mb']} MB")
+    print(f"  extracción:     {extraction['jobs']} jobs ({extraction['saved']} guardados) en {extraction['seconds']}s "
+          f"-> {extraction['jobs_per_second']} jobs/s, p50 {extraction['p50_seconds']}s, p99 {extraction['p99_seconds']}s, "
+          f"RSS pico {extraction['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta contra la API falsa")
+    parser.add_argument('--phase', choices=['discovery', 'extraction'], help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    parser.add_argument('--searches', type=int, default=2, help="Ubicaciones sintéticas a descubrir")
+    parser.add_argument('--workers', type=int, default=4, help="LINKEDIN_MAX_WORKERS")
+    parser.add_argument('--threads', type=int, default=4, help="LINKEDIN_MAX_THREADS")
+    parser.add_argument('--parse-processes', type=int, help="LINKEDIN_PARSE_PROCESSES (por defecto, el del entorno)")
+    parser.add_argument('--rate-limit', action='store_true', help="Mantener el limitador adaptativo activo")
+    parser.add_argument('--light-mode', choices=['off', 'defer', 'skip'], help="LINKEDIN_LIGHT_MODE (por defecto, el del entorno)")
+    parser.add_argument('--engine', choices=['threads', 'async'], help="LINKEDIN_EXTRACTION_ENGINE (por defecto, el del entorno)")
+    parser.add_argument('--concurrency', type=int, help="LINKEDIN_ASYNC_CONCURRENCY para --engine async")
+    parser.add_argument('--label', default='run')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--compare', help="Resultado JSON anterior para detectar regresiones")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Empeoramiento tolerado antes de marcar regresión")
+    parser.add_argument('--keep-rows', action='store_true', help="No borrar las filas sintéticas al terminar")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.phase:
+        run_phase(args.phase, args.result_file)
+        return
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    locations = [f"bench{timestamp.lower()}{i}" for i in range(args.searches)]
+
+    server, base_url = start_fake_server(args)
+    try:
+        env = phase_env(args, base_url, locations)
+        phases = {
+            'discovery': run_child('discovery', env, args.output_dir),
+            'extraction': run_child('extraction', env, args.output_dir),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.keep_rows:
+            cleanup(locations)
+
+    result = {
+        "label": args.label,
+        "timestamp": timestamp,
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ('phase', 'result_file', 'output_dir', 'compare', 'label', 'keep_rows')},
+        "phases": phases,
+    }
+    path = os.path.join(args.output_dir, f"{timestamp}-{args.label}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+    print_report(result)
+    print(f"\nResultado guardado en {path}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        if compare(result, previous, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
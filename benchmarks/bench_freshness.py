@@ -0,0 +1,106 @@
+"""
+Benchmark del orden de reclamo con presupuesto de tiempo: siembra --jobs jobs pendientes con
+fechas de publicación repartidas en las últimas --max-age-hours horas (los IDs no siguen la
+fecha) y corre job_extractor.py --time-budget contra la API falsa dos veces:
+
+    id          LINKEDIN_CLAIM_ORDER=id, el orden de antes
+    freshness   LINKEDIN_CLAIM_ORDER=freshness, los más recientes primero
+
+Reporta cuántos jobs se extrajeron dentro del presupuesto, qué fracción de ellos estaba dentro del
+SLA de frescura (LINKEDIN_FRESHNESS_SLA_HOURS) y cuántos de los jobs todavía frescos se alcanzaron
+a extraer. La extracción reclama todos los jobs pendientes de la base: usar una base dedicada.
+
+Uso:
+    DATABASE_URL=postgresql://localhost/scraper python benchmarks/bench_freshness.py \\
+        --jobs 3000 --time-budget 20 --threads 2 --latency 0.05
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+from fake_linkedin import FakeConfig, FakeLinkedIn  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=3000)
+    parser.add_argument('--time-budget', type=float, default=20)
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.05, help="Latencia del servidor falso")
+    parser.add_argument('--max-age-hours', type=float, default=72)
+    parser.add_argument('--sla-hours', type=float, default=24)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    from sqlalchemy import delete, func, select, update
+    from sqlalchemy.dialects.postgresql import insert
+    from models import SessionLocal, ScraperLinkedinJob, ScraperLinkedinJobDetail
+
+    with SessionLocal() as session:
+        pending = session.execute(select(func.count()).where(ScraperLinkedinJob.status.in_(('pending', 'retry')))).scalar()
+    if pending:
+        print(f"La base ya tiene {pending} jobs pendientes o en reintento; usar una base dedicada", file=sys.stderr)
+        sys.exit(2)
+
+    server = FakeLinkedIn(FakeConfig(latency=args.latency)).start()
+    rng = random.Random(args.seed)
+    country = f"benchfresh{int(time.time())}"
+    now = datetime.utcnow()
+    rows = []
+    for i in range(args.jobs):
+        listed_at = now - timedelta(hours=rng.uniform(0, args.max_age_hours))
+        rows.append({"id": str(5_100_000_000 + i), "country": country, "status": 'pending',
+                     "listed_at": listed_at, "created_at": listed_at + timedelta(minutes=rng.uniform(5, 60))})
+    fresh_ids = {row["id"] for row in rows if row["listed_at"] >= now - timedelta(hours=args.sla_hours)}
+    ids = [row["id"] for row in rows]
+    with SessionLocal() as session:
+        for start in range(0, len(rows), 1000):
+            session.execute(insert(ScraperLinkedinJob).values(rows[start:start + 1000]))
+        session.commit()
+
+    env = dict(os.environ, LINKEDIN_BASE_URL=server.base_url, LINKEDIN_RATE_LIMIT_ENABLED='false',
+               LINKEDIN_MAX_THREADS=str(args.threads), LINKEDIN_PARSE_PROCESSES='1', GRAFANA_LOKI_URL='',
+               LINKEDIN_FRESHNESS_SLA_HOURS=str(args.sla_hours))
+    print(f"{args.jobs} jobs, {len(fresh_ids)} publicados hace menos de {args.sla_hours:g}h; presupuesto {args.time_budget:g}s", flush=True)
+    try:
+        for order in ('id', 'freshness'):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, 'job_extractor.py', '--time-budget', str(args.time_budget)],
+                           env=dict(env, LINKEDIN_CLAIM_ORDER=order), cwd=ROOT,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            elapsed = time.perf_counter() - start
+            with SessionLocal() as session:
+                done = dict(session.execute(
+                    select(ScraperLinkedinJob.id, ScraperLinkedinJob.listed_at)
+                    .where(ScraperLinkedinJob.country == country, ScraperLinkedinJob.status == 'completed')
+                ).all())
+                left = session.execute(
+                    select(func.count()).where(ScraperLinkedinJob.country == country, ScraperLinkedinJob.status == 'pending')
+                ).scalar()
+            fresh_done = len(fresh_ids & done.keys())
+            print(f"{order:<10} {elapsed:6.1f}s  extraídos {len(done):5}  dentro del SLA {fresh_done / max(1, len(done)):6.1%}  "
+                  f"frescos alcanzados {fresh_done:5}/{len(fresh_ids)}  pendientes para la próxima {left:5}", flush=True)
+
+            with SessionLocal() as session:
+                session.execute(delete(ScraperLinkedinJobDetail).where(ScraperLinkedinJobDetail.id.in_(ids)))
+                session.execute(update(ScraperLinkedinJob).where(ScraperLinkedinJob.country == country)
+                                .values(status='pending', lease_owner=None, lease_expires_at=None, attempts=0, next_attempt_at=None))
+                session.commit()
+    finally:
+        with SessionLocal() as session:
+            session.execute(delete(ScraperLinkedinJobDetail).where(ScraperLinkedinJobDetail.id.in_(ids)))
+            session.execute(delete(ScraperLinkedinJob).where(ScraperLinkedinJob.country == country))
+            session.commit()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark de requests/sec: requests.get por solicitud (antes) vs HttpClient con pool keep-alive (después),
+contra un servidor local que simula una página de LinkedIn.
+
+Uso:
+    python benchmarks/bench_http_client.py --requests 2000 --threads 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from http_client import HttpClient, DEFAULT_HEADERS  # noqa: E402
+
+BODY = b'<html><body>' + b'<li data-entity-urn="urn:li:jobPosting:1234567890"></li>' * 10 + b'</body></html>'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(label, fetch, url, total, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: fetch(url), range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {total / elapsed:10.1f} req/s  ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/jobs/api/jobPosting/1"
+
+    run("requests.get (antes)", lambda u: requests.get(u, headers=DEFAULT_HEADERS, timeout=10), url, args.requests, args.threads)
+
+    client = HttpClient(pool_size=args.threads)
+    run("HttpClient pool (después)", lambda u: client.get(u, timeout=10), url, args.requests, args.threads)
+    print(f"stats: {client.stats.snapshot()}")
+    client.close()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
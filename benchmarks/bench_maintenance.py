@@ -0,0 +1,179 @@
+"""
+Benchmark de las consultas del camino caliente a medida que crece el historial.
+
+Para cada tamaño de --sizes carga un historial de jobs completados (con su detalle) a razón de
+--per-day jobs por día hasta hoy, más un backlog fijo de pendientes/reintentos, y mide la mediana de:
+
+    claim:       el UPDATE ... RETURNING de claim_jobs (en una transacción que se descarta)
+    known_ids:   la carga del índice de IDs conocidos de un país (30 días)
+    refresh:     la selección de candidatos de refresh.py
+
+sin los índices nuevos, con ellos (parcial de la cola, país + created_at) y después de archivar
+los detalles de más de --archive-after-days días con maintenance.py. Tras el archivado se corre
+VACUUM FULL, como después del primer archivado de una tabla grande; con el archivado periódico
+la tabla reutiliza el espacio liberado y se mantiene en ese tamaño.
+
+Usa la base de DATABASE_URL, que debe ser dedicada: borra y crea filas con ids 6000000000+.
+
+Uso:
+    DATABASE_URL=postgresql://localhost/bench_maint python benchmarks/bench_maintenance.py --sizes 300000,1000000,3000000 --per-day 8000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from sqlalchemy import text  # noqa: E402
+
+import job_extractor  # noqa: E402
+import maintenance  # noqa: E402
+import refresh  # noqa: E402
+from known_ids import load_known_ids  # noqa: E402
+from models import DETAILS_ARCHIVE_TABLE, DETAILS_TABLE, SessionLocal, get_engine, setup_schema  # noqa: E402
+
+FIRST_ID = 6_000_000_000
+COUNTRIES = 4
+INDEXES = {
+    "ix_scraper_linkedin_jobs_claim_id":
+        "CREATE INDEX ix_scraper_linkedin_jobs_claim_id ON scraper_linkedin_jobs (priority, id) "
+        "WHERE status IN ('pending', 'retry', 'in_progress')",
+    "ix_scraper_linkedin_jobs_claim_freshness":
+        "CREATE INDEX ix_scraper_linkedin_jobs_claim_freshness ON scraper_linkedin_jobs "
+        "(priority, COALESCE(listed_at, created_at) DESC, id DESC) WHERE status IN ('pending', 'retry', 'in_progress')",
+    "ix_scraper_linkedin_jobs_country_created_at":
+        "CREATE INDEX ix_scraper_linkedin_jobs_country_created_at ON scraper_linkedin_jobs (country, created_at)",
+}
+
+HISTORY_SQL = text("""
+    INSERT INTO scraper_linkedin_jobs (id, status, country, attempts, created_at, updated_at)
+    SELECT (:first + g)::text, 'completed', 'benchmaint' || (g % :countries),
+           0, ts, ts
+    FROM generate_series(0, :size - 1) g,
+         LATERAL (SELECT (now() AT TIME ZONE 'utc') - ((:size - g) / :per_day) * interval '1 day' AS ts) t
+""")
+
+HISTORY_DETAILS_SQL = text(f"""
+    INSERT INTO {DETAILS_TABLE} (id, job_title, company_name, location, country, posted_time,
+                                 published_date, url, extract_date, status)
+    SELECT j.id, 'Job ' || j.id, 'Empresa ' || (g % 500), 'Santiago', j.country, '1 day ago',
+           j.created_at - interval '1 day', 'https://example.com/jobs/view/' || j.id, j.created_at + interval '1 hour', 'completed'
+    FROM generate_series(0, :size - 1) g
+    JOIN scraper_linkedin_jobs j ON j.id = (:first + g)::text
+""")
+
+BACKLOG_SQL = text("""
+    INSERT INTO scraper_linkedin_jobs (id, status, country, attempts, next_attempt_at, created_at, updated_at)
+    SELECT (:first + g)::text,
+           CASE WHEN g % 5 = 0 THEN 'retry' ELSE 'pending' END, 'benchmaint0',
+           CASE WHEN g % 5 = 0 THEN 1 ELSE 0 END,
+           CASE WHEN g % 5 = 0 THEN (now() AT TIME ZONE 'utc') + interval '1 hour' END,
+           now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+    FROM generate_series(0, :count - 1) g
+""")
+
+
+def execute(sql, params=None):
+    with SessionLocal() as session:
+        session.execute(text(sql) if isinstance(sql, str) else sql, params or {})
+        session.commit()
+
+
+def vacuum(table: str, full: bool = False):
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"VACUUM {'FULL ' if full else ''}ANALYZE {table}"))
+
+
+def median_ms(run, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def claim():
+    with SessionLocal() as session:
+        rows = session.execute(job_extractor.claim_statement('bench', 20)).all()
+        session.rollback()
+    assert rows, "sin jobs reclamables"
+
+
+def measure(label: str, size: int, repeat: int):
+    known = median_ms(lambda: load_known_ids('benchmaint1', 30), max(1, repeat // 4))
+    row = {
+        "claim": median_ms(claim, repeat),
+        "known_ids": known,
+        "refresh": median_ms(lambda: refresh.load_candidates(limit=500, interval_hours=0), max(1, repeat // 4)),
+    }
+    with SessionLocal() as session:
+        hot = session.execute(text(f"SELECT count(*) FROM {DETAILS_TABLE}")).scalar()
+    print(f"{size:>9}  {label:<18} claim {row['claim']:8.2f} ms  known_ids {row['known_ids']:8.1f} ms  "
+          f"refresh {row['refresh']:8.1f} ms  detalles calientes {hot:>9}", flush=True)
+
+
+def cleanup(below: int = 9_999_999_999):
+    """Borra las filas sintéticas con id menor a `below` (por defecto, todas; los ids tienen 10 dígitos)."""
+    where = f"id >= '{FIRST_ID}' AND id < '{below}' AND length(id) = 10"
+    execute(f"DELETE FROM {DETAILS_TABLE} WHERE {where}")
+    execute(f"DELETE FROM {DETAILS_ARCHIVE_TABLE} WHERE {where}")
+    execute(f"DELETE FROM scraper_linkedin_jobs WHERE {where}")
+    vacuum("scraper_linkedin_jobs")
+    vacuum(DETAILS_TABLE)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='300000,1000000,3000000', help="Jobs completados en el historial")
+    parser.add_argument('--per-day', type=int, default=8000, help="Jobs completados por día de historial")
+    parser.add_argument('--backlog', type=int, default=2000, help="Jobs pendientes o en reintento")
+    parser.add_argument('--archive-after-days', type=int, default=90)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--keep', action='store_true', help="No borrar las filas sintéticas al terminar")
+    args = parser.parse_args()
+
+    setup_schema()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    # El backlog usa los ids más altos: los IDs nuevos de LinkedIn son mayores que los del historial
+    backlog_first = FIRST_ID + max(sizes)
+    cleanup()
+    execute(BACKLOG_SQL, {"first": backlog_first, "count": args.backlog})
+
+    try:
+        for size in sizes:
+            cleanup(below=backlog_first)
+            start = time.perf_counter()
+            params = {"first": FIRST_ID, "size": size, "per_day": float(args.per_day), "countries": COUNTRIES}
+            execute(HISTORY_SQL, params)
+            execute(HISTORY_DETAILS_SQL, params)
+            vacuum("scraper_linkedin_jobs")
+            vacuum(DETAILS_TABLE)
+            print(f"{size:>9}  historial de {size / args.per_day:.0f} días cargado en {time.perf_counter() - start:.1f}s", flush=True)
+
+            for name in INDEXES:
+                execute(f"DROP INDEX IF EXISTS {name}")
+            measure("sin índices", size, args.repeat)
+
+            start = time.perf_counter()
+            for statement in INDEXES.values():
+                execute(statement)
+            execute("ANALYZE scraper_linkedin_jobs")
+            print(f"{size:>9}  índices creados en {time.perf_counter() - start:.1f}s", flush=True)
+            measure("con índices", size, args.repeat)
+
+            start = time.perf_counter()
+            moved = maintenance.archive_details(args.archive_after_days)
+            vacuum(DETAILS_TABLE, full=True)
+            print(f"{size:>9}  {moved} detalles archivados en {time.perf_counter() - start:.1f}s", flush=True)
+            measure("índices + archivo", size, args.repeat)
+    finally:
+        for statement in INDEXES.values():
+            execute(statement.replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS"))
+        if not args.keep:
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Microbenchmark de los backends de job_parser: páginas/seg y memoria pico (RSS) por backend.
+Cada backend corre en un subproceso aparte para que el RSS pico no se mezcle entre backends,
+y antes de medir se compara su salida con el golden fixture (sale con 1 si algún backend no coincide;
+los casos de páginas incompletas o rotas están en tests/test_job_parser.py).
+
+Uso:
+    python benchmarks/bench_parser.py --pages 2000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+import job_parser  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'job_posting.html')
+EXPECTED = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'job_posting.expected.json')
+
+
+def run_backend(backend: str, pages: int) -> dict:
+    with open(FIXTURE, 'rb') as f:
+        content = f.read()
+    with open(EXPECTED, encoding='utf-8') as f:
+        expected = json.load(f)
+
+    result = job_parser.parse_job_html(content, backend)
+    mismatched = sorted(name for name in expected if result.get(name) != expected[name])
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(pages):
+        job_parser.parse_job_html(content, backend)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        "backend": backend,
+        "pages_per_sec": round(pages / elapsed, 1),
+        "peak_rss_kb": peak_rss,
+        "rss_growth_kb": peak_rss - baseline_rss,
+        "golden_mismatches": mismatched,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--backend', help="Ejecuta solo este backend e imprime JSON (uso interno)")
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.pages)))
+        return
+
+    print(f"{'backend':<12} {'pages/s':>10} {'peak RSS KB':>12} {'golden':>8}")
+    mismatched = False
+    for backend in job_parser.available_backends():
+        output = subprocess.run(
+            [sys.executable, __file__, '--backend', backend, '--pages', str(args.pages)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output)
+        golden = 'ok' if not result['golden_mismatches'] else ','.join(result['golden_mismatches'])
+        print(f"{backend:<12} {result['pages_per_sec']:>10} {result['peak_rss_kb']:>12} {golden:>8}")
+        mismatched = mismatched or bool(result['golden_mismatches'])
+    if mismatched:
+        # Un backend que no coincide con el golden fixture no se compara: ver tests/test_job_parser.py
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark del refresh: extrae --jobs jobs de la API falsa, cambia la versión del contenido (la
+fracción --rate-changed de los jobs cambia su cantidad de postulantes) y compara
+
+    re-extracción completa: todos los jobs se vuelven a descargar, parsear y escribir (antes)
+    refresh.py:             GET condicional, parseo y UPDATE parcial solo de lo que cambió (después)
+
+reportando solicitudes, bytes descargados, WAL escrito por job y jobs/seg. Usa la base de
+DATABASE_URL (mejor una dedicada: el WAL medido es el de todo el servidor).
+
+Uso:
+    DATABASE_URL=postgresql://localhost/scraper python benchmarks/bench_refresh.py --jobs 2000 --rate-changed 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+from fake_linkedin import FakeConfig, FakeLinkedIn  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--rate-changed', type=float, default=0.05)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    server = FakeLinkedIn(FakeConfig(rate_changed=args.rate_changed)).start()
+    # job_parser arma las URLs con LINKEDIN_BASE_URL al importarse
+    os.environ['LINKEDIN_BASE_URL'] = server.base_url
+    os.environ['LINKEDIN_RATE_LIMIT_ENABLED'] = 'false'
+    os.environ['GRAFANA_LOKI_URL'] = ''
+
+    from sqlalchemy import delete, text
+    from sqlalchemy.dialects.postgresql import insert
+    import job_extractor
+    import refresh
+    from db_writer import JobWriter
+    from http_client import get_client
+    from models import SessionLocal, ScraperLinkedinJob, ScraperLinkedinJobDetail
+
+    country = f"benchrefresh{int(time.time())}"
+    jobs = [(str(5_000_000_000 + i), country) for i in range(args.jobs)]
+
+    def wal_position():
+        with SessionLocal() as session:
+            return session.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+
+    def wal_since(position) -> int:
+        with SessionLocal() as session:
+            return int(session.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :p)"), {"p": position}).scalar())
+
+    def measure(label, run):
+        stats = get_client().stats
+        requests_before, bytes_before = stats.count, server.bytes_sent
+        wal = wal_position()
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        written = wal_since(wal)
+        print(f"{label:<22} {args.jobs / elapsed:8.1f} jobs/s  solicitudes {stats.count - requests_before:6}  "
+              f"descargado {(server.bytes_sent - bytes_before) / 1e6:7.2f} MB  WAL {written / args.jobs:8.1f} bytes/job  {result}")
+
+    def extract():
+        with JobWriter() as writer:
+            return job_extractor.run_extraction(iter(jobs), writer, max_threads=args.threads, max_in_flight=args.threads * 2)
+
+    def refresh_pass():
+        candidates = refresh.load_candidates(limit=args.jobs, interval_hours=0, countries=[country])
+        with JobWriter() as writer:
+            return refresh.run_refresh(candidates, writer, max_threads=args.threads, max_in_flight=args.threads * 2)
+
+    with SessionLocal() as session:
+        session.execute(insert(ScraperLinkedinJob).values([
+            {"id": job_id, "country": country, "status": 'in_progress'} for job_id, _ in jobs
+        ]))
+        session.commit()
+
+    try:
+        extract()
+        server.set_content_version(1)
+        measure("re-extracción completa", extract)
+        server.set_content_version(2)
+        measure("refresh", refresh_pass)
+        measure("refresh sin cambios", refresh_pass)
+    finally:
+        server.stop()
+        with SessionLocal() as session:
+            ids = [job_id for job_id, _ in jobs]
+            session.execute(delete(ScraperLinkedinJobDetail).where(ScraperLinkedinJobDetail.id.in_(ids)))
+            session.execute(delete(ScraperLinkedinJob).where(ScraperLinkedinJob.id.in_(ids)))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
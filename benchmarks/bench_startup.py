@@ -0,0 +1,103 @@
+"""
+Benchmark del arranque: cuánto tarda una corrida en hacer su primera solicitud.
+
+    en frío: un proceso nuevo por corrida, como el cron (python main.py)
+    en caliente: ciclos sucesivos del daemon en el mismo proceso (pools HTTP/DB y caché de IDs conocidos ya listos)
+
+Además mide el tiempo de importar cada módulo en un intérprete nuevo. Apunta el descubrimiento
+a benchmarks/fake_linkedin.py y usa la base de DATABASE_URL.
+
+Uso:
+    DATABASE_URL=postgresql://localhost/scraper python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+from fake_linkedin import FakeConfig, FakeLinkedIn  # noqa: E402
+
+MODULES = ['models', 'main', 'job_extractor', 'pipeline']
+
+
+def bench_env(base_url: str, location: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'LINKEDIN_BASE_URL': base_url,
+        'LINKEDIN_LOCATIONS': location,
+        'LINKEDIN_STEPS': '25',
+        'LINKEDIN_MAX_RANGE': '100',
+        'LINKEDIN_RATE_LIMIT_ENABLED': 'false',
+        'GRAFANA_LOKI_URL': '',
+    })
+    return env
+
+
+def import_seconds(module: str, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f"import {module}"], env=env, cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def cold_first_request(fake: FakeLinkedIn, env: dict) -> float:
+    fake.reset_first_request()
+    start = time.time()
+    subprocess.run([sys.executable, 'main.py'], env=env, cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return fake.first_request_at - start
+
+
+def summary(values) -> str:
+    return f"mediana {statistics.median(values) * 1000:8.1f} ms  min {min(values) * 1000:8.1f} ms  max {max(values) * 1000:8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    fake = FakeLinkedIn(FakeConfig(jobs_per_search=50)).start()
+    location = f"benchstartup{int(time.time())}"
+    env = bench_env(fake.base_url, location)
+
+    for module in MODULES:
+        print(f"import {module:<14} {summary([import_seconds(module, env) for _ in range(args.runs)])}")
+
+    cold = [cold_first_request(fake, env) for _ in range(args.runs)]
+    print(f"{'en frío':<21} {summary(cold)}  (proceso nuevo -> primera solicitud)")
+
+    try:
+        import daemon
+    except ImportError:
+        daemon = None
+    if daemon is not None:
+        os.environ.update(env)
+        scheduler = daemon.Daemon(mode='discovery')
+        scheduler.prepare()
+        warm = []
+        for _ in range(args.runs + 1):
+            fake.reset_first_request()
+            start = time.time()
+            scheduler.run_cycle()
+            warm.append(fake.first_request_at - start)
+        # El primer ciclo todavía llena la caché de IDs conocidos
+        print(f"{'en caliente (daemon)':<21} {summary(warm[1:])}  (inicio del ciclo -> primera solicitud)")
+        scheduler.shutdown()
+
+    from sqlalchemy import delete
+    from models import SessionLocal, ScraperLinkedinJob
+    with SessionLocal() as session:
+        session.execute(delete(ScraperLinkedinJob).where(ScraperLinkedinJob.country == location))
+        session.commit()
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark del costo de loguear desde los threads de trabajo: LokiHandler síncrono (antes, un POST
+por registro) vs cola no bloqueante con envío por lotes (después), contra un Loki local que
+simula la latencia de Grafana Cloud.
+
+Uso:
+    python benchmarks/bench_telemetry.py --records 2000 --threads 8 --latency 0.05
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from telemetry import DroppingQueueHandler, LokiClient, TelemetryShipper, LokiJsonFormatter  # noqa: E402
+
+
+class StandInLoki(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+    lines = 0
+    pushes = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        payload = json.loads(body)
+        count = sum(len(stream['values']) for stream in payload['streams'])
+        with StandInLoki.lock:
+            StandInLoki.lines += count
+            StandInLoki.pushes += 1
+        time.sleep(self.latency)
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def reset_server():
+    with StandInLoki.lock:
+        StandInLoki.lines = 0
+        StandInLoki.pushes = 0
+
+
+def run(label, handler, total, threads, drain=None):
+    bench_logger = logging.getLogger(f"bench.{label}")
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.INFO)
+    bench_logger.addHandler(handler)
+    reset_server()
+    per_call = []
+    calls_lock = threading.Lock()
+
+    def log_one(i):
+        start = time.perf_counter()
+        bench_logger.info(f"Metric: job_processed {i}", extra={"extra_fields": {"event_type": "job_processed", "job_id": i}})
+        elapsed = time.perf_counter() - start
+        with calls_lock:
+            per_call.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(log_one, range(total)))
+    logging_seconds = time.perf_counter() - start
+    if drain is not None:
+        drain()
+    bench_logger.removeHandler(handler)
+
+    per_call.sort()
+    p50 = per_call[len(per_call) // 2] * 1000
+    p99 = per_call[min(len(per_call) - 1, int(len(per_call) * 0.99))] * 1000
+    print(f"{label:<12} {total / logging_seconds:10.1f} logs/s  p50 {p50:8.3f} ms  p99 {p99:8.3f} ms  "
+          f"recibidas {StandInLoki.lines}/{total} en {StandInLoki.pushes} POST")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help="Latencia simulada de cada push (segundos)")
+    parser.add_argument('--queue-size', type=int, default=10000)
+    parser.add_argument('--skip-sync', action='store_true', help="No correr el LokiHandler síncrono")
+    args = parser.parse_args()
+
+    StandInLoki.latency = args.latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInLoki)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    if not args.skip_sync:
+        from logging_loki import LokiHandler
+        sync_handler = LokiHandler(url=url + "/loki/api/v1/push", tags={"service": "linkedin-scraper"}, version="1")
+        sync_handler.setFormatter(LokiJsonFormatter())
+        run("síncrono", sync_handler, args.records, args.threads)
+
+    log_queue = queue.Queue(maxsize=args.queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    shipper = TelemetryShipper(log_queue, console_handler=None, loki_client=LokiClient(url))
+    shipper.start()
+    run("cola+lotes", queue_handler, args.records, args.threads, drain=shipper.stop)
+    print(f"{'':<12} descartados por cola llena: {queue_handler.dropped}, lotes fallidos: {shipper.failed_pushes}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
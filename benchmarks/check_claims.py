@@ -0,0 +1,91 @@
+"""
+Verifica el protocolo claim/lease con varias réplicas locales contra un Postgres local:
+inserta jobs sintéticos pendientes, lanza N procesos que reclaman lotes en paralelo
+y comprueba que ningún job fue reclamado dos veces.
+
+Uso:
+    DATABASE_URL=postgresql://localhost/scraper python benchmarks/check_claims.py --jobs 5000 --replicas 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+PREFIX = 'claimcheck-'
+
+
+def replica(owner: str, batch_size: int):
+    from job_extractor import claim_jobs
+    from models import SessionLocal, ScraperLinkedinJob
+    from sqlalchemy import update
+
+    claimed = []
+    while True:
+        jobs = [job_id for job_id, *_ in claim_jobs(owner, batch_size) if job_id.startswith(PREFIX)]
+        if not jobs:
+            break
+        claimed.extend(jobs)
+        # Simula el trabajo y libera el lease como lo hace JobWriter
+        with SessionLocal() as session:
+            session.execute(
+                update(ScraperLinkedinJob).where(ScraperLinkedinJob.id.in_(jobs))
+                .values(status='completed', lease_owner=None, lease_expires_at=None)
+            )
+            session.commit()
+    print(json.dumps(claimed))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--replica', help="Ejecuta una réplica con este owner (uso interno)")
+    args = parser.parse_args()
+
+    if args.replica:
+        replica(args.replica, args.batch_size)
+        return
+
+    from models import SessionLocal, ScraperLinkedinJob
+    from sqlalchemy import delete
+    from sqlalchemy.dialects.postgresql import insert
+
+    with SessionLocal() as session:
+        session.execute(delete(ScraperLinkedinJob).where(ScraperLinkedinJob.id.like(f'{PREFIX}%')))
+        session.execute(insert(ScraperLinkedinJob).values([
+            {"id": f"{PREFIX}{i:08d}", "country": "Test", "status": "pending"} for i in range(args.jobs)
+        ]))
+        session.commit()
+
+    start = time.perf_counter()
+    processes = [
+        subprocess.Popen(
+            [sys.executable, __file__, '--replica', f'replica-{n}', '--batch-size', str(args.batch_size)],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        for n in range(args.replicas)
+    ]
+    results = [json.loads(process.communicate()[0].strip().splitlines()[-1]) for process in processes]
+    elapsed = time.perf_counter() - start
+
+    all_claimed = [job_id for claimed in results for job_id in claimed]
+    duplicates = len(all_claimed) - len(set(all_claimed))
+    print(f"réplicas: {args.replicas}  jobs: {args.jobs}  reclamados: {len(set(all_claimed))}  duplicados: {duplicates}  ({elapsed:.2f}s)")
+    for n, claimed in enumerate(results):
+        print(f"  replica-{n}: {len(claimed)} jobs")
+
+    with SessionLocal() as session:
+        session.execute(delete(ScraperLinkedinJob).where(ScraperLinkedinJob.id.like(f'{PREFIX}%')))
+        session.commit()
+
+    sys.exit(1 if duplicates or len(set(all_claimed)) != args.jobs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Servidor local que imita la API guest de LinkedIn para pruebas de carga sin red:
+
+    /jobs-guest/jobs/api/seeMoreJobPostings/search?location=..&f_TPR=..&start=N
+        página de tarjetas con `page_size` IDs; pasado `jobs_per_search` o `result_cap` la página
+        viene sin IDs. Acepta los filtros f_JT, f_E y f_WT: cada job tiene un valor fijo de cada uno
+        y la búsqueda filtrada devuelve solo los que coinciden
+    /jobs/api/jobPosting/{id}
+        el fixture benchmarks/fixtures/job_posting.html, con ETag; responde 304 a If-None-Match.
+        Con --content-version N, la fracción --rate-changed de los jobs cambia su cantidad de
+        postulantes según N (para probar refresh.py entre dos arranques del servidor)
+
+Puede inyectar latencia, ráfagas de 429, 404 (deterministas por ID) y páginas vacías
+`<!DOCTYPE html><!---->`. Para apuntar los scrapers: LINKEDIN_BASE_URL=http://127.0.0.1:<port>
+
+Uso:
+    python benchmarks/fake_linkedin.py --port 8099 --latency 0.05 --burst-429-every 500 --rate-404 0.02
+"""
+import argparse
+import os
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'job_posting.html')
+
+SEARCH_PATH = '/jobs-guest/jobs/api/seeMoreJobPostings/search'
+JOB_PATH = '/jobs/api/jobPosting/'
+EMPTY_PAGE = b'<!DOCTYPE html><!---->'
+
+# Mismos valores que main.PARTITION_FILTERS
+FILTER_VALUES = {
+    'f_JT': ['F', 'P', 'C', 'T', 'I', 'V', 'O'],
+    'f_E': ['1', '2', '3', '4', '5', '6'],
+    'f_WT': ['1', '2', '3'],
+}
+
+CARD_TEMPLATE = (
+    '<li><div class="base-card base-search-card job-search-card" data-entity-urn="urn:li:jobPosting:{job_id}">'
+    '<a class="base-card__full-link" href="https://www.linkedin.com/jobs/view/{job_id}"></a>'
+    '<div class="base-search-card__info"><h3 class="base-search-card__title">Software Engineer {job_id}</h3>'
+    '<h4 class="base-search-card__subtitle"><a>Empresa {company}</a></h4>'
+    '<div class="base-search-card__metadata"><span class="job-search-card__location">{location}</span>'
+    '<time class="job-search-card__listdate" datetime="2025-09-20">1 day ago</time></div></div></div></li>'
+)
+# Tarjeta sin empresa, ubicación ni fecha (el modo liviano no alcanza con ella)
+BARE_CARD_TEMPLATE = (
+    '<li><div class="base-card base-search-card job-search-card" data-entity-urn="urn:li:jobPosting:{job_id}">'
+    '<a class="base-card__full-link" href="https://www.linkedin.com/jobs/view/{job_id}"></a>'
+    '<div class="base-search-card__info"><h3 class="base-search-card__title">Software Engineer {job_id}</h3>'
+    '</div></div></li>'
+)
+
+
+class Server(ThreadingHTTPServer):
+    # El backlog por defecto (5) hace que cientos de conexiones simultáneas (motor async) esperen reintentos de SYN
+    request_queue_size = 1024
+
+
+@dataclass
+class FakeConfig:
+    jobs_per_search: int = 500
+    page_size: int = 25
+    result_cap: int = 1000        # offsets desde aquí no devuelven IDs, como la API real (0 = sin tope)
+    latency: float = 0.0          # segundos por respuesta
+    latency_jitter: float = 0.0   # +- uniforme sobre latency
+    burst_429_every: int = 0      # cada N solicitudes empieza una ráfaga de 429 (0 = nunca)
+    burst_429_length: int = 5
+    rate_404: float = 0.0         # fracción de jobs que responden 404 (siempre los mismos IDs)
+    rate_empty: float = 0.0       # probabilidad de una página de búsqueda vacía
+    rate_changed: float = 0.0     # fracción de jobs cuya página depende de content_version
+    rate_bare_card: float = 0.0   # fracción de jobs cuya tarjeta viene solo con el título (siempre los mismos IDs)
+    content_version: int = 0
+    seed: int = 42
+
+
+def search_base_id(location: str, f_tpr: str) -> int:
+    """IDs estables por búsqueda, para que corridas repetidas encuentren los mismos jobs."""
+    return 4_000_000_000 + (zlib.crc32(f"{location}|{f_tpr}".encode()) % 100_000) * 10_000
+
+
+def job_filter_value(index: int, name: str) -> str:
+    """Valor determinista del filtro `name` para el job número `index` de una búsqueda."""
+    values = FILTER_VALUES[name]
+    return values[zlib.crc32(f"{name}|{index}".encode()) % len(values)]
+
+
+@lru_cache(maxsize=1024)
+def matching_indexes(jobs_per_search: int, filters: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Tuple[int, ...]:
+    return tuple(
+        i for i in range(jobs_per_search)
+        if all(job_filter_value(i, name) in values for name, values in filters)
+    )
+
+
+class FakeLinkedIn:
+    def __init__(self, config: FakeConfig, host: str = '127.0.0.1', port: int = 0):
+        self.config = config
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._burst_remaining = 0
+        self.counts: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.first_request_at: Optional[float] = None  # time.time() de la primera solicitud desde el último reset
+        with open(FIXTURE, 'rb') as f:
+            self.job_page = f.read()
+        self.set_content_version(config.content_version)
+        self.server = Server((host, port), self._handler_class())
+        self.server.daemon_threads = True
+
+    def set_content_version(self, version: int):
+        """Cambia las páginas de los jobs de rate_changed sin reiniciar el servidor (las conexiones keep-alive siguen vivas)."""
+        changed_page = self.job_page.replace(b'Over 200 applicants', f'{200 + version} applicants'.encode())
+        etags = {page: f'"{zlib.crc32(page):08x}"' for page in (self.job_page, changed_page)}
+        with self._lock:
+            self.config.content_version = version
+            self.changed_page, self.etags = changed_page, etags
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, outcome: str):
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def reset_first_request(self):
+        with self._lock:
+            self.first_request_at = None
+
+    def next_fault(self) -> str:
+        """Decide, bajo lock, si esta solicitud es parte de una ráfaga de 429 o una página vacía."""
+        with self._lock:
+            if self.first_request_at is None:
+                self.first_request_at = time.time()
+            self._requests += 1
+            if self.config.burst_429_every and self._requests % self.config.burst_429_every == 0:
+                self._burst_remaining = self.config.burst_429_length
+            if self._burst_remaining > 0:
+                self._burst_remaining -= 1
+                self._count('429')
+                return '429'
+            if self.config.rate_empty and self._random.random() < self.config.rate_empty:
+                return 'empty'
+            jitter = self._random.uniform(-self.config.latency_jitter, self.config.latency_jitter)
+        return f"ok:{max(0.0, self.config.latency + jitter)}"
+
+    def search_page(self, query: dict) -> bytes:
+        location = query.get('location', [''])[0]
+        f_tpr = query.get('f_TPR', [''])[0]
+        start = int(query.get('start', ['0'])[0])
+        filters = tuple(sorted(
+            (name, tuple(query[name][0].split(','))) for name in FILTER_VALUES if query.get(name)
+        ))
+        indexes = matching_indexes(self.config.jobs_per_search, filters)
+        end = start + self.config.page_size
+        if self.config.result_cap:
+            end = min(end, self.config.result_cap)
+        base = search_base_id(location, f_tpr)
+        cards = ''.join(
+            (BARE_CARD_TEMPLATE if self.is_bare(base + i) else CARD_TEMPLATE).format(job_id=base + i, company=i % 97, location=location)
+            for i in indexes[start:end]
+        )
+        return f'<!DOCTYPE html><html><body><ul>{cards}</ul></body></html>'.encode('utf-8')
+
+    def is_bare(self, job_id: int) -> bool:
+        return bool(self.config.rate_bare_card) and (zlib.crc32(f"bare|{job_id}".encode()) % 10_000) < self.config.rate_bare_card * 10_000
+
+    def is_missing(self, job_id: str) -> bool:
+        return bool(self.config.rate_404) and (zlib.crc32(job_id.encode()) % 10_000) < self.config.rate_404 * 10_000
+
+    def job_posting(self, job_id: str) -> bytes:
+        changes = bool(self.config.rate_changed) and (zlib.crc32(f"changed|{job_id}".encode()) % 10_000) < self.config.rate_changed * 10_000
+        return self.changed_page if changes else self.job_page
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _send(self, status: int, body: bytes, etag: str = None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                if etag is not None:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with fake._lock:
+                    fake.bytes_sent += len(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                fault = fake.next_fault()
+                if fault == '429':
+                    self._send(429, b'')
+                    return
+                if fault != 'empty':
+                    time.sleep(float(fault.split(':', 1)[1]))
+
+                if url.path == SEARCH_PATH:
+                    if fault == 'empty':
+                        with fake._lock:
+                            fake._count('empty')
+                        self._send(200, EMPTY_PAGE)
+                        return
+                    body = fake.search_page(parse_qs(url.query))
+                    with fake._lock:
+                        fake._count('search')
+                    self._send(200, body)
+                elif url.path.startswith(JOB_PATH):
+                    job_id = url.path[len(JOB_PATH):]
+                    if fake.is_missing(job_id):
+                        with fake._lock:
+                            fake._count('404')
+                        self._send(404, b'')
+                        return
+                    page = fake.job_posting(job_id)
+                    etag = fake.etags[page]
+                    if self.headers.get('If-None-Match') == etag:
+                        with fake._lock:
+                            fake._count('304')
+                        self._send(304, b'', etag)
+                        return
+                    with fake._lock:
+                        fake._count('job')
+                    self._send(200, page, etag)
+                else:
+                    self._send(404, b'')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeLinkedIn':
+        threading.Thread(target=self.server.serve_forever, name="fake-linkedin", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    defaults = FakeConfig()
+    parser.add_argument('--jobs-per-search', type=int, default=defaults.jobs_per_search)
+    parser.add_argument('--page-size', type=int, default=defaults.page_size)
+    parser.add_argument('--result-cap', type=int, default=defaults.result_cap,
+                        help="Offset máximo con resultados por búsqueda (0 = sin tope)")
+    parser.add_argument('--latency', type=float, default=defaults.latency, help="Latencia por respuesta (segundos)")
+    parser.add_argument('--latency-jitter', type=float, default=defaults.latency_jitter)
+    parser.add_argument('--burst-429-every', type=int, default=defaults.burst_429_every)
+    parser.add_argument('--burst-429-length', type=int, default=defaults.burst_429_length)
+    parser.add_argument('--rate-404', type=float, default=defaults.rate_404)
+    parser.add_argument('--rate-empty', type=float, default=defaults.rate_empty)
+    parser.add_argument('--rate-changed', type=float, default=defaults.rate_changed)
+    parser.add_argument('--content-version', type=int, default=defaults.content_version)
+    parser.add_argument('--rate-bare-card', type=float, default=defaults.rate_bare_card,
+                        help="Fracción de tarjetas de búsqueda sin empresa, ubicación ni fecha")
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+
+
+def config_from_args(args) -> FakeConfig:
+    return FakeConfig(
+        jobs_per_search=args.jobs_per_search, page_size=args.page_size, result_cap=args.result_cap,
+        latency=args.latency, latency_jitter=args.latency_jitter,
+        burst_429_every=args.burst_429_every, burst_429_length=args.burst_429_length,
+        rate_404=args.rate_404, rate_empty=args.rate_empty, seed=args.seed,
+        rate_changed=args.rate_changed, content_version=args.content_version, rate_bare_card=args.rate_bare_card,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API guest de LinkedIn falsa para pruebas de carga")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    fake = FakeLinkedIn(config_from_args(args), args.host, args.port)
+    print(f"LINKEDIN_BASE_URL={fake.base_url}", flush=True)
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Solicitudes atendidas: {fake.counts}", flush=True)
+        fake.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
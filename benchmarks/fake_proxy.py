@@ -0,0 +1,192 @@
+"""
+Proxy HTTP local que hace de salida de prueba para el pool de LINKEDIN_EGRESS: reenvía los GET
+con URL absoluta (como los manda requests a un proxy http://) y puede simular una salida mala:
+
+    --rate-limit N      más de N solicitudes por segundo por esta salida reciben 429, como el
+                        límite por IP de LinkedIn
+    --latency S         latencia agregada a cada solicitud
+    --rate-error P      fracción de solicitudes que reciben 502
+    --rate-timeout P    fracción que se cuelga --timeout-seconds antes de responder (el cliente corta antes)
+    --rate-empty P      fracción de búsquedas que reciben la página vacía `<!DOCTYPE html><!---->`
+    --down              todas las solicitudes reciben 503
+
+Uso:
+    python benchmarks/fake_proxy.py --port 8181 --rate-limit 20
+    LINKEDIN_EGRESS=http://127.0.0.1:8181,http://127.0.0.1:8182 python scraper.py discovery
+"""
+import argparse
+import http.client
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import urlparse
+
+EMPTY_PAGE = b'<!DOCTYPE html><!---->'
+SEARCH_PATH = '/jobs-guest/jobs/api/seeMoreJobPostings/search'
+# Headers que son de este salto y no se reenvían
+HOP_HEADERS = {'connection', 'proxy-connection', 'keep-alive', 'proxy-authorization', 'te', 'trailer', 'transfer-encoding', 'upgrade'}
+
+
+@dataclass
+class ProxyConfig:
+    rate_limit: float = 0.0       # solicitudes/seg permitidas antes de responder 429 (0 = sin límite)
+    latency: float = 0.0
+    rate_error: float = 0.0
+    rate_timeout: float = 0.0
+    timeout_seconds: float = 30.0
+    rate_empty: float = 0.0
+    down: bool = False
+    seed: int = 7
+
+
+class FakeProxy:
+    def __init__(self, config: ProxyConfig, host: str = '127.0.0.1', port: int = 0):
+        self.config = config
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._tokens = max(1.0, config.rate_limit)
+        self._last_refill = time.monotonic()
+        self._upstream = threading.local()
+        self.counts: Dict[str, int] = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_fault(self) -> str:
+        """Decide, bajo lock, qué le pasa a esta solicitud: down, 429, error, timeout, empty u ok."""
+        with self._lock:
+            if self.config.down:
+                fault = 'down'
+            else:
+                fault = 'ok'
+                if self.config.rate_limit:
+                    now = time.monotonic()
+                    self._tokens = min(max(1.0, self.config.rate_limit),
+                                       self._tokens + (now - self._last_refill) * self.config.rate_limit)
+                    self._last_refill = now
+                    if self._tokens < 1:
+                        fault = '429'
+                    else:
+                        self._tokens -= 1
+                if fault == 'ok':
+                    draw = self._random.random()
+                    if draw < self.config.rate_error:
+                        fault = 'error'
+                    elif draw < self.config.rate_error + self.config.rate_timeout:
+                        fault = 'timeout'
+                    elif self._random.random() < self.config.rate_empty:
+                        fault = 'empty'
+            self.counts[fault] = self.counts.get(fault, 0) + 1
+        return fault
+
+    def forward(self, url: str, headers: dict):
+        """GET al servidor de destino por una conexión keep-alive de este thread."""
+        target = urlparse(url)
+        key = (target.hostname, target.port or 80)
+        connections = getattr(self._upstream, 'connections', None)
+        if connections is None:
+            connections = self._upstream.connections = {}
+        connection = connections.get(key)
+        if connection is None:
+            connection = connections[key] = http.client.HTTPConnection(*key, timeout=30)
+        path = target.path + (f"?{target.query}" if target.query else '')
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+        return response.status, response.getheaders(), response.read()
+
+    def _handler_class(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _send(self, status: int, body: bytes, headers=()):
+                self.send_response(status)
+                for name, value in headers:
+                    if name.lower() not in HOP_HEADERS and name.lower() != 'content-length':
+                        self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                fault = proxy.next_fault()
+                if proxy.config.latency:
+                    time.sleep(proxy.config.latency)
+                if fault == 'down':
+                    self._send(503, b'')
+                elif fault == '429':
+                    self._send(429, b'')
+                elif fault == 'error':
+                    self._send(502, b'')
+                elif fault == 'timeout':
+                    time.sleep(proxy.config.timeout_seconds)
+                    self.close_connection = True
+                elif fault == 'empty' and urlparse(self.path).path == SEARCH_PATH:
+                    self._send(200, EMPTY_PAGE)
+                else:
+                    headers = {name: value for name, value in self.headers.items() if name.lower() not in HOP_HEADERS}
+                    try:
+                        status, response_headers, body = proxy.forward(self.path, headers)
+                    except (http.client.HTTPException, OSError):
+                        self._send(502, b'')
+                        return
+                    self._send(status, body, response_headers)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeProxy':
+        threading.Thread(target=self.server.serve_forever, name="fake-proxy", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proxy local con fallas inyectables para probar LINKEDIN_EGRESS")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8181)
+    parser.add_argument('--rate-limit', type=float, default=0.0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--rate-error', type=float, default=0.0)
+    parser.add_argument('--rate-timeout', type=float, default=0.0)
+    parser.add_argument('--timeout-seconds', type=float, default=30.0)
+    parser.add_argument('--rate-empty', type=float, default=0.0)
+    parser.add_argument('--down', action='store_true')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    config = ProxyConfig(rate_limit=args.rate_limit, latency=args.latency, rate_error=args.rate_error,
+                         rate_timeout=args.rate_timeout, timeout_seconds=args.timeout_seconds,
+                         rate_empty=args.rate_empty, down=args.down, seed=args.seed)
+    proxy = FakeProxy(config, args.host, args.port)
+    print(f"LINKEDIN_EGRESS={proxy.url}", flush=True)
+    try:
+        proxy.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Solicitudes: {proxy.counts}", flush=True)
+        proxy.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Modo daemon: un proceso de larga vida que corre el scraper cada LINKEDIN_DAEMON_INTERVAL segundos,
+en lugar de un proceso nuevo por ejecución del cron.
+
+Entre corridas quedan abiertos el pool de conexiones a la base, las conexiones keep-alive del
+cliente HTTP (y el estado del limitador adaptativo), los procesos de parseo, el endpoint de
+métricas y la telemetría; el índice de IDs conocidos se actualiza solo con los IDs creados desde
+la corrida anterior. Los contadores de http_stats y las métricas son acumulados del proceso.
+
+SIGTERM/SIGINT detienen el daemon al terminar la corrida en curso (el descubrimiento corta en la
+próxima página). El esquema no se toca: se aplica antes con python scraper.py setup-schema.
+
+Uso:
+    python scraper.py daemon [--mode sequential] [--interval 3600] [--cycles N]
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+import logging
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+import profiler
+import telemetry
+from known_ids import KnownIdCache
+from metrics import start_metrics_server
+from telemetry import setup_loki_logging
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Qué hace cada corrida: sequential (descubrimiento y luego extracción), pipeline, discovery, extraction o refresh
+DAEMON_MODE = os.getenv('LINKEDIN_DAEMON_MODE', 'sequential')
+# Segundos entre inicios de corrida; si una corrida se pasa del intervalo, la siguiente parte al terminar
+DAEMON_INTERVAL = float(os.getenv('LINKEDIN_DAEMON_INTERVAL', 3600))
+
+MODES = ('sequential', 'pipeline', 'discovery', 'extraction', 'refresh')
+
+
+class Daemon:
+    def __init__(self, mode: str = DAEMON_MODE, interval: float = DAEMON_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Modo de daemon desconocido: {mode} (opciones: {', '.join(MODES)})")
+        self.mode = mode
+        self.interval = interval
+        self.known_ids = KnownIdCache()
+        self.parse_stage = None
+        self.cycles = 0
+        self._stop = threading.Event()
+
+    def prepare(self):
+        """Levanta una vez lo que las corridas reutilizan: telemetría, métricas, pools HTTP y de la base, procesos de parseo."""
+        from http_client import get_client
+        from models import get_engine
+        from parse_stage import get_parse_stage
+
+        setup_loki_logging()
+        start_metrics_server()
+        profiler.install()
+        get_client()
+        with get_engine().connect():
+            pass
+        if self.mode in ('sequential', 'pipeline', 'extraction'):
+            self.parse_stage = get_parse_stage()
+        logger.info(f"Daemon listo: modo {self.mode}, una corrida cada {self.interval:.0f}s")
+
+    def run_cycle(self):
+        """Una corrida completa del modo configurado; un error se registra y no detiene al daemon."""
+        self.cycles += 1
+        start = time.monotonic()
+        status = 'success'
+        try:
+            if self.mode in ('sequential', 'discovery'):
+                import main as discovery
+                discovery.run(known_ids_cache=self.known_ids)
+            if self.mode in ('sequential', 'extraction') and not self._stop.is_set():
+                import job_extractor as extraction
+                extraction.run(parse_stage=self.parse_stage)
+            if self.mode == 'pipeline':
+                import pipeline
+                pipeline.run(known_ids_cache=self.known_ids, parse_stage=self.parse_stage)
+            if self.mode == 'refresh':
+                import refresh
+                refresh.run()
+        except Exception as e:
+            status = 'failed'
+            logger.error(f"Error en la corrida {self.cycles} del daemon: {e}", exc_info=True)
+        logger.info("Metric: daemon_cycle", extra={"extra_fields": {
+            "event_type": "daemon_cycle", "scraper_phase": "daemon", "mode": self.mode, "cycle": self.cycles,
+            "status": status, "seconds": round(time.monotonic() - start, 3),
+        }})
+
+    def stop(self, *_):
+        if not self._stop.is_set():
+            logger.info("Señal de parada recibida: el daemon termina después de la corrida en curso")
+        self._stop.set()
+        # Sin importar nada dentro del handler: si el descubrimiento está corriendo, el módulo ya está cargado
+        discovery = sys.modules.get('main')
+        if discovery is not None:
+            discovery.stop_event.set()
+
+    def run_forever(self, cycles: Optional[int] = None):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        next_run = time.monotonic()
+        while not self._stop.is_set():
+            if self._stop.wait(max(0.0, next_run - time.monotonic())):
+                break
+            self.run_cycle()
+            if cycles is not None and self.cycles >= cycles:
+                break
+            next_run = max(next_run + self.interval, time.monotonic())
+
+    def shutdown(self):
+        from models import get_engine
+        if self.parse_stage is not None:
+            self.parse_stage.close()
+        telemetry.shutdown_telemetry()
+        get_engine().dispose()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Corre el scraper periódicamente en un proceso de larga vida")
+    parser.add_argument('--mode', choices=MODES, default=DAEMON_MODE)
+    parser.add_argument('--interval', type=float, default=DAEMON_INTERVAL, help="Segundos entre inicios de corrida")
+    parser.add_argument('--cycles', type=int, help="Terminar después de N corridas (por defecto, hasta SIGTERM)")
+    args = parser.parse_args(argv)
+
+    daemon = Daemon(args.mode, args.interval)
+    daemon.prepare()
+    try:
+        daemon.run_forever(args.cycles)
+    finally:
+        daemon.shutdown()
+
+
+if __name__ == "__main__":
+    main()
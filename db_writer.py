@@ -0,0 +1,344 @@
+import hashlib
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+
+from models import ScraperLinkedinJob, ScraperLinkedinJobDescription, ScraperLinkedinJobDetail, SessionLocal
+from metrics import DB_FLUSH_ROWS, DB_FLUSH_SECONDS, QUEUE_DEPTH
+from tracing import JobTrace
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_BATCH_SIZE = int(os.getenv('LINKEDIN_DB_BATCH_SIZE', 100))
+DB_FLUSH_INTERVAL = float(os.getenv('LINKEDIN_DB_FLUSH_INTERVAL', 2.0))
+# Descripciones en scraper_linkedin_job_descriptions por hash en vez de texto en cada detalle
+DESCRIPTION_DEDUPE = os.getenv('LINKEDIN_DESCRIPTION_DEDUPE', 'true').lower() == 'true'
+# Hashes ya persistidos que este proceso recuerda, para no reenviar el texto a la base
+DESCRIPTION_CACHE_SIZE = int(os.getenv('LINKEDIN_DESCRIPTION_CACHE_SIZE', 50000))
+
+DETAIL_COLUMNS = [column.name for column in ScraperLinkedinJobDetail.__table__.columns]
+
+
+def description_hash(description: str) -> str:
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+class JobWriter:
+    """
+    Escritor write-behind: los threads de extracción encolan detalles y cambios de estado,
+    y un thread de fondo los persiste por lotes con un INSERT ... ON CONFLICT DO UPDATE
+    multi-fila en scraper_linkedin_job_details_hot más un UPDATE por estado en scraper_linkedin_jobs.
+
+    Se vacía al llegar a batch_size filas o cada flush_interval segundos. Los productores se
+    bloquean mientras haya un lote completo sin persistir, así una caída pierde como máximo un lote.
+
+    Con dedupe_descriptions, el detalle guarda solo el sha256 de la descripción y el texto va una
+    vez a scraper_linkedin_job_descriptions (ON CONFLICT DO NOTHING); los hashes ya guardados por
+    este proceso ni siquiera se reenvían.
+
+    Los jobs encolados con trace registran persist_wait (desde que se encolan, incluida la espera
+    por un lote lleno, hasta que empieza su lote) y persist (la duración del lote), y ahí terminan.
+
+    Con lease_owner, los UPDATE de estado y de reintento solo tocan los jobs que siguen reclamados
+    por ese dueño, igual que release_jobs: si el lease venció y otra réplica tomó el job, el
+    resultado viejo no pisa su trabajo. renew_lease extiende el lease de un job que sigue en este
+    proceso (un reintento esperando en memoria) para que ninguna otra réplica lo reclame mientras tanto.
+
+    Con detail_only (replay.py) solo se hace upsert de los detalles: scraper_linkedin_jobs no se
+    toca, así un job que una réplica tiene in_progress no cambia de estado, y una fila escrita
+    después de la descarga del detalle (extract_date o refreshed_at más nuevos) no se reemplaza.
+    """
+    def __init__(self, batch_size: int = DB_BATCH_SIZE, flush_interval: float = DB_FLUSH_INTERVAL,
+                 session_factory=SessionLocal, dedupe_descriptions: bool = DESCRIPTION_DEDUPE,
+                 lease_owner: Optional[str] = None, detail_only: bool = False):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self.dedupe_descriptions = dedupe_descriptions
+        self.lease_owner = lease_owner
+        self.detail_only = detail_only
+        self._known_descriptions: OrderedDict = OrderedDict()  # solo lo usa el thread de fondo
+        self._cond = threading.Condition()
+        self._details: Dict[str, dict] = {}
+        self._statuses: Dict[str, str] = {}
+        self._retries: Dict[str, tuple] = {}
+        self._updates: Dict[str, dict] = {}  # cambios parciales de detalles (refresh)
+        self._leases: Dict[str, datetime] = {}  # job_id -> nuevo lease_expires_at
+        self._traces: Dict[str, tuple] = {}  # job_id -> (JobTrace, instante en que se encoló)
+        self._in_flight = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.flushed_details = 0
+        self.flushed_statuses = 0
+        self.flushed_retries = 0
+        self.flushed_updates = 0
+        self.flushed_leases = 0
+        self.flushed_descriptions = 0
+        self.description_bytes = 0
+        self.failed_batches = 0
+        self.flush_seconds = 0.0
+
+    def _queued(self) -> int:
+        return len(self._statuses) + len(self._updates) + len(self._leases)
+
+    def _unflushed(self) -> int:
+        return self._queued() + self._in_flight
+
+    def pending(self) -> int:
+        with self._cond:
+            return self._queued()
+
+    def start(self):
+        QUEUE_DEPTH.set_function(self.pending, queue='db_writer')
+        self._thread = threading.Thread(target=self._run, name="job-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def add_detail(self, row: dict, trace: Optional[JobTrace] = None):
+        """Encola un detalle completo; el job pasa a 'completed' en el mismo lote."""
+        self._put(row['id'], 'completed', row, trace=trace)
+
+    def mark_status(self, job_id: str, status: str, trace: Optional[JobTrace] = None):
+        self._put(job_id, status, None, trace=trace)
+
+    def mark_retry(self, job_id: str, attempts: int, next_attempt_at: datetime, trace: Optional[JobTrace] = None):
+        """Devuelve el job a la base como 'retry'; se puede reclamar desde next_attempt_at."""
+        self._put(job_id, 'retry', None, (attempts, next_attempt_at), trace)
+
+    def renew_lease(self, job_id: str, lease_expires_at: datetime):
+        """Extiende el lease de un job que sigue in_progress en este proceso; un estado encolado después lo reemplaza."""
+        with self._cond:
+            self._wait_for_room(job_id)
+            self._leases[job_id] = lease_expires_at
+            self._notify_if_full()
+
+    def update_detail(self, job_id: str, values: dict):
+        """UPDATE parcial de un detalle existente: solo las columnas de values (job_description se deduplica igual que en add_detail)."""
+        with self._cond:
+            self._wait_for_room(job_id)
+            self._updates.setdefault(job_id, {}).update(values)
+            self._notify_if_full()
+
+    def _wait_for_room(self, job_id: str):
+        while (self._unflushed() >= self.batch_size and not self._closed
+               and job_id not in self._statuses and job_id not in self._updates and job_id not in self._leases):
+            self._cond.wait()
+
+    def _notify_if_full(self):
+        if self._queued() >= self.batch_size:
+            self._cond.notify_all()
+
+    def _put(self, job_id: str, status: str, row: Optional[dict], retry: Optional[tuple] = None,
+             trace: Optional[JobTrace] = None):
+        enqueued = time.perf_counter()
+        with self._cond:
+            self._wait_for_room(job_id)
+            if trace is not None:
+                self._traces[job_id] = (trace, enqueued)
+            if row is not None:
+                self._details[job_id] = {column: row.get(column) for column in DETAIL_COLUMNS}
+            else:
+                self._details.pop(job_id, None)
+            if retry is not None:
+                self._retries[job_id] = retry
+            else:
+                self._retries.pop(job_id, None)
+            self._leases.pop(job_id, None)
+            self._statuses[job_id] = status
+            self._notify_if_full()
+
+    def _take_batch(self):
+        details = list(self._details.values())
+        statuses = self._statuses
+        retries = self._retries
+        updates = self._updates
+        leases = self._leases
+        traces = self._traces
+        self._details = {}
+        self._statuses = {}
+        self._retries = {}
+        self._updates = {}
+        self._leases = {}
+        self._traces = {}
+        self._in_flight = len(statuses) + len(updates) + len(leases)
+        return details, statuses, retries, updates, leases, traces
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while self._queued() < self.batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                closing = self._closed
+                details, statuses, retries, updates, leases, traces = self._take_batch()
+
+            if statuses or updates or leases:
+                flush_start = time.perf_counter()
+                self._flush(details, statuses, retries, updates, leases)
+                if traces:
+                    self._finish_traces(traces, flush_start, time.perf_counter())
+
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+                if closing and not self._queued():
+                    return
+
+    @staticmethod
+    def _finish_traces(traces: Dict[str, tuple], flush_start: float, flush_end: float):
+        for trace, enqueued in traces.values():
+            trace.add('persist_wait', max(0.0, flush_start - enqueued))
+            trace.add('persist', flush_end - flush_start)
+            trace.finish()
+
+    def _split_descriptions(self, rows: List[dict]) -> Dict[str, str]:
+        """Reemplaza job_description por description_hash y retorna las descripciones que falta enviar."""
+        descriptions = {}
+        for row in rows:
+            if 'job_description' not in row:
+                continue
+            description = row['job_description']
+            if not description:
+                row['description_hash'] = None
+                continue
+            content_hash = description_hash(description)
+            row['job_description'] = None
+            row['description_hash'] = content_hash
+            if content_hash in self._known_descriptions:
+                self._known_descriptions.move_to_end(content_hash)
+            else:
+                descriptions[content_hash] = description
+        return descriptions
+
+    def _remember_descriptions(self, hashes):
+        for content_hash in hashes:
+            self._known_descriptions[content_hash] = True
+        while len(self._known_descriptions) > DESCRIPTION_CACHE_SIZE:
+            self._known_descriptions.popitem(last=False)
+
+    def _flush(self, details: List[dict], statuses: Dict[str, str], retries: Optional[Dict[str, tuple]] = None,
+               updates: Optional[Dict[str, dict]] = None, leases: Optional[Dict[str, datetime]] = None):
+        start = time.perf_counter()
+        session = self.session_factory()
+        descriptions = {}
+        if self.dedupe_descriptions:
+            descriptions = self._split_descriptions(details + list((updates or {}).values()))
+        try:
+            if descriptions:
+                now = datetime.utcnow()
+                session.execute(
+                    insert(ScraperLinkedinJobDescription)
+                    .values([{"content_hash": content_hash, "content": content, "created_at": now}
+                             for content_hash, content in descriptions.items()])
+                    .on_conflict_do_nothing(index_elements=['content_hash'])
+                )
+            if details:
+                stmt = insert(ScraperLinkedinJobDetail).values(details)
+                current = ScraperLinkedinJobDetail.__table__.c
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['id'],
+                    set_={column: stmt.excluded[column] for column in DETAIL_COLUMNS if column != 'id'},
+                    where=(func.coalesce(current.refreshed_at, current.extract_date) <= stmt.excluded.extract_date
+                           if self.detail_only else None),
+                )
+                session.execute(stmt)
+            if self.detail_only:
+                statuses, retries, leases = {}, None, None
+
+            owned = [ScraperLinkedinJob.lease_owner == self.lease_owner] if self.lease_owner is not None else []
+            if leases:
+                session.execute(
+                    update(ScraperLinkedinJob).where(ScraperLinkedinJob.status == 'in_progress', *owned)
+                    .execution_options(synchronize_session=None),
+                    [{"id": job_id, "lease_expires_at": lease_expires_at} for job_id, lease_expires_at in leases.items()],
+                )
+            by_status: Dict[str, List[str]] = {}
+            for job_id, status in statuses.items():
+                if status != 'retry':
+                    by_status.setdefault(status, []).append(job_id)
+            for status, job_ids in by_status.items():
+                session.execute(
+                    update(ScraperLinkedinJob)
+                    .where(ScraperLinkedinJob.id.in_(job_ids), *owned)
+                    .values(status=status, lease_owner=None, lease_expires_at=None, next_attempt_at=None)
+                )
+            if retries:
+                # UPDATE por clave primaria con executemany: cada job tiene su propio intento y vencimiento.
+                # Con owned, el WHERE extra no permite sincronizar la sesión (que de todos modos no tiene los jobs)
+                session.execute(update(ScraperLinkedinJob).where(*owned).execution_options(synchronize_session=None), [
+                    {"id": job_id, "status": 'retry', "attempts": attempts, "next_attempt_at": next_attempt_at,
+                     "lease_owner": None, "lease_expires_at": None}
+                    for job_id, (attempts, next_attempt_at) in retries.items()
+                ])
+
+            if updates:
+                # executemany por clave primaria; SQLAlchemy agrupa las filas con el mismo conjunto de columnas
+                session.execute(update(ScraperLinkedinJobDetail), [{"id": job_id, **values} for job_id, values in updates.items()])
+
+            session.commit()
+            elapsed = time.perf_counter() - start
+            self._remember_descriptions(descriptions)
+            self.flushed_updates += len(updates or ())
+            self.flushed_leases += len(leases or ())
+            self.flushed_descriptions += len(descriptions)
+            self.description_bytes += sum(len(content.encode('utf-8')) for content in descriptions.values())
+            self.flushed_details += len(details)
+            self.flushed_statuses += len(statuses)
+            self.flushed_retries += len(retries or ())
+            self.flush_seconds += elapsed
+            DB_FLUSH_SECONDS.observe(elapsed, result='ok')
+            DB_FLUSH_ROWS.inc(len(details), kind='details')
+            DB_FLUSH_ROWS.inc(len(statuses), kind='statuses')
+            DB_FLUSH_ROWS.inc(len(descriptions), kind='descriptions')
+            DB_FLUSH_ROWS.inc(len(updates or ()), kind='updates')
+            DB_FLUSH_ROWS.inc(len(leases or ()), kind='leases')
+            logger.info(f"Lote guardado: {len(details)} detalles, {len(statuses)} estados, "
+                        f"{len(updates or ())} cambios parciales en {elapsed:.3f}s")
+        except Exception as e:
+            # Los jobs del lote siguen reclamados y vuelven al pool cuando vence su lease
+            session.rollback()
+            self.failed_batches += 1
+            DB_FLUSH_SECONDS.observe(time.perf_counter() - start, result='error')
+            logger.error(f"Error guardando lote de {len(statuses) + len(updates or ())} jobs: {e}", exc_info=True)
+        finally:
+            session.close()
+
+    def close(self):
+        """Persiste lo pendiente y detiene el thread de fondo."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "flushed_details": self.flushed_details,
+            "flushed_statuses": self.flushed_statuses,
+            "flushed_retries": self.flushed_retries,
+            "flushed_updates": self.flushed_updates,
+            "flushed_leases": self.flushed_leases,
+            "flushed_descriptions": self.flushed_descriptions,
+            "description_bytes": self.description_bytes,
+            "failed_batches": self.failed_batches,
+            "flush_seconds": round(self.flush_seconds, 3),
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,364 @@
+import asyncio
+import os
+import random
+import ssl
+import threading
+import time
+import logging
+from typing import Dict, List, Optional
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from egress import EGRESS_SPECS, EgressPool, outcome_for
+from rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+from metrics import FETCH_SECONDS, HTTP_IN_FLIGHT
+from tracing import current_trace
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+DEFAULT_HEADERS = {
+    'User-Agent': DEFAULT_USER_AGENT,
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Tamaño del pool: por defecto el mayor entre workers de descubrimiento y threads de extracción
+HTTP_POOL_SIZE = int(os.getenv('LINKEDIN_HTTP_POOL_SIZE', 0)) or max(
+    int(os.getenv('LINKEDIN_MAX_WORKERS', 4)),
+    int(os.getenv('LINKEDIN_MAX_THREADS', 2)),
+)
+HTTP2_ENABLED = os.getenv('LINKEDIN_HTTP2', 'false').lower() == 'true'
+# Conexiones por httpx.AsyncClient del motor async: el pool de httpcore recorre todas sus conexiones
+# por cada solicitud en espera, así que con cientos en vuelo conviene repartirlas en varios pools chicos
+ASYNC_POOL_SHARD_SIZE = int(os.getenv('LINKEDIN_ASYNC_POOL_SHARD_SIZE', 8))
+# Muestras de latencia guardadas para los percentiles (reservoir sampling)
+LATENCY_SAMPLE_SIZE = 10000
+
+
+class RequestStats:
+    """Contadores thread-safe de solicitudes y tiempos por código de estado, con percentiles p50/p99."""
+    def __init__(self, sample_size: int = LATENCY_SAMPLE_SIZE):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.by_status: Dict[int, int] = {}
+        self.sample_size = sample_size
+        self._samples: List[float] = []
+
+    def record(self, status_code: Optional[int], elapsed: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += elapsed
+            if len(self._samples) < self.sample_size:
+                self._samples.append(elapsed)
+            else:
+                slot = random.randrange(self.count)
+                if slot < self.sample_size:
+                    self._samples[slot] = elapsed
+            if status_code is None:
+                self.errors += 1
+            else:
+                self.by_status[status_code] = self.by_status.get(status_code, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            return {
+                "requests": self.count,
+                "errors": self.errors,
+                "avg_seconds": round(self.total_seconds / self.count, 4) if self.count else 0.0,
+                "p50_seconds": round(samples[len(samples) // 2], 4) if samples else 0.0,
+                "p99_seconds": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 4) if samples else 0.0,
+                "by_status": dict(self.by_status),
+            }
+
+
+class Http2Response:
+    """Adapta una respuesta de httpx a la interfaz de requests que usan los scrapers."""
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def content(self) -> bytes:
+        return self._response.content
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class HttpClient:
+    """
+    Cliente HTTP compartido entre threads: pool de conexiones keep-alive,
+    headers por defecto y medición de tiempo por solicitud.
+    Con http2=True usa httpx (si está instalado) en lugar de requests.
+    Si recibe un rate_limiter, cada solicitud espera su token y le informa 429 y éxitos.
+    Con un egress_pool cada solicitud sale por una salida del pool (con su propia sesión y su
+    propio limitador) y el rate_limiter global no se usa.
+    """
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, http2: bool = HTTP2_ENABLED, headers: Optional[dict] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None, egress_pool: Optional[EgressPool] = None):
+        self.pool_size = pool_size
+        self.egress_pool = egress_pool
+        self.rate_limiter = rate_limiter if egress_pool is None else None
+        self.headers = dict(DEFAULT_HEADERS)
+        if headers:
+            self.headers.update(headers)
+        self.stats = RequestStats()
+        self.http2 = False
+        self._session = None
+        self._http2_client = None
+
+        if http2 and egress_pool is not None:
+            logger.warning("LINKEDIN_HTTP2 no se usa con LINKEDIN_EGRESS: cada salida usa su sesión HTTP/1.1")
+        elif http2:
+            try:
+                import httpx
+                self._http2_client = httpx.Client(
+                    http2=True,
+                    headers=self.headers,
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                    follow_redirects=True,
+                )
+                self.http2 = True
+            except ImportError:
+                logger.warning("LINKEDIN_HTTP2 activado pero httpx[http2] no está instalado, usando HTTP/1.1")
+
+        if not self.http2 and egress_pool is None:
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+
+    @property
+    def paced(self) -> bool:
+        """True si las solicitudes ya esperan a un limitador (global o de cada salida) y los reintentos no necesitan dormir."""
+        return self.rate_limiter is not None or self.egress_pool is not None
+
+    def get(self, url: str, timeout: float = 20, headers: Optional[dict] = None, phase: str = 'other'):
+        """phase ('discovery' o 'extraction') solo se usa como etiqueta de las métricas."""
+        trace = current_trace()
+        waited = time.perf_counter()
+        egress, limiter = self._route()
+        if limiter is not None:
+            limiter.acquire()
+        start = self._begin(phase, waited, trace)
+        status_code = None
+        try:
+            if egress is not None:
+                response = egress.session.get(url, headers=headers, timeout=timeout)
+                # Para que on_empty sepa a qué salida atribuir una página vacía
+                response.egress = egress
+            elif self.http2:
+                import httpx
+                try:
+                    response = Http2Response(self._http2_client.get(url, headers=headers, timeout=timeout))
+                except httpx.TimeoutException as e:
+                    raise requests.exceptions.Timeout(str(e))
+                except httpx.HTTPError as e:
+                    raise requests.exceptions.ConnectionError(str(e))
+            else:
+                response = self._session.get(url, headers=headers, timeout=timeout)
+            status_code = response.status_code
+            self._settle(limiter, status_code)
+            return response
+        finally:
+            self._finish(url, phase, status_code, start, egress, trace)
+
+    def _route(self):
+        """Elige la salida (si hay pool) y el limitador de la próxima solicitud."""
+        egress = self.egress_pool.acquire() if self.egress_pool is not None else None
+        return egress, egress.limiter if egress is not None else self.rate_limiter
+
+    @staticmethod
+    def _begin(phase: str, waited: float, trace) -> float:
+        start = time.perf_counter()
+        if trace is not None:
+            trace.add('rate_wait', start - waited)
+        HTTP_IN_FLIGHT.inc(phase=phase)
+        return start
+
+    @staticmethod
+    def _settle(limiter, status_code: int):
+        if limiter is not None:
+            if status_code == 429:
+                limiter.on_throttle('429')
+            elif status_code < 400:
+                limiter.on_success()
+
+    def _finish(self, url: str, phase: str, status_code: Optional[int], start: float, egress, trace):
+        elapsed = time.perf_counter() - start
+        HTTP_IN_FLIGHT.dec(phase=phase)
+        FETCH_SECONDS.observe(elapsed, phase=phase, status=status_code or 'error')
+        self.stats.record(status_code, elapsed)
+        if trace is not None:
+            trace.add('fetch', elapsed)
+        if egress is not None:
+            self.egress_pool.release(egress, outcome_for(status_code), elapsed)
+        logger.debug(f"GET {url} -> {status_code} en {elapsed:.3f}s")
+
+    def on_empty(self, response):
+        """Una página de búsqueda vacía (throttling encubierto): baja la tasa del limitador que sirvió la respuesta."""
+        egress = getattr(response, 'egress', None)
+        if egress is not None:
+            self.egress_pool.report(egress, 'empty')
+            if egress.limiter is not None:
+                egress.limiter.on_throttle('empty')
+        elif self.rate_limiter is not None:
+            self.rate_limiter.on_throttle('empty')
+
+    def at_min_rate(self) -> bool:
+        """True si ya no hay margen para bajar la tasa: sin limitador, limitador en el mínimo o todas las salidas agotadas."""
+        if self.egress_pool is not None:
+            return self.egress_pool.exhausted()
+        return self.rate_limiter is None or self.rate_limiter.at_min_rate()
+
+    def close(self):
+        if self._http2_client is not None:
+            self._http2_client.close()
+        if self._session is not None:
+            self._session.close()
+        if self.egress_pool is not None:
+            self.egress_pool.close()
+
+
+class AsyncHttpClient:
+    """
+    Versión asyncio de HttpClient para el motor de extracción asíncrono (async_engine.py): hasta
+    `concurrency` conexiones keep-alive repartidas en httpx.AsyncClient de LINKEDIN_ASYNC_POOL_SHARD_SIZE
+    conexiones cada uno (por salida si hay pool); cada solicitud va al menos ocupado.
+    Comparte con el HttpClient `client` el limitador, el pool de salidas y las estadísticas, así
+    los resúmenes y métricas de la corrida no cambian. Las respuestas y errores se adaptan a la
+    interfaz de requests, como con LINKEDIN_HTTP2. Requiere httpx (ImportError si no está); con
+    http2=True los pools negocian HTTP/2 si también está instalado httpx[http2].
+    """
+    def __init__(self, client: HttpClient, concurrency: int, shard_size: int = ASYNC_POOL_SHARD_SIZE,
+                 http2: bool = HTTP2_ENABLED):
+        import httpx
+        self._httpx = httpx
+        self.client = client
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("LINKEDIN_HTTP2 activado pero httpx[http2] no está instalado, usando HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+        self.stats = client.stats
+        shard_size = max(1, min(shard_size, concurrency))
+        self._shard_count = -(-concurrency // shard_size)
+        self._limits = httpx.Limits(max_connections=shard_size, max_keepalive_connections=shard_size)
+        # Un solo contexto SSL para todos los pools: crear uno por AsyncClient cuesta memoria y CPU
+        self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        # Por salida (None = directo): [solicitudes en curso, AsyncClient] de cada pool
+        self._shards: Dict[Optional[str], List[list]] = {}
+        self._pacing: Dict[AdaptiveRateLimiter, asyncio.Lock] = {}
+
+    def _new_client(self, egress):
+        httpx = self._httpx
+        options = {}
+        if egress is not None and egress.spec.startswith('source:'):
+            options['transport'] = httpx.AsyncHTTPTransport(local_address=egress.spec.split(':', 1)[1], limits=self._limits,
+                                                            verify=self._ssl_context, http2=self.http2)
+        elif egress is not None and egress.spec != 'direct':
+            options['proxy'] = egress.spec
+        return httpx.AsyncClient(headers=self.client.headers, limits=self._limits, verify=self._ssl_context,
+                                 http2=self.http2, follow_redirects=True, **options)
+
+    def _shard_for(self, egress) -> list:
+        key = egress.name if egress is not None else None
+        shards = self._shards.get(key)
+        if shards is None:
+            shards = self._shards[key] = [[0, None] for _ in range(self._shard_count)]
+        shard = min(shards, key=lambda entry: entry[0])
+        if shard[1] is None:
+            shard[1] = self._new_client(egress)
+        return shard
+
+    async def _route(self):
+        """Como HttpClient._route, pero si todas las salidas tienen el circuito abierto espera con asyncio.sleep."""
+        pool = self.client.egress_pool
+        if pool is None:
+            return None, self.client.rate_limiter
+        while True:
+            egress, wait = pool.try_acquire()
+            if egress is not None:
+                return egress, egress.limiter
+            await asyncio.sleep(wait)
+
+    async def _pace(self, limiter: AdaptiveRateLimiter):
+        """
+        Espera un token de limiter sin bloquear el loop. Las corrutinas de un mismo limitador hacen
+        fila en un asyncio.Lock y solo la primera consulta al limitador, así cada token despierta a
+        una sola y la espera se recalcula con la tasa del momento.
+        """
+        lock = self._pacing.get(limiter)
+        if lock is None:
+            lock = self._pacing[limiter] = asyncio.Lock()
+        async with lock:
+            while True:
+                wait = limiter.try_acquire()
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+
+    async def get(self, url: str, timeout: float = 20, headers: Optional[dict] = None, phase: str = 'other', trace=None):
+        """Como HttpClient.get; el token del limitador se espera con asyncio.sleep y trace va explícito (no hay thread por job)."""
+        waited = time.perf_counter()
+        egress, limiter = await self._route()
+        if limiter is not None:
+            await self._pace(limiter)
+        start = self.client._begin(phase, waited, trace)
+        status_code = None
+        shard = self._shard_for(egress)
+        shard[0] += 1
+        try:
+            try:
+                response = Http2Response(await shard[1].get(url, headers=headers, timeout=timeout))
+            except self._httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e))
+            except self._httpx.HTTPError as e:
+                raise requests.exceptions.ConnectionError(str(e))
+            if egress is not None:
+                response.egress = egress
+            status_code = response.status_code
+            self.client._settle(limiter, status_code)
+            return response
+        finally:
+            shard[0] -= 1
+            self.client._finish(url, phase, status_code, start, egress, trace)
+
+    async def aclose(self):
+        for shards in self._shards.values():
+            for _, client in shards:
+                if client is not None:
+                    await client.aclose()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Retorna el cliente HTTP del proceso, creándolo en el primer uso."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                egress_pool = EgressPool(EGRESS_SPECS, HTTP_POOL_SIZE, DEFAULT_HEADERS) if EGRESS_SPECS else None
+                _client = HttpClient(rate_limiter=get_rate_limiter(), egress_pool=egress_pool)
+    return _client
@@ -1,20 +1,26 @@
+import argparse
 import requests
 import time
-from bs4 import BeautifulSoup
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import threading
+import socket
 from dotenv import load_dotenv
 import os
 from datetime import datetime, timedelta, timezone
-import re
 import logging
-from sqlalchemy.dialects.postgresql import insert
-from models import ScraperLinkedinJob, ScraperLinkedinJobDetail, Base, SessionLocal, engine, ScraperEvent
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import json
-import logging
-from logging_loki import LokiHandler
+from sqlalchemy import select, update, or_, and_, func
+from models import CLAIMABLE_STATUSES, ScraperLinkedinJob, ScraperLinkedinJobDetail, SessionLocal
+from concurrent.futures import Future, ThreadPoolExecutor
+from http_client import get_client
+from job_parser import parse_job_html, build_detail_row, job_url
+from archive import get_archive
+from db_writer import JobWriter
+from parse_stage import get_parse_stage
+from retry_scheduler import RetryScheduler, backoff_delay, MAX_ATTEMPTS
+from metrics import RESPONSES, JOBS_IN_FLIGHT, JOBS_PROCESSED, start_metrics_server
+from tracing import active_trace, get_recorder, span_summary, start_trace
+import profiler
+import telemetry
+from telemetry import setup_loki_logging
 
 # Configurar logging
 class CustomFormatter(logging.Formatter):
@@ -22,71 +28,13 @@ class CustomFormatter(logging.Formatter):
         record.message = record.getMessage()
         return f"{self.formatTime(record, self.datefmt)} - {record.levelname} - [linkedin-extract] - {record.message}"
 
-class LokiJsonFormatter(logging.Formatter):
-    def format(self, record):
-        # Create structured log entry for Loki
-        log_entry = {
-            "timestamp": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-            "service": "linkedin-scraper"
-        }
-        
-        # Add extra fields if present
-        if hasattr(record, 'extra_fields'):
-            log_entry.update(record.extra_fields)
-            
-        return json.dumps(log_entry)
-
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Logging configuration
 LOG_EVENTS_ENABLED = os.getenv('LOG_EVENTS_ENABLED', 'true').lower() == 'true'
-LOKI_ENABLED = os.getenv('LOKI_ENABLED', 'true').lower() == 'true'
-
-# Configure logging for Loki
-def setup_loki_logging():
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Remove existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-
-    # Get Loki configuration from environment
-    loki_url = os.getenv('GRAFANA_LOKI_URL')
-    loki_username = os.getenv('GRAFANA_USER_ID')
-    loki_password = os.getenv('GRAFANA_API_KEY')
-    
-    if loki_url:
-        # Configure Loki handler for Grafana Cloud
-        # Grafana Cloud uses API key authentication
-        headers = {}
-        if loki_password:  # API key
-            headers['Authorization'] = f'Bearer {loki_password}'
-        
-        loki_handler = LokiHandler(
-            url=loki_url,
-            tags={"service": "linkedin-scraper"},
-            auth=(loki_username or "user", loki_password),  # API key as password
-            version="1",
-        )
-        logger.addHandler(loki_handler)
-        
-        # Also keep console output for local debugging
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(LokiJsonFormatter())
-        logger.addHandler(console_handler)
-    else:
-        # Fallback to console-only logging
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(LokiJsonFormatter())
-        logger.addHandler(console_handler)
-        logger.warning("LOKI_URL not configured, using console logging only")
-    
-    return logger
+# Las mismas ubicaciones que busca main.py; dan nombre al proceso en los ScraperEvent
+LOCATIONS = [loc.strip() for loc in os.getenv('LINKEDIN_LOCATIONS', os.getenv('LINKEDIN_LOCATION', 'Chile')).split(',') if loc.strip()]
 
 # Custom logging functions for metrics
 def log_metric(logger, event_type, **kwargs):
@@ -99,251 +47,505 @@ def log_metric(logger, event_type, **kwargs):
     
     logger.info(f"Metric: {event_type}", extra={"extra_fields": extra_fields})
 
-def log_db_event(event_type, records_count=0, execution_time=0.0, status="success", error_message=None):
-    """Log a simple scraper event to the database"""
-    try:
-        session = SessionLocal()
-        event = ScraperEvent()
-        event.process_name = "linkedin-scraper-chile"  # TODO: Make configurable
-        event.event_type = event_type
-        event.records_count = records_count
-        event.status = status
-        event.execution_time_seconds = execution_time
-        event.error_message = error_message
-        session.add(event)
-        session.commit()
-        print(f"📝 DB Event logged: {event_type} ({records_count} records)")
-    except Exception as e:
-        print(f"❌ Failed to log DB event {event_type}: {e}")
-    finally:
-        session.close()
-
-setup_loki_logging()
+def log_db_event(event_type, records_count=0, execution_time=0.0, status="success", error_message=None, details=None):
+    """Log a simple scraper event to the database (buffered, inserted in batches)"""
+    telemetry.log_db_event(telemetry.process_name(LOCATIONS), event_type, records_count, execution_time, status, error_message, details)
 
 # Cargar variables de entorno
-logger.info("Cargando variables de entorno...")
 load_dotenv()
 
 # Configuración
 MAX_CONSECUTIVE_404 = int(os.getenv('LINKEDIN_MAX_CONSECUTIVE_404', 10))
+# Reintentos en memoria por job y corrida; el backoff (LINKEDIN_RETRY_DELAY) y el tope total están en retry_scheduler
 MAX_RETRIES = int(os.getenv('LINKEDIN_MAX_RETRIES', 5))
-RETRY_DELAY = int(os.getenv('LINKEDIN_RETRY_DELAY', 5))
 MAX_THREADS = int(os.getenv('LINKEDIN_MAX_THREADS', 2))  # Configurable, default 2
+# Jobs enviados al pool y aún no terminados; por defecto 2 por thread
+MAX_IN_FLIGHT = int(os.getenv('LINKEDIN_MAX_IN_FLIGHT', MAX_THREADS * 2))
+# Claim/lease: cada réplica reclama lotes pequeños y el lease vencido devuelve el job al pool
+CLAIM_BATCH_SIZE = int(os.getenv('LINKEDIN_CLAIM_BATCH_SIZE', max(MAX_IN_FLIGHT, 10)))
+LEASE_SECONDS = int(os.getenv('LINKEDIN_LEASE_SECONDS', 900))
+WORKER_ID = os.getenv('LINKEDIN_WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}"
+# Orden de reclamo dentro de cada priority: freshness (publicación o descubrimiento más reciente primero) o id
+CLAIM_ORDER = os.getenv('LINKEDIN_CLAIM_ORDER', 'freshness')
+# Motor de extracción: threads (un thread por descarga) o async (asyncio + httpx, ver async_engine.py)
+EXTRACTION_ENGINE = os.getenv('LINKEDIN_EXTRACTION_ENGINE', 'threads')
+# Presupuesto de tiempo de una corrida en segundos (0 = hasta vaciar el backlog); --time-budget lo reemplaza
+TIME_BUDGET = float(os.getenv('LINKEDIN_TIME_BUDGET', 0))
+# Antes del fin del presupuesto se deja de tomar trabajo nuevo, para terminar los jobs en curso y el último lote
+TIME_BUDGET_MARGIN = float(os.getenv('LINKEDIN_TIME_BUDGET_MARGIN', 30))
+# Un job cumple el SLA de frescura si se extrae antes de estas horas desde su publicación (o descubrimiento)
+FRESHNESS_SLA_HOURS = float(os.getenv('LINKEDIN_FRESHNESS_SLA_HOURS', 24))
+
+
+def freshness_key():
+    """Instante de referencia de un job: la fecha de la tarjeta si se conoce, si no cuándo se descubrió."""
+    return func.coalesce(ScraperLinkedinJob.listed_at, ScraperLinkedinJob.created_at)
+
+
+def claim_statement(owner=WORKER_ID, limit=CLAIM_BATCH_SIZE, lease_seconds=LEASE_SECONDS, order=CLAIM_ORDER):
+    """
+    UPDATE ... RETURNING que reclama hasta `limit` jobs. Cada rama del OR filtra por un estado de
+    CLAIMABLE_STATUSES, así Postgres usa un índice parcial de la cola y el costo no crece con los
+    jobs ya completados. Primero va priority (los jobs que el modo liviano mandó al final de la cola
+    salen después del resto del backlog); dentro de cada priority, con order='freshness', los más
+    recientes según freshness_key (índice ix_scraper_linkedin_jobs_claim_freshness), y con 'id' el
+    orden de IDs de antes (índice ix_scraper_linkedin_jobs_claim_id).
+    """
+    now = datetime.utcnow()
+    if order == 'freshness':
+        ordering = (ScraperLinkedinJob.priority, freshness_key().desc(), ScraperLinkedinJob.id.desc())
+    else:
+        ordering = (ScraperLinkedinJob.priority, ScraperLinkedinJob.id)
+    claimable = (
+        select(ScraperLinkedinJob.id)
+        .where(or_(
+            ScraperLinkedinJob.status == 'pending',
+            and_(ScraperLinkedinJob.status == 'retry', ScraperLinkedinJob.next_attempt_at <= now),
+            and_(ScraperLinkedinJob.status == 'in_progress', ScraperLinkedinJob.lease_expires_at < now),
+        ))
+        .order_by(*ordering)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(ScraperLinkedinJob)
+        .where(ScraperLinkedinJob.id.in_(claimable))
+        .values(status='in_progress', lease_owner=owner, lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .returning(ScraperLinkedinJob.id, ScraperLinkedinJob.country, ScraperLinkedinJob.attempts)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def claim_jobs(owner=WORKER_ID, limit=CLAIM_BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+    """
+    Reclama atómicamente hasta `limit` jobs pendientes, con reintento vencido o con lease vencido
+    para este extractor. FOR UPDATE SKIP LOCKED evita que dos réplicas tomen el mismo job.
+    Retorna una lista de (id, country, attempts).
+    """
+    with SessionLocal() as session:
+        rows = session.execute(claim_statement(owner, limit, lease_seconds)).all()
+        session.commit()
+    return [(job_id, country, attempts or 0) for job_id, country, attempts in rows]
 
-def parse_posted_time(posted_time_text, current_time=None):
-    if not posted_time_text:
-        return None
 
-    if current_time is None:
-        current_time = datetime.now(timezone.utc)
+def release_jobs(job_ids, owner=WORKER_ID):
+    """
+    Devuelve a 'pending' jobs reclamados que no se alcanzaron a procesar, para que la próxima
+    corrida (o otra réplica) los tome sin esperar que venza el lease. Los intentos no cambian.
+    """
+    if not job_ids:
+        return 0
+    with SessionLocal() as session:
+        result = session.execute(
+            update(ScraperLinkedinJob)
+            .where(ScraperLinkedinJob.id.in_(job_ids), ScraperLinkedinJob.lease_owner == owner,
+                   ScraperLinkedinJob.status == 'in_progress')
+            .values(status='pending', lease_owner=None, lease_expires_at=None, next_attempt_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+    return result.rowcount
+
+
+def iter_claimed_jobs(owner=WORKER_ID, batch_size=CLAIM_BATCH_SIZE, deadline=None, on_released=None):
+    """
+    Recorre los jobs reclamados por lotes pequeños, así la memoria no crece con el backlog
+    y cada réplica solo retiene los jobs que está por procesar.
+
+    deadline (instante de time.monotonic()) corta la corrida: pasado ese instante no se reclaman
+    más lotes y lo que quede del lote actual se libera con release_jobs (on_released recibe cuántos).
+    """
+    logger.info(f"Reclamando trabajos pendientes como {owner}...")
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+        jobs = claim_jobs(owner, batch_size)
+        for position, job in enumerate(jobs):
+            if deadline is not None and time.monotonic() >= deadline:
+                released = release_jobs([job_id for job_id, _, _ in jobs[position:]], owner)
+                if on_released is not None:
+                    on_released(released)
+                return
+            yield job
+        if len(jobs) < batch_size:
+            return
+
+
+def schedule_retry(job_id, country, attempts, writer, scheduler=None, delay=None, trace=None):
+    """
+    Registra un intento fallido transitorio. Si la espera es corta el reintento queda en el heap
+    en memoria y el thread sigue con otro job, y el lease se extiende más allá de la espera para que
+    otra réplica no lo reclame entretanto; si no, el job vuelve a la base como 'retry' para una
+    corrida posterior. Al llegar a MAX_ATTEMPTS intentos el job queda 'failed'.
+    Retorna None (reintento agendado) o False (fallido).
+    """
+    attempts += 1
+    if attempts >= MAX_ATTEMPTS:
+        logger.error(f"La solicitud para el ID {job_id} falló después de {attempts} intentos.")
+        writer.mark_status(job_id, 'failed', trace)
+        return False
+    if delay is None:
+        delay = backoff_delay(attempts)
+    if scheduler is not None and scheduler.accepts(job_id, delay):
+        logger.info(f"Reintentando el ID {job_id} en {delay:.1f} segundos...")
+        writer.renew_lease(job_id, datetime.utcnow() + timedelta(seconds=delay + LEASE_SECONDS))
+        scheduler.schedule(job_id, country, attempts, delay)
+    else:
+        next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        logger.info(f"El ID {job_id} queda para reintento desde {next_attempt_at:%Y-%m-%d %H:%M:%S} UTC")
+        writer.mark_retry(job_id, attempts, next_attempt_at, trace)
+    return None
+
+
+def save_detail(job_id, country, url, fields, extract_date, writer, response=None, trace=None):
+    # Crear o actualizar detalle del trabajo (y marcar el job como completed)
+    content, headers = (response.content, response.headers) if response is not None else (None, None)
+    writer.add_detail(build_detail_row(job_id, country, url, fields, extract_date, content, headers), trace)
+    logger.info(f"Datos extraídos para el ID {job_id}.")
+    return True
+
+
+def parse_failed(job_id, writer, error, trace=None):
+    logger.error(f"Error inesperado procesando el ID {job_id}: {error}")
+    writer.mark_status(job_id, 'failed', trace)
+    return False
+
+
+def process_job(job_id, country, writer, attempts=0, scheduler=None, parse_stage=None, trace=None):
+    """
+    Descarga y parsea un job en un solo intento. El resultado se encola en el JobWriter, que lo
+    persiste por lotes; los errores transitorios se reagendan con schedule_retry sin dormir el thread.
+    Retorna True si el detalle fue extraído, False si el job quedó fallido y None si se reintentará.
+    Con parse_stage, el HTML se entrega al pool de procesos y se retorna un Future con ese resultado.
+    trace (tracing.JobTrace) acumula los spans del intento y termina cuando el JobWriter lo persiste.
+    """
+    url = job_url(job_id)
+    logger.info(f"Procesando ID {job_id} (intento {attempts + 1} de {MAX_ATTEMPTS})...")
+    if trace is not None:
+        trace.add('queue_wait', time.perf_counter() - trace.started)
+
+    response = None
+    try:
+        with active_trace(trace):
+            response = get_client().get(url, timeout=10, phase='extraction')
+        response.raise_for_status()
+        return handle_page(job_id, country, url, response, writer, parse_stage, trace)
+    except requests.exceptions.RequestException as e:
+        return handle_request_error(job_id, country, attempts, writer, scheduler, response, e, trace)
+    except Exception as e:
+        return parse_failed(job_id, writer, e, trace)
+
 
-    # Patron para extraer número y unidad (minutes, hours, days)
-    pattern = r"(\d+)\s+(minute|minutes|hour|hours|day|days|week|weeks|month|months)\s+ago"
-    match = re.search(pattern, posted_time_text)
+def handle_page(job_id, country, url, response, writer, parse_stage=None, trace=None):
+    """Archiva, parsea y encola el detalle de una respuesta exitosa. Con parse_stage retorna el Future del parseo."""
+    # UTC sin zona, como created_at y listed_at: el SLA de frescura resta estas columnas
+    extract_date = datetime.utcnow()
 
-    if not match:
-        return None
+    archive = get_archive()
+    if archive is not None:
+        archive.put('job', job_id, url, response.content, fetched_at=extract_date.replace(tzinfo=timezone.utc), country=country)
 
-    quantity = int(match.group(1))
-    unit = match.group(2)
-
-    if unit == "minute" or unit == "minutes":
-        delta = timedelta(minutes=quantity)
-    elif unit == "hour" or unit == "hours":
-        delta = timedelta(hours=quantity)
-    elif unit == "day" or unit == "days":
-        delta = timedelta(days=quantity)
-    elif unit == "week" or unit == "weeks":
-        delta = timedelta(weeks=quantity)
-    elif unit == "month" or unit == "months":
-        # Aproximadamente 30 días por mes
-        delta = timedelta(days=quantity * 30)
-    else:
-        return None
+    if parse_stage is not None:
+        return parse_stage.submit(
+            response.content,
+            on_fields=lambda fields: save_detail(job_id, country, url, fields, extract_date, writer, response, trace),
+            on_error=lambda error: parse_failed(job_id, writer, error, trace),
+            trace=trace,
+        )
 
-    published_date = current_time - delta
-    return published_date
+    # Extraer información
+    parse_start = time.perf_counter()
+    fields = parse_job_html(response.content)
+    if trace is not None:
+        trace.add('parse', time.perf_counter() - parse_start)
+    return save_detail(job_id, country, url, fields, extract_date, writer, response, trace)
+
+
+def handle_request_error(job_id, country, attempts, writer, scheduler, response, error, trace=None):
+    """Un 404 deja el job fallido; un 429 con limitador se reintenta sin espera extra; el resto, con backoff."""
+    if response is not None and response.status_code in (404, 429):
+        RESPONSES.inc(phase='extraction', outcome=str(response.status_code))
+    elif response is None:
+        RESPONSES.inc(phase='extraction', outcome='error')
+    if response is not None and response.status_code == 404:
+        # Un 404 es permanente: no se reintenta
+        logger.warning(f"Recibido un 404 para el ID {job_id}.")
+        writer.mark_status(job_id, 'failed', trace)
+        return False
+    if response is not None and response.status_code == 429 and get_client().paced:
+        # El limitador (compartido o de la salida) ya bajó la tasa; el reintento espera su token
+        logger.warning(f"Recibido un 429 para el ID {job_id}, reintentando a menor tasa.")
+        return schedule_retry(job_id, country, attempts, writer, scheduler, delay=0, trace=trace)
+    logger.error(f"Error en la solicitud para el ID {job_id}: {error}")
+    return schedule_retry(job_id, country, attempts, writer, scheduler, trace=trace)
+
+
+class ThreadEngine:
+    """Motor de extracción por defecto: cada job ocupa un thread del pool mientras descarga."""
+    name = 'threads'
+
+    def __init__(self, max_threads=MAX_THREADS, max_in_flight=MAX_IN_FLIGHT):
+        self.max_threads = max_threads
+        self.max_in_flight = max_in_flight
+        self._executor = None
+
+    def submit(self, job_id, country, writer, attempts, scheduler, parse_stage, trace) -> Future:
+        return self._executor.submit(process_job, job_id, country, writer, attempts, scheduler, parse_stage, trace)
+
+    def __enter__(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.max_threads)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._executor.shutdown(wait=True)
+
+
+def make_engine(name=EXTRACTION_ENGINE, max_threads=None, max_in_flight=None):
+    """
+    Motor de extracción: 'threads' (ThreadEngine) o 'async' (async_engine.AsyncEngine, requiere httpx).
+    max_in_flight es el cupo de jobs en vuelo y max_threads los threads del motor (con async, los de
+    parseo y escritura); sin ellos cada motor usa su configuración: LINKEDIN_MAX_THREADS y
+    LINKEDIN_MAX_IN_FLIGHT, o LINKEDIN_ASYNC_OFFLOAD_THREADS y LINKEDIN_ASYNC_CONCURRENCY.
+    """
+    if name == 'async':
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            logger.warning("LINKEDIN_EXTRACTION_ENGINE=async requiere httpx, que no está instalado; usando threads")
+        else:
+            from async_engine import AsyncEngine
+            options = {}
+            if max_in_flight is not None:
+                options['concurrency'] = max_in_flight
+            if max_threads is not None:
+                options['offload_threads'] = max_threads
+            return AsyncEngine(**options)
+    elif name != 'threads':
+        raise ValueError(f"Motor de extracción desconocido: {name} (opciones: threads, async)")
+    return ThreadEngine(MAX_THREADS if max_threads is None else max_threads,
+                        MAX_IN_FLIGHT if max_in_flight is None else max_in_flight)
+
+
+def run_extraction(jobs, writer, max_threads=None, max_in_flight=None, on_result=None, scheduler=None,
+                   parse_stage=None, deadline=None, engine=None):
+    """
+    Procesa los (id, country[, attempts]) que entrega el iterable `jobs` con el motor `engine`
+    (por defecto make_engine() con max_threads y max_in_flight: un pool de threads, o el motor
+    asyncio con LINKEDIN_EXTRACTION_ENGINE=async; sin esos valores, los de la configuración del motor).
+    El iterable se consume a medida que se liberan cupos, así su productor (claims o la cola
+    del pipeline) recibe backpressure. Los reintentos vencidos del scheduler se intercalan con los
+    jobs nuevos. Retorna los contadores processed/saved/failed/retried.
+
+    Con parse_stage los threads solo descargan: un job sigue ocupando su cupo de max_in_flight
+    hasta que el pool de procesos termina de parsearlo.
+
+    Con deadline (instante de time.monotonic()) no se esperan los reintentos en memoria que venzan
+    después: al terminar los jobs en curso se guardan como 'retry' y se cuentan en deferred.
+    """
+    start_time = time.time()
+    scheduler = scheduler or RetryScheduler(MAX_RETRIES)
+    engine = engine or make_engine(max_threads=max_threads, max_in_flight=max_in_flight)
+    in_flight = threading.BoundedSemaphore(engine.max_in_flight)
+    counts_lock = threading.Lock()
+    counts = {"processed": 0, "saved": 0, "failed": 0, "retried": 0}
+    futures_ids = {}
+
+    def on_done(future):
+        job_id = futures_ids.pop(future, None)
+        finished = True
+        try:
+            result = future.result()
+            if isinstance(result, Future):
+                # El parseo sigue en el pool de procesos; el job termina cuando llega su resultado
+                finished = False
+                futures_ids[result] = job_id
+                result.add_done_callback(on_done)
+                return
+            if result is None:
+                # Reintento agendado: el job todavía no termina
+                with counts_lock:
+                    counts["retried"] += 1
+                JOBS_PROCESSED.inc(result="retry")
+                return
+            with counts_lock:
+                counts["processed"] += 1
+                counts["saved" if result else "failed"] += 1
+                processed_count = counts["processed"]
+            JOBS_PROCESSED.inc(result="saved" if result else "failed")
+            if on_result is not None:
+                on_result(job_id, result)
+
+            # Log progress every 10 jobs
+            if processed_count % 10 == 0:
+                elapsed = time.time() - start_time
+                logger.info(f"Procesados {processed_count} jobs en {elapsed:.1f}s")
+        except Exception as e:
+            logger.error(f"Error en thread para ID {job_id}: {e}")
+        finally:
+            if finished:
+                JOBS_IN_FLIGHT.dec()
+                scheduler.job_finished()
+                in_flight.release()
+
+    with engine:
+        # La cola del motor queda acotada por el semáforo: solo se envía un job cuando otro termina
+        for job in scheduler.iter_jobs(jobs, deadline):
+            # Los jobs del pipeline llegan como (id, country); los reclamados traen sus intentos previos
+            job_id, country = job[0], job[1]
+            attempts = job[2] if len(job) > 2 else 0
+            in_flight.acquire()
+            JOBS_IN_FLIGHT.inc()
+            scheduler.job_started()
+            future = engine.submit(job_id, country, writer, attempts, scheduler, parse_stage, start_trace(job_id))
+            futures_ids[future] = job_id
+            future.add_done_callback(on_done)
+
+    if deadline is not None:
+        pending = scheduler.drain()
+        for (job_id, country, attempts), delay in pending:
+            writer.mark_retry(job_id, attempts, datetime.utcnow() + timedelta(seconds=delay))
+        counts["deferred"] = len(pending)
+    return counts
+
+
+def log_extraction_summary(counts, writer, total_time):
+    log_metric(logger, "http_stats", phase="extraction", **get_client().stats.snapshot())
+    log_metric(logger, "db_writer_stats", phase="extraction", **writer.stats())
+    if get_client().rate_limiter is not None:
+        log_metric(logger, "rate_limiter", phase="extraction", **get_client().rate_limiter.snapshot())
+    if get_client().egress_pool is not None:
+        log_metric(logger, "egress_pool", phase="extraction", egresses=get_client().egress_pool.snapshot())
+    spans = span_summary()
+    if spans is not None:
+        log_metric(logger, "span_summary", phase="extraction", **spans)
+        log_db_event("span_summary", records_count=counts["processed"], execution_time=total_time, details=spans)
+    logger.info("Extracción completada")
+    logger.info(f"Procesamiento completado en {total_time:.1f}s. Jobs procesados: {counts['processed']} (guardados: {counts['saved']}, fallidos: {counts['failed']}, reintentos: {counts['retried']})")
 
 
-def get_pending_jobs():
-    logger.info("Obteniendo trabajos pendientes...")
+def freshness_report(since, sla_hours=FRESHNESS_SLA_HOURS):
+    """
+    Frescura de lo extraído desde `since` (UTC): cuántos jobs quedaron completos dentro de
+    sla_hours desde su freshness_key, la mediana de esa edad, y cuánto del backlog reclamable ya
+    pasó el SLA sin extraerse. Con varias réplicas cuenta lo extraído por todas en la ventana.
+    """
+    sla = timedelta(hours=sla_hours)
+    age = ScraperLinkedinJobDetail.extract_date - freshness_key()
     with SessionLocal() as session:
-        jobs = session.query(ScraperLinkedinJob).filter(ScraperLinkedinJob.status == 'pending').all()
-        return [(job.id, job.country) for job in jobs]
+        extracted, within_sla, median_age = session.execute(
+            select(func.count(), func.count().filter(age <= sla),
+                   func.percentile_cont(0.5).within_group(func.extract('epoch', age)))
+            .select_from(ScraperLinkedinJobDetail)
+            .join(ScraperLinkedinJob, ScraperLinkedinJob.id == ScraperLinkedinJobDetail.id)
+            .where(ScraperLinkedinJobDetail.extract_date >= since, ScraperLinkedinJob.status == 'completed')
+        ).one()
+        backlog, backlog_over_sla = session.execute(
+            select(func.count(), func.count().filter(freshness_key() < datetime.utcnow() - sla))
+            .where(ScraperLinkedinJob.status.in_(CLAIMABLE_STATUSES))
+        ).one()
+    return {
+        "sla_hours": sla_hours,
+        "extracted": extracted,
+        "within_sla": within_sla,
+        "within_sla_share": round(within_sla / extracted, 4) if extracted else None,
+        "median_age_hours": round(median_age / 3600, 2) if median_age is not None else None,
+        "backlog": backlog,
+        "backlog_over_sla": backlog_over_sla,
+    }
 
 
-def process_job(job_id, country):
-    # Create a new session for this job/thread
-    session = SessionLocal()
+def log_freshness_report(since, total_time):
     try:
-        url = f"https://www.linkedin.com/jobs/api/jobPosting/{job_id}"
-        logger.info(f"Procesando ID {job_id}...")
-
-        for attempt in range(MAX_RETRIES):
-            logger.info(f"Intento {attempt + 1} de {MAX_RETRIES} para el ID {job_id}.")
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-
-                soup = BeautifulSoup(response.content, 'html.parser')
-
-                # Extraer información
-                job_title = soup.find('h2', class_='top-card-layout__title')
-                job_title = job_title.text.strip() if job_title else None
-
-                company_name = soup.find('a', class_='topcard__org-name-link')
-                company_name = company_name.text.strip() if company_name else None
-
-                location_detail = soup.find('span', class_='topcard__flavor topcard__flavor--bullet')
-                location_detail = location_detail.text.strip() if location_detail else None
-
-                posted_time = soup.find('span', class_='posted-time-ago__text')
-                posted_time = posted_time.text.strip() if posted_time else None
-
-                # Calcular la fecha de publicación
-                current_time = datetime.now(timezone.utc)
-                published_date = parse_posted_time(posted_time, current_time)
-
-                applicant_count = soup.find('span', class_='num-applicants__caption')
-                applicant_count = applicant_count.text.strip() if applicant_count else None
-
-                description_div = soup.find('div',
-                                            class_="show-more-less-html__markup show-more-less-html__markup--clamp-after-5 relative overflow-hidden")
-                job_description = description_div.get_text(separator=' ', strip=True) if description_div else None
-
-                job_criteria_items = soup.find_all('li', class_='description__job-criteria-item')
-                seniority_level = job_criteria_items[0].find('span',
-                                                             class_='description__job-criteria-text').text.strip() if len(
-                    job_criteria_items) > 0 else None
-                employment_type = job_criteria_items[1].find('span',
-                                                             class_='description__job-criteria-text').text.strip() if len(
-                    job_criteria_items) > 1 else None
-                job_function = job_criteria_items[2].find('span',
-                                                          class_='description__job-criteria-text').text.strip() if len(
-                    job_criteria_items) > 2 else None
-                industries = job_criteria_items[3].find('span',
-                                                        class_='description__job-criteria-text').text.strip() if len(
-                    job_criteria_items) > 3 else None
-
-                extract_date = datetime.now(timezone.utc)
-                country_code = country
-
-                # Get country from the original job
-                original_job = session.query(ScraperLinkedinJob).filter(ScraperLinkedinJob.id == job_id).first()
-                job_country = original_job.country if original_job else country
-                
-                # Crear o actualizar detalle del trabajo
-                job_detail = ScraperLinkedinJobDetail(
-                    id=job_id,
-                    job_title=job_title,
-                    company_name=company_name,
-                    location=location_detail,
-                    country=job_country,  
-                    posted_time=posted_time,
-                    published_date=published_date,
-                    applicant_count=applicant_count,
-                    job_description=job_description,
-                    seniority_level=seniority_level,
-                    employment_type=employment_type,
-                    job_function=job_function,
-                    industries=industries,
-                    url=url,
-                    extract_date=extract_date,
-                    status='completed'
-                )
-
-                session.merge(job_detail)  # Insert or update
-                
-                # Update job status to completed
-                job = session.query(ScraperLinkedinJob).filter(ScraperLinkedinJob.id == job_id).first()
-                if job:
-                    job.status = 'completed'
-                
-                session.commit()
-                logger.info(f"Datos guardados exitosamente para el ID {job_id}.")
-                return True
-
-            except requests.exceptions.RequestException as e:
-                if hasattr(response, 'status_code') and response.status_code == 404:
-                    logger.warning(f"Recibido un 404 para el ID {job_id}.")
-                    job = session.query(ScraperLinkedinJob).filter(ScraperLinkedinJob.id == job_id).first()
-                    if job:
-                        job.status = 'failed'
-                    session.commit()
-                    return False
-                logger.error(f"Error en la solicitud para el ID {job_id}: {e}")
-                if attempt < MAX_RETRIES - 1:
-                    logger.info(f"Reintentando en {RETRY_DELAY} segundos...")
-                    time.sleep(RETRY_DELAY)
-            except Exception as e:
-                logger.error(f"Error inesperado procesando el ID {job_id}: {e}")
-                job = session.query(ScraperLinkedinJob).filter(ScraperLinkedinJob.id == job_id).first()
-                if job:
-                    job.status = 'failed'
-                session.commit()
-                return False
-
-        logger.error(f"La solicitud para el ID {job_id} falló después de varios intentos.")
-        job = session.query(ScraperLinkedinJob).filter(ScraperLinkedinJob.id == job_id).first()
-        if job:
-            job.status = 'failed'
-        session.commit()
-        return False
-    finally:
-        session.close()
+        report = freshness_report(since)
+    except Exception as e:
+        logger.error(f"No se pudo calcular la frescura de la corrida: {e}")
+        return
+    log_metric(logger, "freshness_sla", phase="extraction", **report)
+    log_db_event("freshness_sla", records_count=report["within_sla"], execution_time=total_time, details=report)
+    if report["extracted"]:
+        logger.info(f"Frescura: {report['within_sla']} de {report['extracted']} jobs extraídos dentro de "
+                    f"{report['sla_hours']:g}h ({report['within_sla_share']:.0%}); backlog {report['backlog']} "
+                    f"({report['backlog_over_sla']} ya fuera del SLA)")
 
 
-def main():
-    logger.info("Iniciando proceso de extracción de trabajos...")
-    log_db_event('scraper_start')
+def budget_deadline(time_budget, margin=TIME_BUDGET_MARGIN):
+    """Instante de time.monotonic() desde el que se deja de tomar trabajo nuevo; None sin presupuesto."""
+    if not time_budget or time_budget <= 0:
+        return None
+    # Con presupuestos cortos el margen no se come más de un cuarto del tiempo
+    return time.monotonic() + time_budget - min(margin, time_budget / 4)
 
-    pending_jobs = get_pending_jobs()
-    logger.info(f"Encontrados {len(pending_jobs)} trabajos pendientes.")
-    
+
+def run(parse_stage=None, time_budget=TIME_BUDGET, engine=EXTRACTION_ENGINE):
+    """
+    Una corrida de extracción del backlog reclamable. Sin parse_stage crea uno para la corrida
+    (si LINKEDIN_PARSE_PROCESSES > 1); el daemon pasa el suyo para no levantar los procesos cada vez.
+    Con time_budget (segundos) deja de reclamar cerca del final y lo que falte queda para la
+    próxima corrida. engine es 'threads' o 'async' (make_engine). Retorna los contadores de run_extraction.
+    """
     logger.info("Extracción iniciada")
+    log_db_event('scraper_start')
+    get_recorder().reset()
+    extraction_engine = make_engine(engine)
+    logger.info(f"Iniciando procesamiento con el motor {extraction_engine.name} (máximo {extraction_engine.max_in_flight} jobs en vuelo)")
+    start_time = time.time()
+    started_at = datetime.utcnow()
+    deadline = budget_deadline(time_budget)
+    released = {"jobs": 0}
+    if deadline is not None:
+        logger.info(f"Presupuesto de {time_budget:.0f}s: se deja de tomar trabajo a los {deadline - time.monotonic():.0f}s")
+
+    def on_released(count):
+        released["jobs"] = count
+
+    writer = JobWriter(lease_owner=WORKER_ID).start()
+    own_parse_stage = parse_stage is None
+    if own_parse_stage:
+        parse_stage = get_parse_stage()
+    # Con el motor async un lote de claims debe alcanzar para llenar sus cupos en vuelo
+    batch_size = max(CLAIM_BATCH_SIZE, extraction_engine.max_in_flight)
+    counts = run_extraction(iter_claimed_jobs(batch_size=batch_size, deadline=deadline, on_released=on_released), writer,
+                            parse_stage=parse_stage, deadline=deadline, engine=extraction_engine)
+    if parse_stage is not None:
+        if own_parse_stage:
+            parse_stage.close()
+        log_metric(logger, "parse_stage", phase="extraction", **parse_stage.stats())
+    writer.close()
+    total_time = time.time() - start_time
+    processed_count = counts["processed"]
+
+    if deadline is not None:
+        # También sin jobs procesados: es justo el caso en que el presupuesto se agotó antes de terminar alguno
+        counts["released"] = released["jobs"]
+        log_metric(logger, "time_budget", phase="extraction", budget_seconds=time_budget, used_seconds=round(total_time, 1),
+                   released=released["jobs"], deferred_retries=counts.get("deferred", 0))
 
-    if not pending_jobs:
+    if processed_count == 0:
         logger.info("No hay trabajos pendientes. Terminando.")
         log_db_event('scraper_end', status='success', records_count=0)
-        return
-
-    consecutive_404s = 0
-    
-    logger.info(f"Iniciando procesamiento con {MAX_THREADS} threads")
-    start_time = time.time()
-    
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        futures = {executor.submit(process_job, job_id, country): (job_id, country) for job_id, country in pending_jobs}
-        
-        processed_count = 0
-        saved_count = 0
-        failed_count = 0
-        
-        for future in as_completed(futures):
-            job_id, country = futures[future]
-            try:
-                result = future.result()
-                processed_count += 1
-                
-                if result:
-                    saved_count += 1
-                else:
-                    failed_count += 1
-                
-                # Log progress every 10 jobs
-                if processed_count % 10 == 0:
-                    elapsed = time.time() - start_time
-                    logger.info(f"Procesados {processed_count}/{len(pending_jobs)} jobs en {elapsed:.1f}s")
-                
-            except Exception as e:
-                logger.error(f"Error en thread para ID {job_id}: {e}")
-                consecutive_404s += 1
+        return counts
 
-    total_time = time.time() - start_time
-    
-    logger.info("Extracción completada")
-    logger.info(f"Procesamiento completado en {total_time:.1f}s. Jobs procesados: {processed_count}")
+    log_extraction_summary(counts, writer, total_time)
+    log_freshness_report(started_at, total_time)
     log_db_event('scraper_end', status='success', records_count=processed_count, execution_time=total_time)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extrae el detalle de los jobs pendientes")
+    parser.add_argument('--time-budget', type=float, default=TIME_BUDGET,
+                        help="Segundos de la corrida; cerca del final deja de tomar trabajo y el resto queda para la próxima (0 = sin límite)")
+    parser.add_argument('--engine', choices=['threads', 'async'], default=EXTRACTION_ENGINE,
+                        help="threads (un thread por descarga) o async (asyncio + httpx, cientos de solicitudes en vuelo)")
+    args = parser.parse_args(argv)
+
+    setup_loki_logging()
+    logger.info("Iniciando proceso de extracción de trabajos...")
+    start_metrics_server()
+    profiler.install()
+    run(time_budget=args.time_budget, engine=args.engine)
+    log_metric(logger, "telemetry", phase="extraction", **telemetry.telemetry_stats())
+    telemetry.shutdown_telemetry()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,335 @@
+import hashlib
+import html
+import os
+import re
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from metrics import PARSE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# auto: lxml si está instalado, luego selectolax, y BeautifulSoup como respaldo
+PARSER_BACKEND = os.getenv('LINKEDIN_PARSER_BACKEND', 'auto').lower()
+
+JOB_FIELDS = (
+    'job_title', 'company_name', 'location', 'posted_time', 'applicant_count',
+    'job_description', 'seniority_level', 'employment_type', 'job_function', 'industries',
+)
+CRITERIA_FIELDS = ('seniority_level', 'employment_type', 'job_function', 'industries')
+# Campos de la tarjeta de un resultado de búsqueda que se guardan con el ID en scraper_linkedin_jobs
+CARD_FIELDS = ('job_title', 'company_name', 'location', 'posted_time', 'listed_at')
+# Permite apuntar ambas fases a un servidor local (benchmarks/fake_linkedin.py)
+LINKEDIN_BASE_URL = os.getenv('LINKEDIN_BASE_URL', 'https://www.linkedin.com').rstrip('/')
+
+
+def parse_posted_time(posted_time_text, current_time=None):
+    if not posted_time_text:
+        return None
+
+    if current_time is None:
+        current_time = datetime.now(timezone.utc)
+
+    # Patron para extraer número y unidad (minutes, hours, days)
+    pattern = r"(\d+)\s+(minute|minutes|hour|hours|day|days|week|weeks|month|months)\s+ago"
+    match = re.search(pattern, posted_time_text)
+
+    if not match:
+        return None
+
+    quantity = int(match.group(1))
+    unit = match.group(2)
+
+    if unit == "minute" or unit == "minutes":
+        delta = timedelta(minutes=quantity)
+    elif unit == "hour" or unit == "hours":
+        delta = timedelta(hours=quantity)
+    elif unit == "day" or unit == "days":
+        delta = timedelta(days=quantity)
+    elif unit == "week" or unit == "weeks":
+        delta = timedelta(weeks=quantity)
+    elif unit == "month" or unit == "months":
+        # Aproximadamente 30 días por mes
+        delta = timedelta(days=quantity * 30)
+    else:
+        return None
+
+    published_date = current_time - delta
+    return published_date
+
+
+JOB_ID_RE = re.compile(r'data-entity-urn="urn:li:jobPosting:(\d+)"')
+_CARD_TEXT_RES = {
+    'job_title': re.compile(r'<h3[^>]*base-search-card__title[^>]*>(.*?)</h3>', re.S),
+    'company_name': re.compile(r'<h4[^>]*base-search-card__subtitle[^>]*>(.*?)</h4>', re.S),
+    'location': re.compile(r'<span[^>]*job-search-card__location[^>]*>(.*?)</span>', re.S),
+}
+_CARD_TIME_RE = re.compile(r'<time[^>]*datetime="([^"]*)"[^>]*>(.*?)</time>', re.S)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _card_text(raw: str) -> Optional[str]:
+    text = html.unescape(' '.join(_TAG_RE.sub(' ', raw).split()))
+    return text or None
+
+
+def parse_search_cards(page: str, fetched_at: Optional[datetime] = None) -> Tuple[List[str], Dict[str, dict]]:
+    """
+    Recorre una vez una página de resultados de búsqueda. Retorna los IDs en orden (con repetidos,
+    como re.findall) y, por ID, los campos de CARD_FIELDS de su tarjeta (None si la tarjeta no trae
+    el campo). listed_at sale del texto relativo ("3 hours ago") respecto de fetched_at y, si no se
+    entiende, de la fecha del atributo datetime.
+    """
+    fetched_at = fetched_at or datetime.utcnow()
+    matches = list(JOB_ID_RE.finditer(page))
+    ids = [match.group(1) for match in matches]
+    cards: Dict[str, dict] = {}
+    for i, match in enumerate(matches):
+        job_id = match.group(1)
+        if job_id in cards:
+            continue
+        # La tarjeta va desde su data-entity-urn hasta el de la siguiente
+        card = page[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(page)]
+        fields = {}
+        for name, regex in _CARD_TEXT_RES.items():
+            found = regex.search(card)
+            fields[name] = _card_text(found.group(1)) if found else None
+        found = _CARD_TIME_RE.search(card)
+        fields['posted_time'] = _card_text(found.group(2)) if found else None
+        listed_at = parse_posted_time(fields['posted_time'], fetched_at)
+        if listed_at is None and found:
+            try:
+                listed_at = datetime.strptime(found.group(1)[:10], '%Y-%m-%d')
+            except ValueError:
+                pass
+        fields['listed_at'] = listed_at
+        cards[job_id] = fields
+    return ids, cards
+
+
+def card_is_complete(card: Optional[dict]) -> bool:
+    return bool(card) and all(card.get(name) for name in CARD_FIELDS)
+
+
+def build_card_detail_row(job_id: str, country: str, card: dict, fetched_at: datetime) -> dict:
+    """Fila de scraper_linkedin_job_details_hot solo con los datos de la tarjeta (status 'card', sin descripción)."""
+    return {
+        'id': job_id,
+        'country': country,
+        'job_title': card['job_title'],
+        'company_name': card['company_name'],
+        'location': card['location'],
+        'posted_time': card['posted_time'],
+        'published_date': card['listed_at'],
+        'url': job_url(job_id),
+        'extract_date': fetched_at,
+        'status': 'card',
+    }
+
+
+def _join_text(parts) -> str:
+    # Equivalente a BeautifulSoup get_text(separator=' ', strip=True)
+    text = ' '.join(part.strip() for part in parts if part and part.strip())
+    return text
+
+
+def _criteria(fields: dict, values):
+    for name, value in zip(CRITERIA_FIELDS, values):
+        fields[name] = value
+    return fields
+
+
+def parse_with_bs4(content: bytes) -> Dict[str, Optional[str]]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Selectores CSS: matchean por token de clase, como los backends lxml y selectolax
+    def text_of(selector):
+        node = soup.select_one(selector)
+        return node.text.strip() if node else None
+
+    fields = {
+        'job_title': text_of('h2.top-card-layout__title'),
+        'company_name': text_of('a.topcard__org-name-link'),
+        'location': text_of('span.topcard__flavor.topcard__flavor--bullet'),
+        'posted_time': text_of('span.posted-time-ago__text'),
+        'applicant_count': text_of('span.num-applicants__caption'),
+    }
+
+    description_div = soup.select_one('div.show-more-less-html__markup')
+    fields['job_description'] = description_div.get_text(separator=' ', strip=True) if description_div else None
+
+    values = []
+    for item in soup.select('li.description__job-criteria-item')[:len(CRITERIA_FIELDS)]:
+        span = item.select_one('span.description__job-criteria-text')
+        values.append(span.text.strip() if span else None)
+    values += [None] * (len(CRITERIA_FIELDS) - len(values))
+    return _criteria(fields, values)
+
+
+def _xpath_class(tag: str, *classes: str) -> str:
+    conditions = " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')" for cls in classes
+    )
+    return f"descendant-or-self::{tag}[{conditions}]"
+
+
+_lxml_state = threading.local()
+
+
+def _lxml_xpaths():
+    from lxml import etree
+
+    return {
+        'job_title': etree.XPath(_xpath_class('h2', 'top-card-layout__title')),
+        'company_name': etree.XPath(_xpath_class('a', 'topcard__org-name-link')),
+        'location': etree.XPath(_xpath_class('span', 'topcard__flavor', 'topcard__flavor--bullet')),
+        'posted_time': etree.XPath(_xpath_class('span', 'posted-time-ago__text')),
+        'applicant_count': etree.XPath(_xpath_class('span', 'num-applicants__caption')),
+        'job_description': etree.XPath(_xpath_class('div', 'show-more-less-html__markup')),
+        'criteria_items': etree.XPath(_xpath_class('li', 'description__job-criteria-item')),
+        'criteria_text': etree.XPath(_xpath_class('span', 'description__job-criteria-text')),
+    }
+
+
+def parse_with_lxml(content: bytes) -> Dict[str, Optional[str]]:
+    from lxml import etree, html
+
+    # Los parsers de lxml no son thread-safe: uno por thread, junto con sus XPath compilados
+    state = getattr(_lxml_state, 'state', None)
+    if state is None:
+        state = (html.HTMLParser(encoding='utf-8'), _lxml_xpaths())
+        _lxml_state.state = state
+    parser, xpaths = state
+
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    try:
+        root = html.document_fromstring(content, parser=parser)
+    except etree.ParserError:
+        # Documento sin elementos (vacío o solo comentarios): los otros backends retornan todo en None
+        return {name: None for name in JOB_FIELDS}
+
+    def first(name):
+        nodes = xpaths[name](root)
+        return nodes[0] if nodes else None
+
+    fields = {}
+    for name in ('job_title', 'company_name', 'location', 'posted_time', 'applicant_count'):
+        node = first(name)
+        fields[name] = node.text_content().strip() if node is not None else None
+
+    description_div = first('job_description')
+    fields['job_description'] = _join_text(description_div.itertext()) if description_div is not None else None
+
+    values = []
+    for item in xpaths['criteria_items'](root)[:len(CRITERIA_FIELDS)]:
+        spans = xpaths['criteria_text'](item)
+        values.append(spans[0].text_content().strip() if spans else None)
+    values += [None] * (len(CRITERIA_FIELDS) - len(values))
+    return _criteria(fields, values)
+
+
+def parse_with_selectolax(content: bytes) -> Dict[str, Optional[str]]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(content)
+
+    def text_of(selector):
+        node = tree.css_first(selector)
+        return node.text(deep=True).strip() if node is not None else None
+
+    fields = {
+        'job_title': text_of('h2.top-card-layout__title'),
+        'company_name': text_of('a.topcard__org-name-link'),
+        'location': text_of('span.topcard__flavor.topcard__flavor--bullet'),
+        'posted_time': text_of('span.posted-time-ago__text'),
+        'applicant_count': text_of('span.num-applicants__caption'),
+    }
+
+    description_div = tree.css_first('div.show-more-less-html__markup')
+    fields['job_description'] = (
+        _join_text(description_div.text(deep=True, separator='\x00').split('\x00'))
+        if description_div is not None else None
+    )
+
+    values = []
+    for item in tree.css('li.description__job-criteria-item')[:len(CRITERIA_FIELDS)]:
+        span = item.css_first('span.description__job-criteria-text')
+        values.append(span.text(deep=True).strip() if span is not None else None)
+    values += [None] * (len(CRITERIA_FIELDS) - len(values))
+    return _criteria(fields, values)
+
+
+BACKENDS: Dict[str, Callable[[bytes], Dict[str, Optional[str]]]] = {
+    'lxml': parse_with_lxml,
+    'selectolax': parse_with_selectolax,
+    'bs4': parse_with_bs4,
+}
+_BACKEND_MODULES = {'lxml': 'lxml', 'selectolax': 'selectolax', 'bs4': 'bs4'}
+
+
+def available_backends():
+    import importlib.util
+    return [name for name, module in _BACKEND_MODULES.items() if importlib.util.find_spec(module) is not None]
+
+
+def resolve_backend(name: str = PARSER_BACKEND) -> str:
+    available = available_backends()
+    if name != 'auto':
+        if name in available:
+            return name
+        logger.warning(f"Parser '{name}' no disponible, usando selección automática")
+    for candidate in ('lxml', 'selectolax', 'bs4'):
+        if candidate in available:
+            return candidate
+    raise RuntimeError("No hay ningún parser HTML instalado (lxml, selectolax o beautifulsoup4)")
+
+
+_resolved_backend: Optional[str] = None
+
+
+def job_url(job_id: str) -> str:
+    return f"{LINKEDIN_BASE_URL}/jobs/api/jobPosting/{job_id}"
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def build_detail_row(job_id: str, country: str, url: str, fields: dict, fetched_at: datetime,
+                     content: Optional[bytes] = None, headers: Optional[Mapping[str, str]] = None) -> dict:
+    """
+    Fila de scraper_linkedin_job_details_hot; la fecha de publicación es relativa al momento de la descarga.
+    Con content y headers guarda el hash de la página y su ETag/Last-Modified para refrescar con GET condicional.
+    """
+    headers = headers or {}
+    return {
+        'id': job_id,
+        'country': country,
+        'published_date': parse_posted_time(fields['posted_time'], fetched_at),
+        'url': url,
+        'extract_date': fetched_at,
+        'status': 'completed',
+        'content_hash': content_hash(content) if content is not None else None,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        **fields
+    }
+
+
+def parse_job_html(content: bytes, backend: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    Extrae los campos de una página de jobPosting.
+    Retorna un dict con las claves de JOB_FIELDS (None si el campo no está en la página).
+    """
+    global _resolved_backend
+    if backend is None:
+        if _resolved_backend is None:
+            _resolved_backend = resolve_backend()
+        backend = _resolved_backend
+    with PARSE_SECONDS.time(backend=backend):
+        return BACKENDS[backend](content)
@@ -0,0 +1,116 @@
+import heapq
+import os
+import threading
+import logging
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from models import ScraperLinkedinJob, SessionLocal
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Daemon: cada cuántas horas se recarga completo el índice (suelta los IDs que salieron de la ventana de días)
+KNOWN_IDS_RELOAD_HOURS = float(os.getenv('LINKEDIN_KNOWN_IDS_RELOAD_HOURS', 24))
+# Margen al pedir los IDs nuevos: created_at lo pone el reloj de cada réplica que los insertó
+KNOWN_IDS_CLOCK_SLACK = timedelta(minutes=5)
+
+
+class KnownIdIndex:
+    """
+    Índice compacto de IDs ya conocidos: un array ordenado de enteros de 64 bits (8 bytes por ID)
+    cargado al inicio, más un set con los IDs agregados durante la corrida.
+    """
+    def __init__(self, ids: Iterable[int] = ()):
+        self._sorted = array('q', sorted(ids))
+        self._added = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sorted) + len(self._added)
+
+    def __contains__(self, job_id) -> bool:
+        value = int(job_id)
+        position = bisect_left(self._sorted, value)
+        if position < len(self._sorted) and self._sorted[position] == value:
+            return True
+        with self._lock:
+            return value in self._added
+
+    def filter_new(self, job_ids: Iterable[str]) -> List[str]:
+        return [job_id for job_id in job_ids if job_id not in self]
+
+    def count_added(self, job_ids: Iterable[str]) -> int:
+        """Cuántos de los IDs fueron agregados durante esta corrida (p. ej. por otra partición)."""
+        with self._lock:
+            return sum(1 for job_id in job_ids if int(job_id) in self._added)
+
+    def add_many(self, job_ids: Iterable[str]):
+        with self._lock:
+            self._added.update(int(job_id) for job_id in job_ids)
+
+    def merge(self, job_ids: Iterable[int]) -> int:
+        """
+        Pasa al array ordenado los IDs dados y los agregados durante la corrida, y deja el set vacío
+        para la siguiente. Retorna cuántos IDs se incorporaron.
+        """
+        with self._lock:
+            candidates = set(self._added)
+            candidates.update(job_ids)
+            self._added = set()
+        new = sorted(value for value in candidates if not self._in_sorted(value))
+        if new:
+            self._sorted = array('q', heapq.merge(self._sorted, new))
+        return len(new)
+
+    def _in_sorted(self, value: int) -> bool:
+        position = bisect_left(self._sorted, value)
+        return position < len(self._sorted) and self._sorted[position] == value
+
+
+def _select_ids(location: str, since: datetime) -> Iterator[int]:
+    with SessionLocal() as session:
+        rows = session.execute(
+            select(ScraperLinkedinJob.id)
+            .where(ScraperLinkedinJob.country == location, ScraperLinkedinJob.created_at >= since)
+            .execution_options(yield_per=10000)
+        ).scalars()
+        yield from (int(job_id) for job_id in rows if job_id.isdigit())
+
+
+def load_known_ids(location: str, days: int) -> KnownIdIndex:
+    """Carga los IDs de la ubicación creados en los últimos `days` días."""
+    index = KnownIdIndex(_select_ids(location, datetime.utcnow() - timedelta(days=days)))
+    logger.info(f"Índice de IDs conocidos para {location}: {len(index)} IDs de los últimos {days} días")
+    return index
+
+
+class KnownIdCache:
+    """
+    Índices de IDs conocidos que el daemon conserva entre corridas. Después de la primera carga,
+    cada corrida solo trae de la base los IDs creados desde la carga anterior (por otras réplicas)
+    y suma los que agregó la corrida anterior; cada reload_hours se recarga completo.
+    """
+    def __init__(self, reload_hours: float = KNOWN_IDS_RELOAD_HOURS):
+        self.reload_after = timedelta(hours=reload_hours)
+        # (location, days) -> [índice, última carga, última carga completa]
+        self._entries: Dict[Tuple[str, int], list] = {}
+
+    def get(self, location: str, days: int) -> KnownIdIndex:
+        now = datetime.utcnow()
+        entry = self._entries.get((location, days))
+        if entry is None or now - entry[2] >= self.reload_after:
+            index = load_known_ids(location, days)
+            self._entries[(location, days)] = [index, now, now]
+            return index
+        index, loaded_at, _ = entry
+        merged = index.merge(_select_ids(location, loaded_at - KNOWN_IDS_CLOCK_SLACK))
+        entry[1] = now
+        logger.info(f"Índice de IDs conocidos para {location}: {merged} IDs nuevos desde la última corrida, {len(index)} en total")
+        return index
@@ -1,16 +1,24 @@
 import requests
 from dotenv import load_dotenv
 import os
-import re
-from typing import List, Tuple, Any
+from typing import Dict, Iterator, List, Tuple, Any, Optional, Callable, Set
 import time
 import threading
 import logging
-from models import ScraperLinkedinJob, SessionLocal, ScraperEvent
-from datetime import datetime, timezone
+from models import ScraperLinkedinJob, ScraperLinkedinJobDetail, SessionLocal, ScraperEvent
+from http_client import get_client
+from archive import get_archive
+from known_ids import KnownIdCache, KnownIdIndex, load_known_ids
+import profiler
+import telemetry
+from job_parser import LINKEDIN_BASE_URL, build_card_detail_row, card_is_complete, parse_search_cards
+from metrics import RESPONSES, IDS_DISCOVERED, LIGHT_JOBS, start_metrics_server
+from tracing import get_recorder, span, span_summary
+from telemetry import setup_loki_logging
+from datetime import datetime, timedelta, timezone
 import json
-import logging
-from logging_loki import LokiHandler
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlencode
 from sqlalchemy.dialects.postgresql import insert
 
 load_dotenv()
@@ -37,73 +45,37 @@ DEFAULT_RETRY_DELAY = int(os.getenv('LINKEDIN_RETRY_DELAY', 5))
 DEFAULT_MAX_RETRIES = int(os.getenv('LINKEDIN_MAX_RETRIES', 3))
 DEFAULT_F_TPR_VALUE = os.getenv('LINKEDIN_F_TPR_VALUE', 'r86400')
 DEFAULT_DB_BATCH_SIZE = int(os.getenv('LINKEDIN_DB_BATCH_SIZE', 100))
+DEFAULT_LEASE_SECONDS = int(os.getenv('LINKEDIN_LEASE_SECONDS', 900))
+# Descubrimiento incremental: ventana del índice de IDs conocidos y páginas sin novedades antes de cortar (0 = desactivado)
+DEFAULT_KNOWN_IDS_DAYS = int(os.getenv('LINKEDIN_KNOWN_IDS_DAYS', 30))
+DEFAULT_MAX_STALE_PAGES = int(os.getenv('LINKEDIN_MAX_STALE_PAGES', 3))
+# Filtros con los que se parte una búsqueda que llega al tope de offsets, en orden (vacío = no partir)
+# Tope de resultados por búsqueda de la API guest: pasado este offset ya no entrega IDs
+SEARCH_RESULT_CAP = int(os.getenv('LINKEDIN_SEARCH_RESULT_CAP', 1000))
+SPLIT_FILTERS = [name.strip() for name in os.getenv('LINKEDIN_SPLIT_FILTERS', 'f_JT,f_E,f_WT').split(',') if name.strip()]
+# Modo liviano para los jobs nuevos cuya tarjeta trae título, empresa, ubicación y fecha: off (se
+# extraen como siempre), defer (se extraen después del resto del backlog) o skip (no se descarga el
+# detalle; quedan card_only con una fila de detalle armada con la tarjeta)
+LIGHT_MODE = os.getenv('LINKEDIN_LIGHT_MODE', 'off').lower()
+DEFERRED_PRIORITY = 10
 
 LOCATION = os.getenv('LINKEDIN_LOCATION', 'Chile')
+# Lista separada por comas; por defecto solo LINKEDIN_LOCATION
+LOCATIONS = [loc.strip() for loc in os.getenv('LINKEDIN_LOCATIONS', LOCATION).split(',') if loc.strip()]
+F_TPR_VALUES = [value.strip() for value in DEFAULT_F_TPR_VALUE.split(',') if value.strip()]
 
 # Logging configuration
 LOG_EVENTS_ENABLED = os.getenv('LOG_EVENTS_ENABLED', 'true').lower() == 'true'
-LOKI_ENABLED = os.getenv('LOKI_ENABLED', 'true').lower() == 'true'
 LOG_DISCOVERY_DETAILS = os.getenv('LOG_DISCOVERY_DETAILS', 'false').lower() == 'true'
 
-shared_lock = threading.Lock()
-no_id_counter = Counter(0)
-
-total_workers = 0
+NewJobsCallback = Callable[[List[Tuple[str, str]]], None]
 
-class LokiJsonFormatter(logging.Formatter):
-    def format(self, record):
-        # Create structured log entry for Loki
-        log_entry = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-            "service": "linkedin-scraper"
-        }
-        
-        # Add extra fields if present
-        if hasattr(record, 'extra_fields'):
-            log_entry.update(record.extra_fields)
-            
-        return json.dumps(log_entry)
-
-# Configure logging for Loki
-def setup_loki_logging():
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Remove existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-    
-    # Get Loki configuration from environment
-    loki_url = os.getenv('GRAFANA_LOKI_URL')
-    loki_username = os.getenv('GRAFANA_USER_ID')
-    loki_password = os.getenv('GRAFANA_API_KEY')
-    
-    if loki_url:
-        # Configure Loki handler for Grafana Cloud
-        # Grafana Cloud uses API key authentication
-        loki_handler = LokiHandler(
-            url=loki_url,
-            tags={"service": "linkedin-scraper"},
-            auth=(loki_username or "user", loki_password),  # API key as password
-            version="1",
-        )
-        logger.addHandler(loki_handler)
-        
-        # Also keep console output for local debugging
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(LokiJsonFormatter())
-        logger.addHandler(console_handler)
-    else:
-        # Fallback to console-only logging
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(LokiJsonFormatter())
-        logger.addHandler(console_handler)
-        logger.warning("LOKI_URL not configured, using console logging only")
-    
-    return logger
+# Valores de cada filtro de la búsqueda guest; cada filtro reparte los resultados en grupos disjuntos
+PARTITION_FILTERS = {
+    'f_JT': ['F', 'P', 'C', 'T', 'I', 'V', 'O'],  # tipo de jornada: completa, parcial, contrato, temporal, práctica, voluntariado, otro
+    'f_E': ['1', '2', '3', '4', '5', '6'],         # experiencia: práctica, inicial, asociado, senior, director, ejecutivo
+    'f_WT': ['1', '2', '3'],                       # modalidad: presencial, remoto, híbrido
+}
 
 # Custom logging functions for metrics
 def log_metric(logger, event_type, **kwargs):
@@ -125,31 +97,11 @@ def log_event(event_type, **kwargs):
     
     logger.info(f"Event: {event_type}", extra={"extra_fields": extra_fields})
 
-def log_db_event(event_type, records_count=0, execution_time=0.0, status="success", error_message=None):
-    """Log a simple scraper event to the database"""
+def log_db_event(event_type, records_count=0, execution_time=0.0, status="success", error_message=None, details=None):
+    """Log a simple scraper event to the database (buffered, inserted in batches)"""
     if not LOG_EVENTS_ENABLED:
         return
-        
-    try:
-        session = SessionLocal()
-        # Create event object and set attributes
-        event = ScraperEvent()
-        event.process_name = f"linkedin-scraper-{LOCATION.lower()}"
-        event.event_type = event_type
-        event.records_count = records_count
-        event.status = status
-        event.execution_time_seconds = execution_time
-        event.error_message = error_message
-        
-        session.add(event)
-        session.commit()
-        print(f"📝 DB Event logged: {event_type} ({records_count} records)")
-    except Exception as e:
-        print(f"❌ Failed to log DB event {event_type}: {e}")
-    finally:
-        session.close()
-
-setup_loki_logging()
+    telemetry.log_db_event(telemetry.process_name(LOCATIONS), event_type, records_count, execution_time, status, error_message, details)
 
 def handle_request_with_retry(
     url: str,
@@ -179,25 +131,29 @@ def handle_request_with_retry(
 
         try:
             worker_logger.debug(f"Intento {attempt + 1}/{max_retries} para URL: {url}")
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}, timeout=20)
+            response = get_client().get(url, timeout=20, phase='discovery')
 
             # Manejo de 429 (Too Many Requests)
             if response.status_code == 429:
+                RESPONSES.inc(phase='discovery', outcome='429')
                 with shared_lock:
                     consecutive_429_counter.value += 1
                     current_429 = consecutive_429_counter.value
                 worker_logger.warning(f"Error 429. Contador: {current_429}/{max_consecutive_429}")
-                if current_429 >= max_consecutive_429:
+                # Con el limitador adaptativo (o el pool de salidas) solo se detiene si ya no hay margen para bajar la tasa
+                if current_429 >= max_consecutive_429 and get_client().at_min_rate():
                     worker_logger.error("Límite de errores 429 alcanzado. Señalando parada.")
                     stop_event.set()
                     return False, ""
-                sleep_time = retry_delay * (2 ** attempt)
-                worker_logger.info(f"Esperando {sleep_time}s debido a 429...")
-                time.sleep(sleep_time)
+                if not get_client().paced:
+                    sleep_time = retry_delay * (2 ** attempt)
+                    worker_logger.info(f"Esperando {sleep_time}s debido a 429...")
+                    time.sleep(sleep_time)
                 continue
 
             # Manejo de 404 (Not Found)
             elif response.status_code == 404:
+                RESPONSES.inc(phase='discovery', outcome='404')
                 with shared_lock:
                     consecutive_404_counter.value += 1
                     current_404 = consecutive_404_counter.value
@@ -217,10 +173,12 @@ def handle_request_with_retry(
             # Manejo de contenido vacío
             html_content = response.text.strip()
             if not html_content or html_content == "<!DOCTYPE html><!---->":
+                RESPONSES.inc(phase='discovery', outcome='empty')
                 with shared_lock:
                     consecutive_empty_counter.value += 1
                     current_empty = consecutive_empty_counter.value
                 worker_logger.warning(f"HTML vacío. Contador: {current_empty}/{max_consecutive_empty}. HTML: {html_content[:200]}...")
+                get_client().on_empty(response)
                 if current_empty >= max_consecutive_empty:
                     worker_logger.error("Límite de HTMLs vacíos alcanzado. Señalando parada.")
                     stop_event.set()
@@ -233,6 +191,7 @@ def handle_request_with_retry(
 
         except requests.exceptions.RequestException as e:
             worker_logger.warning(f"Error de red/HTTP en intento {attempt + 1}: {e}")
+            RESPONSES.inc(phase='discovery', outcome='error')
             if attempt >= max_retries - 1:
                 worker_logger.error(f"Máximos reintentos alcanzados para {url}. Fallando.")
                 return False, ""
@@ -247,60 +206,404 @@ def handle_request_with_retry(
 
 
 
+def build_search_url(location: str, f_tpr: str, start: int, filters: Optional[Dict[str, str]] = None) -> str:
+    extra = f"&{urlencode(filters)}" if filters else ""
+    return f"{LINKEDIN_BASE_URL}/jobs-guest/jobs/api/seeMoreJobPostings/search?location={location}&f_TPR={f_tpr}{extra}&pageNum=0&start={start}"
 
-start = 0
 
-while True:
-    url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?location={LOCATION}&f_TPR=r86400&pageNum=0&start={start}"
+class SearchState:
+    """
+    Estado compartido por todos los shards de una búsqueda (location, f_TPR y filtros de partición).
+    Cada búsqueda tiene sus propios contadores 404/429/vacíos y su propio evento
+    de parada, así un país que alcanza su límite no detiene a los demás.
+    """
+    def __init__(self, location: str, f_tpr: str, known_ids: Optional[KnownIdIndex] = None,
+                 filters: Optional[Dict[str, str]] = None):
+        self.location = location
+        self.f_tpr = f_tpr
+        self.known_ids = known_ids
+        self.filters = dict(filters or {})
+        self.status = 'running'  # al terminar: complete, stale, stopped, split o capped
+        self.children: List['SearchState'] = []
+        self.consecutive_404_counter = Counter(0)
+        self.consecutive_429_counter = Counter(0)
+        self.consecutive_empty_counter = Counter(0)
+        self.no_id_counter = Counter(0)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.end_offset = None  # primer offset que no devolvió IDs
+        self.ids_found = 0
+        self.new_ids = 0
+        self.pages = 0
+        self.stale_pages = 0  # páginas seguidas sin IDs nuevos
+        self.last_start_with_ids = -1
+        self.seen_ids: Set[str] = set()  # IDs que ya devolvieron las páginas de esta partición
+        self.repeated_ids = 0  # IDs que esta partición ya había devuelto en otra página
+        self.overlap_ids = 0  # IDs que otra partición trajo antes en esta corrida
+
+    @property
+    def key(self) -> str:
+        """Identificador de la partición: location|f_TPR[|filtros]."""
+        key = f"{self.location}|{self.f_tpr}"
+        return f"{key}|{urlencode(sorted(self.filters.items()))}" if self.filters else key
+
+    def is_done(self, start: int) -> bool:
+        if self.stop_event.is_set():
+            return True
+        with self.lock:
+            return self.end_offset is not None and start >= self.end_offset
+
+    def mark_end(self, start: int):
+        with self.lock:
+            if self.end_offset is None or start < self.end_offset:
+                self.end_offset = start
+
+    def record_ids(self, job_ids: List[str]) -> List[str]:
+        """Registra los IDs de una página y retorna los que esta partición no había devuelto antes."""
+        with self.lock:
+            fresh = [job_id for job_id in job_ids if job_id not in self.seen_ids]
+            self.seen_ids.update(fresh)
+            return fresh
+
+    def add_page(self, ids_count: int, new_count: int, start: int = -1, seen_this_run: int = 0,
+                 fresh_count: Optional[int] = None) -> int:
+        """
+        Registra una página y retorna cuántas páginas seguidas van sin IDs nuevos. Los IDs que otra
+        partición ya trajo en esta corrida (seen_this_run) no hacen que la página cuente como vacía;
+        los que repite esta misma partición sí. Una página que solo repite IDs de la partición
+        (fresh_count 0) tampoco cuenta para decidir si la búsqueda llegó al tope.
+        """
+        fresh_count = ids_count if fresh_count is None else fresh_count
+        with self.lock:
+            self.pages += 1
+            if fresh_count:
+                self.last_start_with_ids = max(self.last_start_with_ids, start)
+            self.ids_found += ids_count
+            self.new_ids += new_count
+            self.repeated_ids += ids_count - fresh_count
+            self.overlap_ids += seen_this_run
+            self.stale_pages = 0 if new_count or seen_this_run else self.stale_pages + 1
+            return self.stale_pages
+
+    def is_saturated(self, limit: int, steps: int) -> bool:
+        """True si la búsqueda seguía devolviendo IDs en la última página bajo el tope: hay más resultados que el tope."""
+        with self.lock:
+            return self.last_start_with_ids >= 0 and self.last_start_with_ids + steps >= limit
+
+    def split(self) -> List['SearchState']:
+        """Particiones hijas por el siguiente filtro de SPLIT_FILTERS; vacío si ya no quedan filtros."""
+        for name in SPLIT_FILTERS:
+            if name in PARTITION_FILTERS and name not in self.filters:
+                return [
+                    SearchState(self.location, self.f_tpr, self.known_ids, {**self.filters, name: value})
+                    for value in PARTITION_FILTERS[name]
+                ]
+        return []
+
+    def finish(self, limit: int, steps: int) -> List['SearchState']:
+        """Cierra la búsqueda con su estado de cobertura y retorna las particiones a recorrer si llegó al tope."""
+        if self.stop_event.is_set():
+            self.status = 'stopped'
+        elif DEFAULT_MAX_STALE_PAGES and self.stale_pages >= DEFAULT_MAX_STALE_PAGES:
+            self.status = 'stale'
+        elif not self.is_saturated(limit, steps):
+            self.status = 'complete'
+        else:
+            self.children = self.split()
+            self.status = 'split' if self.children else 'capped'
+        return self.children
+
+    def partitions(self) -> Iterator['SearchState']:
+        """Esta búsqueda y todas las particiones que salieron de ella."""
+        yield self
+        for child in self.children:
+            yield from child.partitions()
+
+
+def is_light(card: Optional[dict], light_mode: str = LIGHT_MODE) -> bool:
+    """True si el modo liviano se encarga del job: su tarjeta alcanza para no extraerlo ahora."""
+    return light_mode in ('defer', 'skip') and card_is_complete(card)
+
+
+def insert_job_ids(ids_str_list: List[str], location: str, claim_owner: Optional[str] = None,
+                   lease_seconds: int = DEFAULT_LEASE_SECONDS, cards: Optional[Dict[str, dict]] = None,
+                   light_mode: str = LIGHT_MODE) -> List[str]:
+    """
+    Bulk insert de los IDs encontrados, con los datos de su tarjeta. Retorna solo los IDs nuevos.
+    Con claim_owner los IDs nuevos se insertan ya reclamados (in_progress) por ese extractor,
+    salvo los que toma el modo liviano (ver is_light): con defer quedan pendientes al final de la
+    cola y con skip quedan card_only, con su fila de detalle armada con la tarjeta.
+    """
+    if claim_owner:
+        job_status = {
+            "status": "in_progress",
+            "lease_owner": claim_owner,
+            "lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds),
+        }
+    else:
+        job_status = {"status": "pending", "lease_owner": None, "lease_expires_at": None}
+    cards = cards or {}
+    now = datetime.utcnow()
+
+    jobs_to_insert = []
+    for id_str in dict.fromkeys(ids_str_list):
+        card = cards.get(id_str) or {}
+        row = {
+            "id": id_str, "country": location, **job_status, "priority": 0,
+            "job_title": card.get('job_title'), "company_name": card.get('company_name'),
+            "location": card.get('location'), "listed_at": card.get('listed_at'),
+        }
+        if is_light(card, light_mode):
+            row.update(status='card_only' if light_mode == 'skip' else 'pending', lease_owner=None, lease_expires_at=None,
+                       priority=DEFERRED_PRIORITY if light_mode == 'defer' else 0)
+        jobs_to_insert.append(row)
+
+    with SessionLocal() as session:
+        stmt = (
+            insert(ScraperLinkedinJob).values(jobs_to_insert)
+            .on_conflict_do_nothing(index_elements=['id'])
+            .returning(ScraperLinkedinJob.id)
+        )
+        new_ids = list(session.execute(stmt).scalars())
+        light_ids = [job_id for job_id in new_ids if is_light(cards.get(job_id), light_mode)]
+        if light_ids and light_mode == 'skip':
+            session.execute(
+                insert(ScraperLinkedinJobDetail)
+                .values([build_card_detail_row(job_id, location, cards[job_id], now) for job_id in light_ids])
+                .on_conflict_do_nothing(index_elements=['id'])
+            )
+        session.commit()
+    if light_ids:
+        LIGHT_JOBS.inc(len(light_ids), mode=light_mode)
+    return new_ids
+
+
+def discover_shard(search: SearchState, start: int, on_new_jobs: Optional[NewJobsCallback] = None,
+                   claim_owner: Optional[str] = None) -> int:
+    """
+    Procesa un shard (location, f_TPR, start): descarga la página, extrae los IDs y los inserta.
+    Si se pasa on_new_jobs (modo pipeline), los IDs nuevos se insertan reclamados por claim_owner
+    y se le entregan como (id, country).
+    Retorna la cantidad de IDs encontrados.
+    """
+    if stop_event.is_set() or search.is_done(start):
+        return 0
+
+    url = build_search_url(search.location, search.f_tpr, start, search.filters)
 
     # Usar la función auxiliar para la solicitud
-    success, html_content = handle_request_with_retry(
-        url=url,
-        consecutive_404_counter=Counter(0),
-        consecutive_429_counter=Counter(0),
-        consecutive_empty_counter=Counter(0),
-        no_id_counter=no_id_counter,
-        stop_event=stop_event,
-        shared_lock=shared_lock,
-        max_consecutive_404=DEFAULT_MAX_CONSECUTIVE_404,
-        max_consecutive_429=DEFAULT_MAX_CONSECUTIVE_429,
-        max_consecutive_empty=DEFAULT_MAX_CONSECUTIVE_EMPTY,
-        total_workers=total_workers,
-        retry_delay=6,
-        max_retries=5,
-        worker_logger=logger
-    )
+    with span('search_fetch'):
+        success, html_content = handle_request_with_retry(
+            url=url,
+            consecutive_404_counter=search.consecutive_404_counter,
+            consecutive_429_counter=search.consecutive_429_counter,
+            consecutive_empty_counter=search.consecutive_empty_counter,
+            no_id_counter=search.no_id_counter,
+            stop_event=search.stop_event,
+            shared_lock=search.lock,
+            max_consecutive_404=DEFAULT_MAX_CONSECUTIVE_404,
+            max_consecutive_429=DEFAULT_MAX_CONSECUTIVE_429,
+            max_consecutive_empty=DEFAULT_MAX_CONSECUTIVE_EMPTY,
+            total_workers=DEFAULT_MAX_WORKERS,
+            retry_delay=6,
+            max_retries=5,
+            worker_logger=logger
+        )
+
+    if not success:
+        return 0
+
+    archive = get_archive()
+    if archive is not None:
+        archive.put('search', f"{search.key}|{start}", url, html_content.encode('utf-8'),
+                    location=search.location, f_tpr=search.f_tpr, start=start, **search.filters)
 
-    # Extracción de IDs
-    ids_str_list = re.findall(r'data-entity-urn="urn:li:jobPosting:(\d+)"', html_content)
+    # IDs y datos de cada tarjeta, en una pasada
+    with span('search_parse'):
+        ids_str_list, cards = parse_search_cards(html_content)
 
     if not ids_str_list:
-        log_event("no_ids_found")
-        log_db_event("no_ids_found")
-        print("No se encontraron más IDs. Terminando.")
-        break
+        with search.lock:
+            search.no_id_counter.value += 1
+        search.mark_end(start)
+        log_event("no_ids_found", location=search.location, f_tpr=search.f_tpr, start=start)
+        return 0
 
     # Log discovery iteration
-    log_event("discovery_iteration", records_count=len(ids_str_list))
+    log_event("discovery_iteration", records_count=len(ids_str_list), location=search.location, start=start)
     if LOG_DISCOVERY_DETAILS:
         log_db_event("discovery_iteration", records_count=len(ids_str_list))
-        print(f"Encontrados {len(ids_str_list)} IDs en esta iteración y guardados en la base de datos.")
+        print(f"Encontrados {len(ids_str_list)} IDs en {search.location} (start={start}) y guardados en la base de datos.")
+
+    # Solo se insertan los IDs que no están en el índice de conocidos. Los que esta partición ya había
+    # devuelto no cuentan como vistos en la corrida: si la paginación se repite, el corte temprano igual llega
+    fresh_ids = search.record_ids(ids_str_list)
+    seen_this_run = search.known_ids.count_added(fresh_ids) if search.known_ids is not None else 0
+    candidate_ids = search.known_ids.filter_new(ids_str_list) if search.known_ids is not None else ids_str_list
+    with span('search_persist'):
+        new_ids = insert_job_ids(candidate_ids, search.location, claim_owner=claim_owner, cards=cards) if candidate_ids else []
+    if search.known_ids is not None:
+        search.known_ids.add_many(candidate_ids)
+    # Los que tomó el modo liviano no quedaron reclamados: no van al pool de extracción
+    claimed_ids = [job_id for job_id in new_ids if not is_light(cards.get(job_id))]
+    if on_new_jobs is not None and claimed_ids:
+        on_new_jobs([(job_id, search.location) for job_id in claimed_ids])
+    stale_pages = search.add_page(len(ids_str_list), len(new_ids), start, seen_this_run, len(fresh_ids))
+    IDS_DISCOVERED.inc(len(new_ids), location=search.location, new='true')
+    IDS_DISCOVERED.inc(len(ids_str_list) - len(new_ids), location=search.location, new='false')
+
+    log_metric(logger, "ids_inserted", count=len(new_ids), found=len(ids_str_list), location=search.location, phase="discovery")
+
+    # Corte temprano: K páginas seguidas sin nada nuevo. Con shards concurrentes "seguidas"
+    # es en orden de llegada, así que puede cortar unas páginas antes o después que en secuencial.
+    if DEFAULT_MAX_STALE_PAGES and stale_pages >= DEFAULT_MAX_STALE_PAGES:
+        logger.info(f"{search.key}: {stale_pages} páginas seguidas sin IDs nuevos, terminando en start={start}")
+        search.mark_end(start + 1)
+
+    return len(ids_str_list)
+
+
+def build_searches(locations: List[str], f_tpr_values: List[str], known_ids_days: int = DEFAULT_KNOWN_IDS_DAYS,
+                   known_ids_cache: Optional[KnownIdCache] = None) -> List[SearchState]:
+    # Un índice de IDs conocidos por ubicación, compartido por sus búsquedas y particiones. Sin
+    # historial (known_ids_days <= 0) parte vacío y solo deduplica los IDs que aparecen en varias particiones.
+    # Con known_ids_cache (daemon) el índice se reutiliza entre corridas.
+    def known_ids_for(location: str) -> KnownIdIndex:
+        if known_ids_days <= 0:
+            return KnownIdIndex()
+        if known_ids_cache is not None:
+            return known_ids_cache.get(location, known_ids_days)
+        return load_known_ids(location, known_ids_days)
+
+    known_ids = {location: known_ids_for(location) for location in locations}
+    return [SearchState(location, f_tpr, known_ids[location]) for location in locations for f_tpr in f_tpr_values]
+
+
+def build_shards(searches: List[SearchState], max_range: int, steps: int) -> List[Tuple[SearchState, int]]:
+    # Ordenados por offset para que todas las búsquedas avancen en paralelo
+    return [(search, start) for start in range(0, max_range, steps) for search in searches]
+
+
+def log_partition(search: SearchState):
+    log_event(
+        "discovery_search_completed",
+        location=search.location,
+        f_tpr=search.f_tpr,
+        filters=search.filters,
+        status=search.status,
+        records_count=search.ids_found,
+        new_ids=search.new_ids,
+        overlap_ids=search.overlap_ids,
+        repeated_ids=search.repeated_ids,
+        pages=search.pages,
+        stopped=search.stop_event.is_set(),
+    )
 
-    # Bulk insert de los IDs encontrados
-    with SessionLocal() as session:
-        jobs_to_insert = [
-            {"id": id_str, "country": LOCATION, "status": "pending"} 
-            for id_str in ids_str_list
-        ]
-        stmt = insert(ScraperLinkedinJob).values(jobs_to_insert).on_conflict_do_nothing(index_elements=['id'])
-        session.execute(stmt)
-        session.commit()
 
-    log_metric(logger, "ids_inserted", count=len(ids_str_list))
+def log_coverage(searches: List[SearchState]):
+    """Resumen de cobertura por ubicación: particiones recorridas, cuántas se partieron y cuántas quedaron en el tope."""
+    by_location: Dict[str, List[SearchState]] = {}
+    for search in searches:
+        by_location.setdefault(search.location, []).extend(search.partitions())
+    for location, partitions in by_location.items():
+        statuses: Dict[str, int] = {}
+        for partition in partitions:
+            statuses[partition.status] = statuses.get(partition.status, 0) + 1
+        capped = [partition.key for partition in partitions if partition.status == 'capped']
+        log_event(
+            "discovery_coverage",
+            location=location,
+            partitions=len(partitions),
+            statuses=statuses,
+            records_count=sum(partition.ids_found for partition in partitions),
+            new_ids=sum(partition.new_ids for partition in partitions),
+            capped=capped,
+        )
+        if capped:
+            logger.warning(f"{location}: {len(capped)} particiones siguen en el tope de {SEARCH_RESULT_CAP} resultados "
+                           f"sin filtros para partir: {', '.join(capped[:5])}")
 
-    start += len(ids_str_list)
 
-log_event("discovery_completed", records_count=start)
-log_db_event("discovery_completed", records_count=start)
-print(f"Proceso completado. Start final: {start}")
-log_db_event("scraping_completed", records_count=start)
\ No newline at end of file
+def run_discovery(searches: List[SearchState], max_workers: int = DEFAULT_MAX_WORKERS,
+                  max_range: int = DEFAULT_MAX_RANGE, steps: int = DEFAULT_STEPS,
+                  on_new_jobs: Optional[NewJobsCallback] = None, claim_owner: Optional[str] = None) -> int:
+    """
+    Reparte los shards de todas las búsquedas en un pool de max_workers threads.
+    Cuando una búsqueda termina con IDs hasta el tope de resultados, se parte por el siguiente
+    filtro de SPLIT_FILTERS y sus particiones se encolan en el mismo pool.
+    Retorna el total de IDs encontrados (un ID que aparece en varias particiones cuenta una vez por partición).
+    """
+    limit = min(max_range, SEARCH_RESULT_CAP)
+    shards = build_shards(searches, limit, steps)
+    logger.info(f"Iniciando descubrimiento: {len(searches)} búsquedas, {len(shards)} shards, {max_workers} workers")
+
+    total_ids = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        remaining: Dict[SearchState, int] = {}
+
+        def submit(new_shards):
+            for search, start in new_shards:
+                futures[executor.submit(discover_shard, search, start, on_new_jobs, claim_owner)] = (search, start)
+                remaining[search] = remaining.get(search, 0) + 1
+
+        submit(shards)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                search, start = futures.pop(future)
+                try:
+                    total_ids += future.result()
+                except Exception as e:
+                    logger.error(f"Error en shard {search.key}/start={start}: {e}", exc_info=True)
+                remaining[search] -= 1
+                if remaining[search]:
+                    continue
+                children = search.finish(limit, steps)
+                log_partition(search)
+                if children and not stop_event.is_set():
+                    logger.info(f"{search.key} llegó al tope de {limit} resultados: partiendo en {len(children)} particiones")
+                    submit(build_shards(children, limit, steps))
+
+    log_coverage(searches)
+    return total_ids
+
+
+def run(known_ids_cache: Optional[KnownIdCache] = None) -> int:
+    """Una corrida de descubrimiento sobre LOCATIONS y F_TPR_VALUES. Retorna los IDs encontrados."""
+    start_time = time.time()
+    get_recorder().reset()
+    searches = build_searches(LOCATIONS, F_TPR_VALUES, known_ids_cache=known_ids_cache)
+    log_event("discovery_started", locations=LOCATIONS, f_tpr_values=F_TPR_VALUES)
+
+    total_ids = run_discovery(searches)
+
+    execution_time = time.time() - start_time
+    log_metric(logger, "http_stats", phase="discovery", **get_client().stats.snapshot())
+    if get_client().rate_limiter is not None:
+        log_metric(logger, "rate_limiter", phase="discovery", **get_client().rate_limiter.snapshot())
+    if get_client().egress_pool is not None:
+        log_metric(logger, "egress_pool", phase="discovery", egresses=get_client().egress_pool.snapshot())
+    spans = span_summary()
+    if spans is not None:
+        log_metric(logger, "span_summary", phase="discovery", **spans)
+        log_db_event("span_summary", records_count=total_ids, execution_time=execution_time, details=spans)
+    new_ids = sum(partition.new_ids for search in searches for partition in search.partitions())
+    log_event("discovery_completed", records_count=total_ids, new_ids=new_ids)
+    log_db_event("discovery_completed", records_count=total_ids, execution_time=execution_time)
+    print(f"Proceso completado. IDs encontrados: {total_ids} (nuevos: {new_ids})")
+    log_db_event("scraping_completed", records_count=total_ids, execution_time=execution_time)
+    return total_ids
+
+
+def main():
+    setup_loki_logging()
+    start_metrics_server()
+    profiler.install()
+    run()
+    log_metric(logger, "telemetry", phase="discovery", **telemetry.telemetry_stats())
+    telemetry.shutdown_telemetry()
+
+
+if __name__ == "__main__":
+    main()
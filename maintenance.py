@@ -0,0 +1,205 @@
+"""
+Mantenimiento de las tablas de jobs: mueve los detalles con extract_date anterior a
+--archive-after-days a scraper_linkedin_job_details_archive (particionada por mes) y, con
+--export-dir, exporta a CSV comprimido las particiones de más de --export-after-months meses y
+las elimina.
+
+La tabla caliente scraper_linkedin_job_details_hot queda con los detalles recientes, que son los que
+leen refresh.py y los upserts del JobWriter; la vista scraper_linkedin_job_details sigue mostrando
+también los archivados. Se puede interrumpir y volver a correr.
+
+Uso:
+    python scraper.py maintenance [--archive-after-days 90] [--batch-size 5000] [--dry-run]
+    python scraper.py maintenance --export-dir /data/exports --export-after-months 12
+"""
+import argparse
+import gzip
+import os
+import re
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from models import DETAILS_ARCHIVE_TABLE, ScraperLinkedinJobDetail, SessionLocal, get_engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Detalles extraídos hace más días que esto pasan al archivo (mayor que LINKEDIN_REFRESH_MAX_AGE_DAYS)
+ARCHIVE_AFTER_DAYS = int(os.getenv('LINKEDIN_ARCHIVE_AFTER_DAYS', 90))
+ARCHIVE_BATCH_SIZE = int(os.getenv('LINKEDIN_ARCHIVE_BATCH_SIZE', 5000))
+# Particiones del archivo más antiguas que esto se exportan y eliminan (0 = nunca; requiere --export-dir)
+EXPORT_AFTER_MONTHS = int(os.getenv('LINKEDIN_EXPORT_AFTER_MONTHS', 0))
+EXPORT_DIR = os.getenv('LINKEDIN_EXPORT_DIR', '')
+
+DETAILS_TABLE = ScraperLinkedinJobDetail.__tablename__
+_COLUMNS = ", ".join(column.name for column in ScraperLinkedinJobDetail.__table__.columns)
+_PARTITION_RE = re.compile(rf"^{DETAILS_ARCHIVE_TABLE}_(\d{{4}})_(\d{{2}})$")
+
+OLDEST_SQL = text(f"SELECT min(extract_date) FROM {DETAILS_TABLE}")
+
+PENDING_SQL = text(f"SELECT count(*) FROM {DETAILS_TABLE} WHERE extract_date < :cutoff")
+
+# Un job re-extraído después de archivarse deja una sola versión en el archivo, la más reciente:
+# la vista solo descarta las filas archivadas que siguen en la tabla caliente
+ARCHIVE_BATCH_SQL = text(f"""
+    WITH batch AS (
+        SELECT id FROM {DETAILS_TABLE}
+        WHERE extract_date < :cutoff
+        ORDER BY extract_date
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM {DETAILS_TABLE} d USING batch WHERE d.id = batch.id
+        RETURNING {', '.join(f'd.{column}' for column in _COLUMNS.split(', '))}
+    ), superseded AS (
+        DELETE FROM {DETAILS_ARCHIVE_TABLE} a USING moved m WHERE a.id = m.id AND a.extract_date < m.extract_date
+    ), archived AS (
+        INSERT INTO {DETAILS_ARCHIVE_TABLE} ({_COLUMNS})
+        SELECT {_COLUMNS} FROM moved m
+        WHERE NOT EXISTS (SELECT 1 FROM {DETAILS_ARCHIVE_TABLE} a WHERE a.id = m.id AND a.extract_date > m.extract_date)
+        ON CONFLICT DO NOTHING
+    )
+    SELECT count(*) FROM moved
+""")
+
+PARTITIONS_SQL = text(f"""
+    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = '{DETAILS_ARCHIVE_TABLE}'::regclass
+    ORDER BY c.relname
+""")
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{DETAILS_ARCHIVE_TABLE}_{month:%Y_%m}"
+
+
+def ensure_partitions(first: datetime, last: datetime) -> List[str]:
+    """Crea las particiones mensuales del archivo entre first y last (inclusive) que falten."""
+    names = []
+    month = month_start(first)
+    with SessionLocal() as session:
+        while month <= last:
+            names.append(partition_name(month))
+            session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {DETAILS_ARCHIVE_TABLE} "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+            ))
+            month = next_month(month)
+        session.commit()
+    return names
+
+
+def archive_details(archive_after_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Mueve por lotes los detalles más antiguos que archive_after_days al archivo; retorna las filas movidas."""
+    cutoff = datetime.utcnow() - timedelta(days=archive_after_days)
+    with SessionLocal() as session:
+        oldest = session.execute(OLDEST_SQL).scalar()
+    if oldest is None or oldest >= cutoff:
+        return 0
+    ensure_partitions(oldest, cutoff)
+
+    moved = 0
+    while True:
+        with SessionLocal() as session:
+            rows = session.execute(ARCHIVE_BATCH_SQL, {"cutoff": cutoff, "batch_size": batch_size}).scalar()
+            session.commit()
+        if not rows:
+            return moved
+        moved += rows
+        logger.info(f"Archivados {moved} detalles anteriores a {cutoff:%Y-%m-%d}")
+
+
+def archived_partitions() -> List[tuple]:
+    """(nombre, mes) de cada partición mensual del archivo."""
+    with SessionLocal() as session:
+        names = session.execute(PARTITIONS_SQL).scalars().all()
+    partitions = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1)))
+    return partitions
+
+
+def export_partition(name: str, export_dir: str) -> str:
+    """
+    Copia la partición, con el texto de las descripciones, a <export_dir>/<partición>.csv.gz y
+    luego la separa y la elimina. El archivo se escribe completo antes de tocar la base.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"{name}.csv.gz")
+    temp_path = f"{path}.tmp"
+    query = (
+        f"SELECT a.*, s.content AS description_text FROM {name} a "
+        "LEFT JOIN scraper_linkedin_job_descriptions s ON s.content_hash = a.description_hash ORDER BY a.extract_date"
+    )
+    connection = get_engine().raw_connection()
+    try:
+        with gzip.open(temp_path, 'wb') as f:
+            connection.cursor().copy_expert(f"COPY ({query}) TO STDOUT WITH CSV HEADER", f)
+        os.replace(temp_path, path)
+    finally:
+        connection.close()
+    with SessionLocal() as session:
+        session.execute(text(f"ALTER TABLE {DETAILS_ARCHIVE_TABLE} DETACH PARTITION {name}"))
+        session.execute(text(f"DROP TABLE {name}"))
+        session.commit()
+    return path
+
+
+def export_old_partitions(export_dir: str, export_after_months: int = EXPORT_AFTER_MONTHS) -> List[str]:
+    """Exporta y elimina las particiones cuyo mes terminó hace más de export_after_months meses."""
+    if export_after_months <= 0:
+        return []
+    cutoff = month_start(datetime.utcnow())
+    for _ in range(export_after_months):
+        cutoff = month_start(cutoff - timedelta(days=1))
+    exported = []
+    for name, month in archived_partitions():
+        if next_month(month) <= cutoff:
+            exported.append(export_partition(name, export_dir))
+            logger.info(f"Partición {name} exportada a {exported[-1]} y eliminada")
+    return exported
+
+
+def main(argv: Optional[List[str]] = None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Archiva los detalles antiguos y exporta las particiones viejas")
+    parser.add_argument('--archive-after-days', type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument('--export-dir', default=EXPORT_DIR)
+    parser.add_argument('--export-after-months', type=int, default=EXPORT_AFTER_MONTHS)
+    parser.add_argument('--dry-run', action='store_true', help="Solo contar los detalles a archivar")
+    args = parser.parse_args(argv)
+
+    cutoff = datetime.utcnow() - timedelta(days=args.archive_after_days)
+    with SessionLocal() as session:
+        pending = session.execute(PENDING_SQL, {"cutoff": cutoff}).scalar()
+    logger.info(f"Detalles anteriores a {cutoff:%Y-%m-%d}: {pending}")
+    if args.dry_run:
+        return
+
+    start = time.time()
+    moved = archive_details(args.archive_after_days, args.batch_size)
+    logger.info(f"Archivados {moved} detalles en {time.time() - start:.1f}s. El espacio se recupera con (auto)VACUUM.")
+    if args.export_dir:
+        exported = export_old_partitions(args.export_dir, args.export_after_months)
+        logger.info(f"Particiones exportadas: {len(exported)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Registro de métricas en proceso (contadores, gauges e histogramas) expuesto en formato de texto
+de Prometheus mientras corre el scraper.
+
+Con LINKEDIN_METRICS_PORT configurado, cada fase levanta el endpoint al iniciar:
+    curl http://localhost:9100/metrics
+"""
+import bisect
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv('LINKEDIN_METRICS_PORT', 0))  # 0 = endpoint desactivado
+METRICS_HOST = os.getenv('LINKEDIN_METRICS_HOST', '0.0.0.0')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        """Suma de todas las series del contador."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Metric):
+    """Gauge con valor explícito (set/inc/dec) o calculado al momento de exponer (set_function)."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = function()
+            except Exception as e:
+                logger.debug(f"No se pudo calcular {self.name}{key}: {e}")
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiqueta: conteos por bucket (no acumulados, el último es +Inf), suma y total
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = {key: ([*counts], total, count) for key, (counts, total, count) in self._series.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"La métrica {metric.name} ya está registrada con otro tipo o etiquetas")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Métricas del scraper; phase es 'discovery' o 'extraction'
+FETCH_SECONDS = histogram('linkedin_fetch_seconds', 'Latencia de cada GET a LinkedIn por fase y código de estado', ['phase', 'status'])
+HTTP_IN_FLIGHT = gauge('linkedin_http_in_flight', 'Solicitudes HTTP en curso por fase', ['phase'])
+RESPONSES = counter('linkedin_responses_total', 'Respuestas 404, 429, vacías y errores de red por fase', ['phase', 'outcome'])
+PARSE_SECONDS = histogram('linkedin_parse_seconds', 'Tiempo de parseo de una página de job por backend', ['backend'],
+                          buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+DB_FLUSH_SECONDS = histogram('linkedin_db_flush_seconds', 'Duración de cada lote del JobWriter', ['result'])
+DB_FLUSH_ROWS = counter('linkedin_db_flushed_rows_total', 'Filas persistidas por el JobWriter', ['kind'])
+QUEUE_DEPTH = gauge('linkedin_queue_depth', 'Elementos esperando en cada cola interna', ['queue'])
+JOBS_IN_FLIGHT = gauge('linkedin_jobs_in_flight', 'Jobs enviados al pool de extracción y aún no terminados')
+JOBS_PROCESSED = counter('linkedin_jobs_processed_total', 'Jobs procesados por la extracción', ['result'])
+IDS_DISCOVERED = counter('linkedin_ids_discovered_total', 'IDs encontrados en las búsquedas', ['location', 'new'])
+LIGHT_JOBS = counter('linkedin_light_jobs_total', 'Jobs nuevos con tarjeta completa resueltos sin detalle (skip) o enviados al final de la cola (defer)', ['mode'])
+REFRESH_RESULTS = counter('linkedin_refresh_results_total', 'Jobs revisados por refresh.py según el resultado', ['result'])
+SPAN_SECONDS = histogram('linkedin_span_seconds', 'Duración de cada etapa de un job o de una página de búsqueda (tracing.py)', ['stage'],
+                         buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+EGRESS_REQUESTS = counter('linkedin_egress_requests_total', 'Solicitudes por salida del pool y resultado (ok, throttled, empty, error)', ['egress', 'outcome'])
+EGRESS_SCORE = gauge('linkedin_egress_score', 'Puntaje de salud de cada salida (0 a 1)', ['egress'])
+EGRESS_OPEN = gauge('linkedin_egress_circuit_open', '1 si el circuito de la salida está abierto o en prueba', ['egress'])
+EGRESS_STATE = gauge('linkedin_egress_circuit_state', '1 en el estado actual del circuito de cada salida (closed, half_open, open), 0 en los demás', ['egress', 'state'])
+EGRESS_FAILURE_RATE = gauge('linkedin_egress_failure_rate', 'Tasa reciente (promedio móvil) de 429, páginas vacías y errores de cada salida', ['egress', 'outcome'])
+EGRESS_LATENCY = gauge('linkedin_egress_latency_seconds', 'Latencia reciente (promedio móvil) de cada salida', ['egress'])
+EGRESS_IN_FLIGHT = gauge('linkedin_egress_in_flight', 'Solicitudes en curso por salida', ['egress'])
+RATE_LIMIT_RPS = gauge('linkedin_rate_limit_rps', 'Tasa permitida por cada limitador AIMD (global o de una salida), en req/s', ['limiter'])
+THROTTLE_EVENTS = counter('linkedin_throttle_events_total', 'Eventos de throttling (429, página vacía) recibidos por cada limitador', ['limiter', 'reason'])
+EGRESS_TRIPS = counter('linkedin_egress_circuit_trips_total', 'Veces que se abrió el circuito de cada salida', ['egress'])
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """Levanta /metrics en un thread de fondo (una vez por proceso). Con port=0 no hace nada."""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError as e:
+                logger.warning(f"No se pudo levantar el endpoint de métricas en {host}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Métricas disponibles en http://{host}:{port}/metrics")
+    return _server
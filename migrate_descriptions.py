@@ -0,0 +1,91 @@
+"""
+Migra las descripciones guardadas en línea en scraper_linkedin_job_details_hot a la tabla
+deduplicada scraper_linkedin_job_descriptions, por lotes y dentro de Postgres (sha256 en SQL,
+igual al que calcula el JobWriter). Se puede interrumpir y volver a correr.
+
+Los lectores no cambian: la vista scraper_linkedin_job_details resuelve job_description por hash.
+
+Uso:
+    python migrate_descriptions.py [--batch-size 5000] [--dry-run]
+"""
+import argparse
+import os
+import time
+import logging
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from models import DETAILS_TABLE, SessionLocal
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = int(os.getenv('LINKEDIN_MIGRATION_BATCH_SIZE', 5000))
+
+PENDING_SQL = text(f"""
+    SELECT count(*) AS rows, count(DISTINCT md5(job_description)) AS distinct_descriptions,
+           coalesce(sum(octet_length(job_description)), 0) AS bytes
+    FROM {DETAILS_TABLE}
+    WHERE description_hash IS NULL AND job_description IS NOT NULL
+""")
+
+MIGRATE_BATCH_SQL = text(f"""
+    WITH batch AS (
+        SELECT id, job_description, encode(sha256(convert_to(job_description, 'UTF8')), 'hex') AS content_hash
+        FROM {DETAILS_TABLE}
+        WHERE description_hash IS NULL AND job_description IS NOT NULL
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), stored AS (
+        INSERT INTO scraper_linkedin_job_descriptions (content_hash, content, created_at)
+        SELECT DISTINCT ON (content_hash) content_hash, job_description, now() AT TIME ZONE 'utc' FROM batch
+        ON CONFLICT (content_hash) DO NOTHING
+        RETURNING 1
+    )
+    UPDATE {DETAILS_TABLE} d
+    SET description_hash = batch.content_hash, job_description = NULL
+    FROM batch
+    WHERE d.id = batch.id
+    RETURNING (SELECT count(*) FROM stored) AS stored
+""")
+
+
+def migrate(batch_size: int = MIGRATION_BATCH_SIZE) -> dict:
+    """Migra lotes hasta que no queden filas con descripción en línea; retorna filas y descripciones nuevas."""
+    totals = {"rows": 0, "descriptions": 0}
+    while True:
+        with SessionLocal() as session:
+            result = session.execute(MIGRATE_BATCH_SQL, {"batch_size": batch_size}).fetchall()
+            session.commit()
+        if not result:
+            return totals
+        totals["rows"] += len(result)
+        totals["descriptions"] += result[0].stored
+        logger.info(f"Migradas {totals['rows']} filas, {totals['descriptions']} descripciones nuevas")
+
+
+def main(argv: Optional[List[str]] = None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Mueve job_description a la tabla deduplicada por hash")
+    parser.add_argument('--batch-size', type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help="Solo contar filas y descripciones distintas")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as session:
+        pending = session.execute(PENDING_SQL).one()
+    logger.info(f"Pendientes: {pending.rows} filas, {pending.distinct_descriptions} descripciones distintas, "
+                f"{pending.bytes / 1e6:.1f} MB de texto")
+    if args.dry_run or not pending.rows:
+        return
+
+    start = time.time()
+    totals = migrate(args.batch_size)
+    logger.info(f"Migración completada: {totals['rows']} filas, {totals['descriptions']} descripciones nuevas "
+                f"en {time.time() - start:.1f}s. El espacio de las filas antiguas se recupera con VACUUM.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,49 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer, Float
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+from sqlalchemy import create_engine, Column, String, DateTime, Text, Index, Integer, Float, Table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, sessionmaker
 from datetime import datetime
 from dotenv import load_dotenv
 import os
+import threading
+import logging
+from typing import Optional
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Database setup
 DATABASE_URL = os.getenv('DATABASE_URL')
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL not found in environment variables")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Estados que el extractor todavía puede reclamar; el índice parcial de la cola solo contiene estas filas
+CLAIMABLE_STATUSES = ('pending', 'retry', 'in_progress')
+_CLAIMABLE_PREDICATE = "status IN (" + ", ".join(f"'{status}'" for status in CLAIMABLE_STATUSES) + ")"
+
+# Compresión TOAST de la tabla de descripciones (lz4 requiere Postgres 14+; vacío = la de la base, pglz)
+DESCRIPTION_COMPRESSION = os.getenv('LINKEDIN_DESCRIPTION_COMPRESSION', 'lz4')
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+
+def get_engine() -> Engine:
+    """El engine del proceso, creado en el primer uso: importar models no requiere DATABASE_URL ni abre conexiones."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if not DATABASE_URL:
+                    raise ValueError("DATABASE_URL not found in environment variables")
+                _engine = create_engine(DATABASE_URL)
+    return _engine
+
+
+def SessionLocal() -> Session:
+    """Sesión nueva sobre get_engine(); conserva el nombre del sessionmaker que reemplaza."""
+    return _session_factory(bind=get_engine())
+
 
 class Base(DeclarativeBase):
     pass
@@ -22,13 +52,41 @@ class ScraperLinkedinJob(Base):
     __tablename__ = "scraper_linkedin_jobs"
     
     id: Mapped[str] = mapped_column(String, primary_key=True, index=True)
-    status: Mapped[str] = mapped_column(String, default="pending", server_default="pending")  # pending, completed, failed
+    status: Mapped[str] = mapped_column(String, default="pending", server_default="pending")  # pending, in_progress, retry, completed, failed, card_only
     country: Mapped[str] = mapped_column(String, index=True)  
+    lease_owner: Mapped[str] = mapped_column(String, nullable=True)  # extractor que tiene el job reclamado
+    lease_expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")  # intentos fallidos transitorios
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)  # solo para status 'retry'
+    priority: Mapped[int] = mapped_column(Integer, default=0, server_default="0")  # se reclama por priority y luego por frescura
+    # Datos de la tarjeta del resultado de búsqueda, guardados por el descubrimiento
+    job_title: Mapped[str] = mapped_column(String, nullable=True)
+    company_name: Mapped[str] = mapped_column(String, nullable=True)
+    location: Mapped[str] = mapped_column(String, nullable=True)
+    listed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Cola de extracción en el orden de reclamo por defecto (LINKEDIN_CLAIM_ORDER=id): crece con el
+        # backlog, no con el historial de jobs completados
+        Index("ix_scraper_linkedin_jobs_claim_id", "priority", "id", postgresql_where=text(_CLAIMABLE_PREDICATE)),
+        # Orden de reclamo por frescura (LINKEDIN_CLAIM_ORDER=freshness): los jobs más nuevos primero
+        Index("ix_scraper_linkedin_jobs_claim_freshness", "priority", text("COALESCE(listed_at, created_at) DESC"),
+              text("id DESC"), postgresql_where=text(_CLAIMABLE_PREDICATE)),
+        # Carga del índice de IDs conocidos (país y ventana de días)
+        Index("ix_scraper_linkedin_jobs_country_created_at", "country", "created_at"),
+    )
+
+# Los detalles se escriben en DETAILS_TABLE; con el nombre original se publica DETAILS_VIEW, que resuelve
+# job_description por hash, así los lectores de scraper_linkedin_job_details siguen viendo las descripciones
+DETAILS_TABLE = "scraper_linkedin_job_details_hot"
+DETAILS_VIEW = "scraper_linkedin_job_details"
+# Nombre de la vista antes de publicarla con el nombre original; queda como alias
+LEGACY_DETAILS_VIEW = "scraper_linkedin_job_details_view"
+
 class ScraperLinkedinJobDetail(Base):
-    __tablename__ = "scraper_linkedin_job_details"
+    __tablename__ = DETAILS_TABLE
     
     id: Mapped[str] = mapped_column(String, primary_key=True, index=True)  
     job_title: Mapped[str] = mapped_column(String, nullable=True)
@@ -38,14 +96,64 @@ class ScraperLinkedinJobDetail(Base):
     posted_time: Mapped[str] = mapped_column(String, nullable=True)
     published_date: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     applicant_count: Mapped[str] = mapped_column(String, nullable=True)
-    job_description: Mapped[str] = mapped_column(Text, nullable=True)
+    job_description: Mapped[str] = mapped_column(Text, nullable=True)  # solo filas antiguas; las nuevas usan description_hash
+    description_hash: Mapped[str] = mapped_column(String, nullable=True, index=True)  # -> scraper_linkedin_job_descriptions
     seniority_level: Mapped[str] = mapped_column(String, nullable=True)
     employment_type: Mapped[str] = mapped_column(String, nullable=True)
     job_function: Mapped[str] = mapped_column(String, nullable=True)
     industries: Mapped[str] = mapped_column(String, nullable=True)
     url: Mapped[str] = mapped_column(String, nullable=True)
-    extract_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    status: Mapped[str] = mapped_column(String, default="processing")  
+    extract_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)  # maintenance.py archiva por fecha
+    status: Mapped[str] = mapped_column(String, default="processing")  # completed, expired (404 al refrescar), card (solo datos de la tarjeta)
+    content_hash: Mapped[str] = mapped_column(String, nullable=True)  # sha256 de la página descargada
+    etag: Mapped[str] = mapped_column(String, nullable=True)
+    last_modified: Mapped[str] = mapped_column(String, nullable=True)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)  # última vez que refresh.py actualizó la fila
+
+class ScraperLinkedinJobDescription(Base):
+    """Descripciones únicas, por sha256 del texto: una publicación repetida en varios avisos se guarda una vez."""
+    __tablename__ = "scraper_linkedin_job_descriptions"
+
+    content_hash: Mapped[str] = mapped_column(String, primary_key=True)
+    content: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+# Detalles archivados (maintenance.py): mismas columnas, particionada por mes de extract_date.
+# Las particiones se crean al archivar y las más antiguas se pueden exportar y eliminar.
+DETAILS_ARCHIVE_TABLE = "scraper_linkedin_job_details_archive"
+details_archive = Table(
+    DETAILS_ARCHIVE_TABLE, Base.metadata,
+    *[
+        Column(column.name, column.type, primary_key=column.name in ("id", "extract_date"))
+        for column in ScraperLinkedinJobDetail.__table__.columns
+    ],
+    postgresql_partition_by="RANGE (extract_date)",
+)
+
+# DETAILS_VIEW tiene las mismas columnas que la tabla scraper_linkedin_job_details antes de deduplicar
+# descripciones, así los lectores existentes no cambian. Incluye los detalles archivados que no volvieron
+# a extraerse. Es de solo lectura: las escrituras van a DETAILS_TABLE.
+_DETAILS_VIEW_COLUMNS = ", ".join(
+    "COALESCE(d.job_description, s.content) AS job_description" if column.name == "job_description" else f"d.{column.name}"
+    for column in ScraperLinkedinJobDetail.__table__.columns if column.name != "description_hash"
+)
+
+# Bases anteriores a DETAILS_TABLE: la tabla se renombra (con sus índices) antes de create_all, que si no
+# crearía una DETAILS_TABLE vacía al lado de la original
+RENAME_DETAILS_TABLE = f"""
+DO $$
+BEGIN
+    IF to_regclass('{DETAILS_TABLE}') IS NULL AND EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE relname = '{DETAILS_VIEW}' AND relkind IN ('r', 'p') AND relnamespace = current_schema()::regnamespace
+    ) THEN
+        ALTER TABLE {DETAILS_VIEW} RENAME TO {DETAILS_TABLE};
+        ALTER INDEX IF EXISTS ix_{DETAILS_VIEW}_id RENAME TO ix_{DETAILS_TABLE}_id;
+        ALTER INDEX IF EXISTS ix_{DETAILS_VIEW}_description_hash RENAME TO ix_{DETAILS_TABLE}_description_hash;
+        ALTER INDEX IF EXISTS ix_{DETAILS_VIEW}_extract_date RENAME TO ix_{DETAILS_TABLE}_extract_date;
+    END IF;
+END $$
+"""
 
 class ScraperEvent(Base):
     __tablename__ = "scraper_events"
@@ -57,7 +165,69 @@ class ScraperEvent(Base):
     status = Column(String, default="success")  # success, failed, partial
     execution_time_seconds = Column(Float, default=0.0)
     error_message = Column(Text, nullable=True)
+    details = Column(Text, nullable=True)  # JSON con el detalle del evento (p. ej. los spans por etapa de span_summary)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Columnas agregadas después de la creación inicial; create_all no altera tablas existentes
+SCHEMA_UPGRADES = [
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS lease_owner VARCHAR",
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITHOUT TIME ZONE",
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITHOUT TIME ZONE",
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS job_title VARCHAR",
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS company_name VARCHAR",
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS location VARCHAR",
+    "ALTER TABLE scraper_linkedin_jobs ADD COLUMN IF NOT EXISTS listed_at TIMESTAMP WITHOUT TIME ZONE",
+    f"ALTER TABLE {DETAILS_TABLE} ADD COLUMN IF NOT EXISTS description_hash VARCHAR",
+    f"ALTER TABLE {DETAILS_TABLE} ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+    f"ALTER TABLE {DETAILS_TABLE} ADD COLUMN IF NOT EXISTS etag VARCHAR",
+    f"ALTER TABLE {DETAILS_TABLE} ADD COLUMN IF NOT EXISTS last_modified VARCHAR",
+    f"ALTER TABLE {DETAILS_TABLE} ADD COLUMN IF NOT EXISTS refreshed_at TIMESTAMP WITHOUT TIME ZONE",
+    "ALTER TABLE scraper_events ADD COLUMN IF NOT EXISTS details TEXT",
+    f"CREATE INDEX IF NOT EXISTS ix_{DETAILS_TABLE}_description_hash ON {DETAILS_TABLE} (description_hash)",
+    # En una tabla grande estos índices tardan: correr setup-schema fuera de las corridas del scraper
+    # Reemplazado por ix_scraper_linkedin_jobs_claim_id al agregar priority al orden de reclamo
+    "DROP INDEX IF EXISTS ix_scraper_linkedin_jobs_claimable",
+    f"CREATE INDEX IF NOT EXISTS ix_scraper_linkedin_jobs_claim_id ON scraper_linkedin_jobs (priority, id) WHERE {_CLAIMABLE_PREDICATE}",
+    "CREATE INDEX IF NOT EXISTS ix_scraper_linkedin_jobs_claim_freshness ON scraper_linkedin_jobs "
+    f"(priority, COALESCE(listed_at, created_at) DESC, id DESC) WHERE {_CLAIMABLE_PREDICATE}",
+    "CREATE INDEX IF NOT EXISTS ix_scraper_linkedin_jobs_country_created_at ON scraper_linkedin_jobs (country, created_at)",
+    f"CREATE INDEX IF NOT EXISTS ix_{DETAILS_TABLE}_extract_date ON {DETAILS_TABLE} (extract_date)",
+    f"DROP VIEW IF EXISTS {LEGACY_DETAILS_VIEW}",
+    f"CREATE OR REPLACE VIEW {DETAILS_VIEW} AS SELECT {_DETAILS_VIEW_COLUMNS} "
+    f"FROM {DETAILS_TABLE} d LEFT JOIN scraper_linkedin_job_descriptions s ON s.content_hash = d.description_hash "
+    f"UNION ALL SELECT {_DETAILS_VIEW_COLUMNS} "
+    f"FROM {DETAILS_ARCHIVE_TABLE} d LEFT JOIN scraper_linkedin_job_descriptions s ON s.content_hash = d.description_hash "
+    f"WHERE NOT EXISTS (SELECT 1 FROM {DETAILS_TABLE} h WHERE h.id = d.id)",
+    f"CREATE VIEW {LEGACY_DETAILS_VIEW} AS SELECT * FROM {DETAILS_VIEW}",
+]
+
+def upgrade_schema(bind: Optional[Engine] = None):
+    bind = bind or get_engine()
+    if bind.dialect.name != "postgresql":
+        return
+    with bind.begin() as connection:
+        for statement in SCHEMA_UPGRADES:
+            connection.execute(text(statement))
+    if DESCRIPTION_COMPRESSION:
+        # En una transacción aparte: si el servidor no soporta el método, el resto del esquema queda aplicado
+        try:
+            with bind.begin() as connection:
+                connection.execute(text(
+                    f"ALTER TABLE scraper_linkedin_job_descriptions ALTER COLUMN content SET COMPRESSION {DESCRIPTION_COMPRESSION}"
+                ))
+        except Exception as e:
+            logger.warning(f"No se pudo usar compresión {DESCRIPTION_COMPRESSION} para las descripciones: {str(e).splitlines()[0]}")
+
+def setup_schema(bind: Optional[Engine] = None):
+    """
+    Crea las tablas que falten y aplica SCHEMA_UPGRADES. Es idempotente, pero toma locks de las
+    tablas: se corre una vez por deploy (python scraper.py setup-schema), no al importar el módulo.
+    """
+    bind = bind or get_engine()
+    if bind.dialect.name == "postgresql":
+        with bind.begin() as connection:
+            connection.execute(text(RENAME_DETAILS_TABLE))
+    Base.metadata.create_all(bind=bind)
+    upgrade_schema(bind)
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+import logging
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+from metrics import PARSE_SECONDS, QUEUE_DEPTH
+from tracing import JobTrace
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Procesos que parsean las páginas descargadas; con 1 (o 0) se parsea en el mismo thread que descarga
+PARSE_PROCESSES = int(os.getenv('LINKEDIN_PARSE_PROCESSES', os.cpu_count() or 1))
+# Páginas esperando o en parseo; al llenarse, los threads de descarga esperan un cupo
+PARSE_QUEUE_SIZE = int(os.getenv('LINKEDIN_PARSE_QUEUE_SIZE', PARSE_PROCESSES * 4))
+
+_backend: Optional[str] = None
+
+
+def parse_page(content: bytes):
+    """Se ejecuta en un proceso del pool. Retorna (campos, segundos, backend) para registrar el tiempo en el proceso principal."""
+    global _backend
+    from job_parser import BACKENDS, resolve_backend
+    if _backend is None:
+        _backend = resolve_backend()
+    start = time.perf_counter()
+    fields = BACKENDS[_backend](content)
+    return fields, time.perf_counter() - start, _backend
+
+
+class ParseStage:
+    """
+    Segunda etapa de la extracción: los threads de descarga entregan el HTML crudo y un
+    ProcessPoolExecutor lo parsea en paralelo, fuera del GIL del proceso principal.
+
+    submit bloquea mientras haya queue_size páginas sin terminar (backpressure hacia las descargas)
+    y retorna un Future con lo que retorne on_fields(campos), u on_error(excepción) si el parseo falla.
+    Los callbacks corren en el thread de resultados del pool. Con trace se registran parse_wait
+    (cupo, cola y transferencia al proceso) y parse (el parseo en el proceso).
+    """
+    def __init__(self, processes: int = PARSE_PROCESSES, queue_size: int = PARSE_QUEUE_SIZE):
+        self.processes = max(1, processes)
+        self.queue_size = max(self.processes, queue_size)
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.parsed = 0
+        self.failed = 0
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def start(self) -> 'ParseStage':
+        self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        QUEUE_DEPTH.set_function(self.pending, queue='parse')
+        logger.info(f"Parseo en {self.processes} procesos (hasta {self.queue_size} páginas en cola)")
+        return self
+
+    def submit(self, content: bytes, on_fields: Callable[[dict], object],
+               on_error: Callable[[BaseException], object], trace: Optional[JobTrace] = None) -> Future:
+        submitted = time.perf_counter()
+        self._slots.acquire()
+        with self._lock:
+            self._pending += 1
+        result = Future()
+
+        def done(future: Future):
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            try:
+                fields, seconds, backend = future.result()
+            except BaseException as e:
+                self.failed += 1
+                callback, value = on_error, e
+            else:
+                self.parsed += 1
+                PARSE_SECONDS.observe(seconds, backend=backend)
+                if trace is not None:
+                    trace.add('parse_wait', max(0.0, time.perf_counter() - submitted - seconds))
+                    trace.add('parse', seconds)
+                callback, value = on_fields, fields
+            try:
+                result.set_result(callback(value))
+            except BaseException as e:
+                result.set_exception(e)
+
+        self._executor.submit(parse_page, content).add_done_callback(done)
+        return result
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {"processes": self.processes, "parsed": self.parsed, "failed": self.failed}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def get_parse_stage(processes: int = PARSE_PROCESSES) -> Optional[ParseStage]:
+    """ParseStage iniciado si hay más de un proceso configurado; None para parsear en el thread de descarga."""
+    if processes <= 1:
+        return None
+    return ParseStage(processes).start()
@@ -0,0 +1,156 @@
+import itertools
+import os
+import queue
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+import main as discovery
+import job_extractor as extraction
+from db_writer import JobWriter
+from known_ids import KnownIdCache
+from parse_stage import get_parse_stage
+from metrics import QUEUE_DEPTH, start_metrics_server
+from tracing import get_recorder
+import profiler
+import telemetry
+from telemetry import setup_loki_logging
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_QUEUE_SIZE = int(os.getenv('LINKEDIN_PIPELINE_QUEUE_SIZE', 200))
+
+# Espera máxima por un ID nuevo antes de devolver el control a los reintentos vencidos
+IDLE_POLL_SECONDS = 0.5
+
+_DONE = object()
+
+
+class JobQueue:
+    """
+    Cola acotada entre descubrimiento y extracción. put_jobs bloquea a los threads de
+    descubrimiento cuando la extracción va atrasada (backpressure); la base de datos sigue
+    siendo el registro durable, porque cada ID se inserta reclamado antes de encolarse.
+    """
+    def __init__(self, maxsize: int = PIPELINE_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._discovered_at = {}
+        self.latencies: List[float] = []
+        QUEUE_DEPTH.set_function(self._queue.qsize, queue='pipeline')
+
+    def put_jobs(self, jobs: List[Tuple[str, str]]):
+        now = time.monotonic()
+        with self._lock:
+            for job_id, _ in jobs:
+                self._discovered_at[job_id] = now
+        for job in jobs:
+            self._queue.put(job)
+
+    def close(self):
+        self._queue.put(_DONE)
+
+    def __iter__(self):
+        """Entrega los jobs encolados, y None cada IDLE_POLL_SECONDS sin jobs nuevos (ver RetryScheduler.iter_jobs)."""
+        while True:
+            try:
+                item = self._queue.get(timeout=IDLE_POLL_SECONDS)
+            except queue.Empty:
+                yield None
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def on_result(self, job_id: str, result: bool):
+        with self._lock:
+            discovered_at = self._discovered_at.pop(job_id, None)
+            if discovered_at is not None:
+                self.latencies.append(time.monotonic() - discovered_at)
+
+    def latency_summary(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return {"jobs": 0}
+        return {
+            "jobs": len(latencies),
+            "p50_seconds": round(latencies[len(latencies) // 2], 3),
+            "p95_seconds": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "max_seconds": round(latencies[-1], 3),
+        }
+
+
+def run(known_ids_cache: Optional[KnownIdCache] = None, parse_stage=None) -> dict:
+    """
+    Descubrimiento y extracción en el mismo proceso: cada página de búsqueda entrega sus IDs
+    nuevos directo al pool de extracción. Al terminar el descubrimiento se sigue con el
+    backlog pendiente de corridas anteriores. El daemon pasa su caché de IDs conocidos y su
+    etapa de parseo para reutilizarlos entre corridas.
+    """
+    discovery.log_db_event('scraper_start')
+    start_time = time.time()
+    started_at = datetime.utcnow()
+    # Un solo resumen de spans con las etapas del descubrimiento y de la extracción (log_extraction_summary)
+    get_recorder().reset()
+
+    owner = extraction.WORKER_ID
+    jobs = JobQueue()
+    searches = discovery.build_searches(discovery.LOCATIONS, discovery.F_TPR_VALUES, known_ids_cache=known_ids_cache)
+    discovered = {"total": 0}
+
+    def discover():
+        try:
+            discovered["total"] = discovery.run_discovery(searches, on_new_jobs=jobs.put_jobs, claim_owner=owner)
+        except Exception as e:
+            logger.error(f"Error en el descubrimiento: {e}", exc_info=True)
+        finally:
+            jobs.close()
+
+    discovery_thread = threading.Thread(target=discover, name="discovery", daemon=True)
+    discovery_thread.start()
+
+    writer = JobWriter(lease_owner=owner).start()
+    own_parse_stage = parse_stage is None
+    if own_parse_stage:
+        parse_stage = get_parse_stage()
+    counts = extraction.run_extraction(
+        itertools.chain(jobs, extraction.iter_claimed_jobs(owner)),
+        writer,
+        on_result=jobs.on_result,
+        parse_stage=parse_stage,
+    )
+    discovery_thread.join()
+    if parse_stage is not None and own_parse_stage:
+        parse_stage.close()
+    writer.close()
+    total_time = time.time() - start_time
+
+    latency = jobs.latency_summary()
+    extraction.log_extraction_summary(counts, writer, total_time)
+    extraction.log_freshness_report(started_at, total_time)
+    discovery.log_metric(logger, "pipeline_latency", phase="pipeline", **latency)
+    discovery.log_event("pipeline_completed", discovered=discovered["total"], processed=counts["processed"])
+    discovery.log_db_event("discovery_completed", records_count=discovered["total"], execution_time=total_time)
+    discovery.log_db_event('scraper_end', status='success', records_count=counts["processed"], execution_time=total_time)
+    return {"discovered": discovered["total"], **counts}
+
+
+def main():
+    setup_loki_logging()
+    logger.info("Iniciando scraper en modo pipeline...")
+    start_metrics_server()
+    profiler.install()
+    run()
+    discovery.log_metric(logger, "telemetry", phase="pipeline", **telemetry.telemetry_stats())
+    telemetry.shutdown_telemetry()
+
+
+if __name__ == "__main__":
+    main()
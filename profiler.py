@@ -0,0 +1,137 @@
+"""
+Profiler por muestreo, opcional, para ver en qué se va el tiempo de una corrida en producción.
+Un thread toma cada LINKEDIN_PROFILE_INTERVAL segundos las pilas de todos los threads del
+proceso (sys._current_frames) y al terminar la ventana escribe un archivo en formato "collapsed"
+(una línea por pila: `thread;modulo:funcion;... muestras`), que leen flamegraph.pl y speedscope:
+
+    flamegraph.pl profiles/profile-1234-20260101T120000.folded > flame.svg
+
+Se activa de dos formas:
+    LINKEDIN_PROFILE_SECONDS=N   perfila los primeros N segundos del proceso
+    kill -USR1 <pid>             perfila los próximos LINKEDIN_PROFILE_WINDOW segundos
+
+Si el proceso termina antes que la ventana, se escribe lo muestreado hasta ahí.
+Apagado no cuesta nada: no hay thread de muestreo, solo el handler de la señal. Los procesos
+de parseo (LINKEDIN_PARSE_PROCESSES) no se muestrean; su tiempo está en linkedin_parse_seconds.
+"""
+import atexit
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SECONDS = float(os.getenv('LINKEDIN_PROFILE_SECONDS', 0))  # 0 = no perfilar al iniciar
+PROFILE_WINDOW = float(os.getenv('LINKEDIN_PROFILE_WINDOW', 30))  # ventana de cada SIGUSR1
+PROFILE_INTERVAL = float(os.getenv('LINKEDIN_PROFILE_INTERVAL', 0.01))
+PROFILE_DIR = os.getenv('LINKEDIN_PROFILE_DIR', 'profiles')
+
+# ThreadPoolExecutor-0_3 y ThreadPoolExecutor-0_7 se agrupan en una sola raíz del flamegraph
+_THREAD_SUFFIX_RE = re.compile(r'[-_]\d+(_\d+)?$')
+
+
+def _thread_label(name: str) -> str:
+    return _THREAD_SUFFIX_RE.sub('', name) or name
+
+
+def _frame_label(frame) -> str:
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f"{module}:{frame.f_code.co_name}"
+
+
+class SamplingProfiler:
+    """Una ventana de muestreo; run() bloquea hasta terminarla y escribir el archivo."""
+    def __init__(self, seconds: float, interval: float = PROFILE_INTERVAL, output_dir: str = PROFILE_DIR,
+                 stop: Optional[threading.Event] = None):
+        self.seconds = seconds
+        self.interval = interval
+        self.output_dir = output_dir
+        self.stop = stop or threading.Event()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def sample(self, own_ident: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(_thread_label(names.get(ident, str(ident))))
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self) -> Optional[str]:
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            self.sample(own_ident)
+            if self.stop.wait(self.interval):
+                break
+        return self.write()
+
+    def write(self) -> Optional[str]:
+        if not self.stacks:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile-{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}.folded")
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+_active: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def start(seconds: float = PROFILE_WINDOW) -> bool:
+    """Inicia una ventana de perfilado en un thread de fondo; False si ya hay una en curso."""
+    global _active
+    with _lock:
+        if _active is not None and _active.is_alive():
+            return False
+
+        def profile():
+            logger.info(f"Perfilando {seconds:.0f}s cada {PROFILE_INTERVAL * 1000:.0f} ms")
+            profiler = SamplingProfiler(seconds, stop=_stop)
+            path = profiler.run()
+            logger.info(f"Perfil escrito en {path} ({profiler.samples} muestras)")
+
+        _active = threading.Thread(target=profile, name="profiler", daemon=True)
+        _active.start()
+        return True
+
+
+@atexit.register
+def _finish():
+    """Al salir, corta la ventana en curso y espera que escriba su archivo."""
+    _stop.set()
+    if _active is not None:
+        _active.join(timeout=10)
+
+
+def _on_signal(signum, frame):
+    if not start(PROFILE_WINDOW):
+        logger.info("Ya hay un perfilado en curso; se ignora la señal")
+
+
+def install():
+    """Registra SIGUSR1 e inicia el perfilado de LINKEDIN_PROFILE_SECONDS. Se llama desde el main de cada proceso."""
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, _on_signal)
+    if PROFILE_SECONDS > 0:
+        start(PROFILE_SECONDS)
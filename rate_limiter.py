@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from metrics import RATE_LIMIT_RPS, THROTTLE_EVENTS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv('LINKEDIN_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_INITIAL = float(os.getenv('LINKEDIN_RATE_INITIAL', 2.0))  # requests/seg
+RATE_MIN = float(os.getenv('LINKEDIN_RATE_MIN', 0.2))
+RATE_MAX = float(os.getenv('LINKEDIN_RATE_MAX', 20.0))
+RATE_INCREASE = float(os.getenv('LINKEDIN_RATE_INCREASE', 0.1))  # requests/seg ganados por segundo sin throttling
+RATE_DECREASE = float(os.getenv('LINKEDIN_RATE_DECREASE', 0.5))  # factor multiplicativo ante throttling
+RATE_BURST = float(os.getenv('LINKEDIN_RATE_BURST', 2))
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket compartido por todos los workers con control AIMD: cada éxito sube la tasa
+    de forma aditiva (≈ increase req/s por segundo de tráfico sano) y cada 429 o página vacía
+    la multiplica por decrease. Las bajadas se agrupan en una ventana de 1/rate segundos
+    para que una ráfaga de 429 concurrentes cuente como un solo evento.
+
+    Cada ajuste se publica en linkedin_rate_limit_rps y cada evento en linkedin_throttle_events_total,
+    con la etiqueta limiter=name ('global' o el nombre de la salida que lo usa).
+    """
+    def __init__(self, initial_rate: float = RATE_INITIAL, min_rate: float = RATE_MIN, max_rate: float = RATE_MAX,
+                 increase: float = RATE_INCREASE, decrease: float = RATE_DECREASE, burst: float = RATE_BURST,
+                 name: str = 'global'):
+        self.name = name
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = max(1.0, burst)
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.throttle_events: Dict[str, int] = {}
+        self.decreases = 0
+        self.acquired = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible para una solicitud."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Reserva el token aunque quede en deuda; la espera paga la deuda a la tasa actual
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += 1
+            self.wait_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def try_acquire(self) -> float:
+        """
+        Toma un token si hay uno y retorna 0; si no, retorna los segundos hasta el próximo sin
+        reservarlo. Es para el motor asyncio: no deja deuda, así cientos de corrutinas en espera
+        no reservan turnos a la tasa vieja ni salen en ráfaga si el loop se atrasa.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.acquired += 1
+                return 0.0
+            wait = (1 - self._tokens) / self.rate
+            self.wait_seconds += wait
+            return wait
+
+    def publish(self):
+        """Publica la tasa actual; lo llama quien crea o renombra el limitador y cada ajuste."""
+        RATE_LIMIT_RPS.set(self.rate, limiter=self.name)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+            self.publish()
+
+    def on_throttle(self, reason: str):
+        """Registra un evento de throttling (429, página vacía, ...) y baja la tasa."""
+        with self._lock:
+            self.throttle_events[reason] = self.throttle_events.get(reason, 0) + 1
+            THROTTLE_EVENTS.inc(limiter=self.name, reason=reason)
+            now = time.monotonic()
+            if now - self._last_decrease < 1.0 / self.rate:
+                return
+            self._last_decrease = now
+            previous = self.rate
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.decreases += 1
+            self.publish()
+        logger.warning(f"Throttling ({reason}): tasa {previous:.2f} -> {self.rate:.2f} req/s")
+
+    def at_min_rate(self) -> bool:
+        return self.rate <= self.min_rate
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "acquired": self.acquired,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "decreases": self.decreases,
+                "throttle_events": dict(self.throttle_events),
+            }
+
+
+_limiter: Optional[AdaptiveRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[AdaptiveRateLimiter]:
+    """Retorna el limitador del proceso (None si LINKEDIN_RATE_LIMIT_ENABLED=false)."""
+    global _limiter
+    if not RATE_LIMIT_ENABLED:
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveRateLimiter()
+                _limiter.publish()
+    return _limiter
@@ -0,0 +1,231 @@
+"""
+Modo refresh: vuelve a revisar los jobs ya extraídos que siguen activos, los más recientes
+primero, y solo escribe lo que cambió.
+
+Cada job se pide con GET condicional (If-None-Match / If-Modified-Since con el ETag y
+Last-Modified guardados). Un 304, o una página con el mismo sha256 que la guardada, no se
+parsea ni se escribe. Si la página cambió se parsea y se actualizan únicamente las columnas
+distintas (más refreshed_at); un 404 deja el detalle como 'expired'. Con LINKEDIN_ARCHIVE_DIR,
+toda página descargada se archiva antes de escribir, así replay.py parte de la última descarga y
+no devuelve a la base un contenido más viejo que el que dejó el refresh.
+
+Cada pasada recorre todas las publicaciones activas (hasta --max-age-days) de la más nueva a la
+más antigua, en páginas de --page-size con keyset sobre (fecha, id), saltando las escritas en las
+últimas --interval-hours; la frecuencia la da el cron. Como los 304 y las páginas sin cambios no
+se escriben, el keyset (y no una marca en la fila) es lo que hace avanzar la pasada hasta las más antiguas.
+
+Uso:
+    python refresh.py [--page-size 1000] [--interval-hours 24] [--max-age-days 30]
+"""
+import argparse
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import requests
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+import job_extractor as extraction
+import profiler
+import telemetry
+from archive import get_archive
+from db_writer import JobWriter, description_hash
+from http_client import get_client
+from job_parser import JOB_FIELDS, content_hash, parse_job_html
+from metrics import REFRESH_RESULTS, start_metrics_server
+from models import DETAILS_TABLE, SessionLocal
+from telemetry import setup_loki_logging
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# No se revisan los detalles extraídos o actualizados hace menos de REFRESH_INTERVAL_HOURS
+REFRESH_INTERVAL_HOURS = float(os.getenv('LINKEDIN_REFRESH_INTERVAL_HOURS', 24))
+# Publicaciones más antiguas se consideran cerradas y no se revisan
+REFRESH_MAX_AGE_DAYS = int(os.getenv('LINKEDIN_REFRESH_MAX_AGE_DAYS', 30))
+# Candidatos cargados por consulta; la pasada sigue página por página hasta la más antigua
+REFRESH_PAGE_SIZE = int(os.getenv('LINKEDIN_REFRESH_PAGE_SIZE', 1000))
+
+# Columnas comparadas al cambiar la página; la descripción se compara por hash y published_date
+# no se recalcula (es relativa a la descarga y la primera es la más precisa)
+COMPARED_FIELDS = [field for field in JOB_FIELDS if field != 'job_description']
+
+CANDIDATES_SQL = text(f"""
+    SELECT id, country, url, content_hash, etag, last_modified,
+           coalesce(published_date, extract_date) AS refresh_key,
+           coalesce(description_hash, encode(sha256(convert_to(job_description, 'UTF8')), 'hex')) AS description_hash,
+           {', '.join(COMPARED_FIELDS)}
+    FROM {DETAILS_TABLE}
+    WHERE status = 'completed'
+      AND (CAST(:countries AS VARCHAR[]) IS NULL OR country = ANY(CAST(:countries AS VARCHAR[])))
+      AND coalesce(published_date, extract_date) >= :min_published
+      AND coalesce(refreshed_at, extract_date) <= :written_before
+      AND (CAST(:after_key AS TIMESTAMP) IS NULL
+           OR (coalesce(published_date, extract_date), id) < (CAST(:after_key AS TIMESTAMP), CAST(:after_id AS VARCHAR)))
+    ORDER BY coalesce(published_date, extract_date) DESC, id DESC
+    LIMIT :limit
+""")
+
+
+def load_candidates(limit: int = REFRESH_PAGE_SIZE, interval_hours: float = REFRESH_INTERVAL_HOURS,
+                    max_age_days: int = REFRESH_MAX_AGE_DAYS, countries: Optional[List[str]] = None,
+                    after: Optional[tuple] = None, now: Optional[datetime] = None) -> List[dict]:
+    """
+    Una página de detalles activos no escritos en el último intervalo, los publicados más
+    recientemente primero; after es el (refresh_key, id) de la última fila de la página anterior.
+    """
+    now = now or datetime.utcnow()
+    after_key, after_id = after or (None, None)
+    with SessionLocal() as session:
+        rows = session.execute(CANDIDATES_SQL, {
+            "min_published": now - timedelta(days=max_age_days),
+            "written_before": now - timedelta(hours=interval_hours),
+            "after_key": after_key,
+            "after_id": after_id,
+            "limit": limit,
+            "countries": countries or None,
+        }).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def iter_candidates(page_size: int = REFRESH_PAGE_SIZE, interval_hours: float = REFRESH_INTERVAL_HOURS,
+                    max_age_days: int = REFRESH_MAX_AGE_DAYS, countries: Optional[List[str]] = None) -> Iterator[dict]:
+    """Todos los candidatos de una pasada, página por página; la página siguiente se carga al consumir la anterior."""
+    now = datetime.utcnow()
+    after = None
+    while True:
+        page = load_candidates(page_size, interval_hours, max_age_days, countries, after=after, now=now)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = (page[-1]['refresh_key'], page[-1]['id'])
+
+
+def conditional_headers(stored: dict) -> Dict[str, str]:
+    headers = {}
+    if stored.get('etag'):
+        headers['If-None-Match'] = stored['etag']
+    if stored.get('last_modified'):
+        headers['If-Modified-Since'] = stored['last_modified']
+    return headers
+
+
+def changed_columns(stored: dict, fields: dict) -> dict:
+    changes = {field: fields.get(field) for field in COMPARED_FIELDS if fields.get(field) != stored.get(field)}
+    description = fields.get('job_description')
+    if (description_hash(description) if description else None) != stored.get('description_hash'):
+        changes['job_description'] = description
+    return changes
+
+
+def refresh_job(stored: dict, writer: JobWriter) -> str:
+    """Revisa un job y retorna el resultado: not_modified, unchanged, page_changed (sin columnas distintas), changed, expired o error."""
+    job_id = stored['id']
+    refreshed_at = datetime.utcnow()
+    try:
+        response = get_client().get(stored['url'], timeout=10, headers=conditional_headers(stored), phase='refresh')
+        if response.status_code == 304:
+            return 'not_modified'
+        if response.status_code == 404:
+            writer.update_detail(job_id, {"status": 'expired', "refreshed_at": refreshed_at})
+            return 'expired'
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        # Queda para la próxima pasada
+        logger.warning(f"No se pudo revisar el ID {job_id}: {e}")
+        return 'error'
+
+    archive = get_archive()
+    if archive is not None:
+        # Aunque no haya cambios: el índice registra que esta es la descarga más reciente del job
+        archive.put('job', job_id, stored['url'], response.content,
+                    fetched_at=refreshed_at.replace(tzinfo=timezone.utc), country=stored['country'])
+
+    page_hash = content_hash(response.content)
+    etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+    validators = {"etag": etag, "last_modified": last_modified}
+    if page_hash == stored['content_hash']:
+        if etag != stored['etag'] or last_modified != stored['last_modified']:
+            # Mismo contenido con otros validadores: guardarlos para que la próxima pasada reciba 304
+            writer.update_detail(job_id, validators)
+        return 'unchanged'
+
+    try:
+        fields = parse_job_html(response.content)
+    except Exception as e:
+        logger.error(f"Error parseando el ID {job_id} al refrescar: {e}")
+        return 'error'
+    changes = changed_columns(stored, fields)
+    writer.update_detail(job_id, {**changes, "content_hash": page_hash, **validators, "refreshed_at": refreshed_at})
+    return 'changed' if changes else 'page_changed'
+
+
+def run_refresh(candidates: Iterable[dict], writer: JobWriter, max_threads: int = extraction.MAX_THREADS,
+                max_in_flight: int = extraction.MAX_IN_FLIGHT) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    counts_lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def on_done(future):
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Error inesperado refrescando: {e}", exc_info=True)
+            result = 'error'
+        finally:
+            in_flight.release()
+        REFRESH_RESULTS.inc(result=result)
+        with counts_lock:
+            counts[result] = counts.get(result, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=max_threads) as executor:
+        for stored in candidates:
+            in_flight.acquire()
+            executor.submit(refresh_job, stored, writer).add_done_callback(on_done)
+    return counts
+
+
+def run(page_size: int = REFRESH_PAGE_SIZE, interval_hours: float = REFRESH_INTERVAL_HOURS,
+        max_age_days: int = REFRESH_MAX_AGE_DAYS, locations: Optional[List[str]] = None) -> Dict[str, int]:
+    """Una pasada de refresh por todas las publicaciones activas; retorna la cantidad de jobs por resultado."""
+    extraction.log_db_event('refresh_start')
+    start_time = time.time()
+    logger.info(f"Refrescando las publicaciones activas en páginas de {page_size} con {extraction.MAX_THREADS} threads")
+
+    writer = JobWriter().start()
+    counts = run_refresh(iter_candidates(page_size, interval_hours, max_age_days, locations), writer)
+    writer.close()
+    total_time = time.time() - start_time
+    checked = sum(counts.values())
+
+    extraction.log_metric(logger, "refresh_results", phase="refresh", jobs=checked, **counts)
+    extraction.log_metric(logger, "http_stats", phase="refresh", **get_client().stats.snapshot())
+    extraction.log_metric(logger, "db_writer_stats", phase="refresh", **writer.stats())
+    logger.info(f"Refresh completado en {total_time:.1f}s: {checked} jobs, {counts}")
+    extraction.log_db_event('refresh_end', records_count=checked, execution_time=total_time)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Revisa los jobs activos y guarda solo lo que cambió")
+    parser.add_argument('--page-size', type=int, default=REFRESH_PAGE_SIZE, help="Candidatos cargados por consulta")
+    parser.add_argument('--interval-hours', type=float, default=REFRESH_INTERVAL_HOURS)
+    parser.add_argument('--max-age-days', type=int, default=REFRESH_MAX_AGE_DAYS)
+    parser.add_argument('--location', action='append', dest='locations', help="Solo estos países (repetible)")
+    args = parser.parse_args(argv)
+
+    setup_loki_logging()
+    start_metrics_server()
+    profiler.install()
+    run(args.page_size, args.interval_hours, args.max_age_days, args.locations)
+    telemetry.shutdown_telemetry()
+
+
+if __name__ == "__main__":
+    main()
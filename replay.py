@@ -0,0 +1,124 @@
+"""
+Modo replay: re-ejecuta la extracción sobre el archivo local de respuestas, sin red,
+repartiendo el parseo entre varios procesos, y hace upsert de los detalles. No cambia el estado
+de los jobs ni reemplaza detalles escritos después de la descarga archivada (p. ej. por refresh.py).
+
+Uso:
+    LINKEDIN_ARCHIVE_DIR=/data/archive python replay.py [--processes 8] [--since 2025-09-01] [--dry-run]
+"""
+import argparse
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from archive import ARCHIVE_DIR, ResponseArchive, read_block
+from job_parser import parse_job_html, build_detail_row
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REPLAY_CHUNK_SIZE = int(os.getenv('LINKEDIN_REPLAY_CHUNK_SIZE', 200))
+
+
+def latest_job_entries(archive: ResponseArchive, since: datetime = None) -> List[dict]:
+    """Última descarga archivada de cada job, ordenada por segmento y offset para leer secuencialmente."""
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    latest: Dict[str, dict] = {}
+    for entry in archive.iter_entries(kind='job'):
+        if since is not None and datetime.fromisoformat(entry['fetched_at']) < since:
+            continue
+        current = latest.get(entry['key'])
+        if current is None or entry['fetched_at'] > current['fetched_at']:
+            latest[entry['key']] = entry
+    return sorted(latest.values(), key=lambda entry: (entry['segment'], entry['offset']))
+
+
+def parse_chunk(root: str, entries: List[dict]) -> List[dict]:
+    """Se ejecuta en un proceso del pool: lee, descomprime y parsea un lote de entradas."""
+    handles = {}
+    rows = []
+    try:
+        for entry in entries:
+            content = read_block(root, entry, handles)
+            fields = parse_job_html(content)
+            # Las columnas de fecha guardan UTC sin zona
+            fetched_at = datetime.fromisoformat(entry['fetched_at']).astimezone(timezone.utc).replace(tzinfo=None)
+            rows.append(build_detail_row(entry['key'], entry.get('country'), entry['url'], fields, fetched_at, content))
+    finally:
+        for f in handles.values():
+            f.close()
+    return rows
+
+
+def replay(root: str, processes: int, since: datetime = None, dry_run: bool = False) -> dict:
+    archive = ResponseArchive(root)
+    entries = latest_job_entries(archive, since)
+    logger.info(f"Replay de {len(entries)} jobs archivados con {processes} procesos")
+
+    writer = None
+    if not dry_run:
+        from db_writer import JobWriter
+        # Solo los detalles: el estado de los jobs es de los extractores (pueden tener leases vivos)
+        writer = JobWriter(detail_only=True).start()
+
+    start = time.perf_counter()
+    parsed = 0
+    failed_chunks = 0
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(parse_chunk, root, entries[i:i + REPLAY_CHUNK_SIZE])
+            for i in range(0, len(entries), REPLAY_CHUNK_SIZE)
+        ]
+        for future in as_completed(futures):
+            try:
+                rows = future.result()
+            except Exception as e:
+                failed_chunks += 1
+                logger.error(f"Error parseando un lote del archivo: {e}", exc_info=True)
+                continue
+            parsed += len(rows)
+            if writer is not None:
+                for row in rows:
+                    writer.add_detail(row)
+
+    if writer is not None:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "jobs": len(entries),
+        "parsed": parsed,
+        "failed_chunks": failed_chunks,
+        "seconds": round(elapsed, 2),
+        "jobs_per_second": round(parsed / elapsed, 1) if elapsed else 0.0,
+    }
+    if writer is not None:
+        summary.update(writer.stats())
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Re-extrae jobs desde el archivo local sin usar la red")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--since', type=datetime.fromisoformat, help="Solo descargas posteriores a esta fecha (ISO, con zona horaria)")
+    parser.add_argument('--dry-run', action='store_true', help="Parsea sin escribir en la base de datos")
+    args = parser.parse_args(argv)
+
+    if not args.archive_dir:
+        parser.error("Configura LINKEDIN_ARCHIVE_DIR o --archive-dir")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    summary = replay(args.archive_dir, args.processes, args.since, args.dry_run)
+    logger.info(f"Replay completado: {summary}")
+
+
+if __name__ == "__main__":
+    main()
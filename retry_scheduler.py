@@ -0,0 +1,117 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = float(os.getenv('LINKEDIN_RETRY_DELAY', 5))
+RETRY_MAX_DELAY = float(os.getenv('LINKEDIN_RETRY_MAX_DELAY', 6 * 3600))
+# Reintentos con espera mayor a esta se guardan como 'retry' en la base para una corrida posterior
+RETRY_MAX_INLINE_DELAY = float(os.getenv('LINKEDIN_RETRY_MAX_INLINE_DELAY', 60))
+# Intentos totales (entre corridas) antes de marcar el job como 'failed'
+MAX_ATTEMPTS = int(os.getenv('LINKEDIN_MAX_ATTEMPTS', 12))
+
+Job = Tuple[str, str, int]  # (id, country, attempts)
+
+
+def backoff_delay(attempts: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY, rng=random) -> float:
+    """Backoff exponencial con jitter: mitad fija y mitad aleatoria de base * 2^(attempts-1), tope cap."""
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay / 2 + rng.uniform(0, delay / 2)
+
+
+class RetryScheduler:
+    """
+    Heap en memoria de reintentos ordenado por hora de vencimiento. Los threads de extracción
+    solo agendan el reintento y siguen con otro job; iter_jobs intercala los reintentos vencidos
+    con los jobs nuevos y, al agotarse la fuente, espera los que queden pendientes.
+
+    Los jobs en el heap siguen reclamados por este extractor (schedule_retry extiende su lease). Con un
+    deadline (presupuesto de tiempo de la corrida) iter_jobs deja de esperarlos al vencer y
+    drain() los entrega para guardarlos como 'retry'.
+    """
+    def __init__(self, max_retries: int, max_inline_delay: float = RETRY_MAX_INLINE_DELAY):
+        self.max_retries = max_retries
+        self.max_inline_delay = max_inline_delay
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._retries_this_run = {}
+        self._active = 0
+        self.scheduled = 0
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap)
+
+    def accepts(self, job_id: str, delay: float) -> bool:
+        """True si el reintento puede esperar en memoria: espera corta y quedan reintentos en esta corrida."""
+        with self._cond:
+            return delay <= self.max_inline_delay and self._retries_this_run.get(job_id, 0) < self.max_retries
+
+    def schedule(self, job_id: str, country: str, attempts: int, delay: float):
+        with self._cond:
+            self._retries_this_run[job_id] = self._retries_this_run.get(job_id, 0) + 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), (job_id, country, attempts)))
+            self.scheduled += 1
+            self._cond.notify_all()
+
+    def pop_due(self) -> List[Job]:
+        now = time.monotonic()
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def job_started(self):
+        with self._cond:
+            self._active += 1
+
+    def job_finished(self):
+        """Se llama después de que el job agendó (o no) su reintento."""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def drain(self) -> List[Tuple[Job, float]]:
+        """Vacía el heap; retorna cada reintento pendiente con los segundos que le faltan para vencer."""
+        now = time.monotonic()
+        with self._cond:
+            pending = [(job, max(0.0, due - now)) for due, _, job in self._heap]
+            self._heap = []
+        return pending
+
+    def iter_jobs(self, jobs: Iterable[tuple], deadline: Optional[float] = None) -> Iterator[tuple]:
+        """
+        deadline es un instante de time.monotonic(); pasado ese instante no se entregan más reintentos.
+
+        La fuente puede entregar None cuando no tiene jobs nuevos por un rato (la cola del pipeline
+        mientras el descubrimiento va lento): no se procesa, solo da pie a sacar los reintentos vencidos.
+        """
+        for job in jobs:
+            yield from self.pop_due()
+            if job is not None:
+                yield job
+        # Fuente agotada: quedan los reintentos en el heap y los que puedan agendar los jobs en curso
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            yield from self.pop_due()
+            with self._cond:
+                if not self._heap and self._active == 0:
+                    return
+                timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic()) if timeout is not None else deadline - time.monotonic()
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
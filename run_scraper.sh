@@ -1,10 +1,73 @@
 #!/bin/bash
 
 # LinkedIn Scraper Cron Script
-# Runs discovery (main.py) and extraction (job_extractor.py) sequentially
+# Runs discovery (main.py) and extraction (job_extractor.py) sequentially,
+# or both in one process with SCRAPER_MODE=pipeline (pipeline.py).
+# SCRAPER_MODE=refresh only revisits postings already extracted (refresh.py)
+# SCRAPER_MODE=maintenance archives old job details (maintenance.py)
+# SCRAPER_MODE=daemon keeps one process running LINKEDIN_DAEMON_MODE every LINKEDIN_DAEMON_INTERVAL seconds (daemon.py)
+# The schema is applied first (scraper.py setup-schema); set LINKEDIN_SETUP_SCHEMA=false to skip it
 
 echo "$(date): Starting LinkedIn scraper..."
 
+if [ "${LINKEDIN_SETUP_SCHEMA:-true}" = "true" ]; then
+    echo "$(date): Applying database schema (scraper.py setup-schema)..."
+    python scraper.py setup-schema
+    SCHEMA_EXIT_CODE=$?
+
+    if [ $SCHEMA_EXIT_CODE -ne 0 ]; then
+        echo "$(date): ERROR - Schema setup failed with exit code $SCHEMA_EXIT_CODE"
+        exit $SCHEMA_EXIT_CODE
+    fi
+fi
+
+if [ "${SCRAPER_MODE:-sequential}" = "maintenance" ]; then
+    echo "$(date): Archiving old job details (scraper.py maintenance)..."
+    python scraper.py maintenance
+    MAINTENANCE_EXIT_CODE=$?
+
+    if [ $MAINTENANCE_EXIT_CODE -ne 0 ]; then
+        echo "$(date): ERROR - Maintenance failed with exit code $MAINTENANCE_EXIT_CODE"
+        exit $MAINTENANCE_EXIT_CODE
+    fi
+
+    echo "$(date): LinkedIn scraper completed successfully."
+    exit 0
+fi
+
+if [ "${SCRAPER_MODE:-sequential}" = "daemon" ]; then
+    echo "$(date): Starting daemon (scraper.py daemon)..."
+    exec python scraper.py daemon
+fi
+
+if [ "${SCRAPER_MODE:-sequential}" = "refresh" ]; then
+    echo "$(date): Refreshing extracted postings (refresh.py)..."
+    python refresh.py
+    REFRESH_EXIT_CODE=$?
+
+    if [ $REFRESH_EXIT_CODE -ne 0 ]; then
+        echo "$(date): ERROR - Refresh failed with exit code $REFRESH_EXIT_CODE"
+        exit $REFRESH_EXIT_CODE
+    fi
+
+    echo "$(date): LinkedIn scraper completed successfully."
+    exit 0
+fi
+
+if [ "${SCRAPER_MODE:-sequential}" = "pipeline" ]; then
+    echo "$(date): Running pipelined discovery + extraction (pipeline.py)..."
+    python pipeline.py
+    PIPELINE_EXIT_CODE=$?
+
+    if [ $PIPELINE_EXIT_CODE -ne 0 ]; then
+        echo "$(date): ERROR - Pipeline failed with exit code $PIPELINE_EXIT_CODE"
+        exit $PIPELINE_EXIT_CODE
+    fi
+
+    echo "$(date): LinkedIn scraper completed successfully."
+    exit 0
+fi
+
 # Run discovery phase
 echo "$(date): Running discovery phase (main.py)..."
 python main.py
@@ -0,0 +1,100 @@
+"""
+Punto de entrada único del scraper. Cada comando importa solo los módulos que usa, y ningún
+módulo abre conexiones, crea tablas ni configura logging al importarse.
+
+Uso:
+    python scraper.py setup-schema        crea las tablas y aplica SCHEMA_UPGRADES (una vez por deploy)
+    python scraper.py discovery           una corrida de descubrimiento (main.py)
+    python scraper.py extraction [...]    una corrida de extracción (job_extractor.py; --time-budget S, --engine async)
+    python scraper.py pipeline            descubrimiento y extracción en un proceso (pipeline.py)
+    python scraper.py refresh [...]       revisa los jobs ya extraídos (refresh.py)
+    python scraper.py daemon [...]        corre periódicamente en un proceso de larga vida (daemon.py)
+    python scraper.py maintenance [...]   archiva los detalles antiguos y exporta particiones (maintenance.py)
+    python scraper.py replay [...]        re-extrae desde el archivo local, sin red (replay.py)
+    python scraper.py migrate-descriptions [...]
+                                          mueve las descripciones en línea a la tabla por hash (migrate_descriptions.py)
+
+La base (DATABASE_URL) solo se necesita al correr un comando que la usa, no para ver esta ayuda.
+"""
+import sys
+import time
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def setup_schema(argv: List[str]):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from models import setup_schema as apply_schema
+    start = time.time()
+    apply_schema()
+    logger.info(f"Esquema listo en {time.time() - start:.2f}s")
+
+
+def discovery(argv: List[str]):
+    import main
+    main.main()
+
+
+def extraction(argv: List[str]):
+    import job_extractor
+    job_extractor.main(argv)
+
+
+def pipeline(argv: List[str]):
+    import pipeline as module
+    module.main()
+
+
+def refresh(argv: List[str]):
+    import refresh as module
+    module.main(argv)
+
+
+def daemon(argv: List[str]):
+    import daemon as module
+    module.main(argv)
+
+
+def maintenance(argv: List[str]):
+    import maintenance as module
+    module.main(argv)
+
+
+def replay(argv: List[str]):
+    import replay as module
+    module.main(argv)
+
+
+def migrate_descriptions(argv: List[str]):
+    import migrate_descriptions as module
+    module.main(argv)
+
+
+COMMANDS = {
+    'setup-schema': setup_schema,
+    'discovery': discovery,
+    'extraction': extraction,
+    'pipeline': pipeline,
+    'refresh': refresh,
+    'daemon': daemon,
+    'maintenance': maintenance,
+    'replay': replay,
+    'migrate-descriptions': migrate_descriptions,
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in ('-h', '--help', 'help'):
+        print(__doc__.strip())
+        return
+    if not argv or argv[0] not in COMMANDS:
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+    COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LOKI_ENABLED = os.getenv('LOKI_ENABLED', 'true').lower() == 'true'
+# Registros en memoria antes de descartar; el envío a Loki se agrupa por tamaño o por tiempo
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOKI_BATCH_SIZE = int(os.getenv('LOKI_BATCH_SIZE', 500))
+LOKI_FLUSH_INTERVAL = float(os.getenv('LOKI_FLUSH_INTERVAL', 2.0))
+LOKI_TIMEOUT = float(os.getenv('LOKI_TIMEOUT', 10))
+# Eventos de ScraperEvent: se insertan en bloque
+EVENTS_QUEUE_SIZE = int(os.getenv('LOG_EVENTS_QUEUE_SIZE', 1000))
+EVENTS_BATCH_SIZE = int(os.getenv('LOG_EVENTS_BATCH_SIZE', 50))
+EVENTS_FLUSH_INTERVAL = float(os.getenv('LOG_EVENTS_FLUSH_INTERVAL', 5.0))
+
+LOKI_PUSH_PATH = '/loki/api/v1/push'
+SHIPPER_THREAD_NAME = 'telemetry-shipper'
+
+_STOP = object()
+
+
+class LokiJsonFormatter(logging.Formatter):
+    def format(self, record):
+        # Create structured log entry for Loki
+        log_entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "service": "linkedin-scraper"
+        }
+
+        # Add extra fields if present
+        if hasattr(record, 'extra_fields'):
+            log_entry.update(record.extra_fields)
+
+        return json.dumps(log_entry, default=str)
+
+
+def loki_push_url(url: str) -> str:
+    """Acepta tanto la URL base de Grafana Cloud como el endpoint de push completo."""
+    url = url.rstrip('/')
+    return url if url.endswith(LOKI_PUSH_PATH) else url + LOKI_PUSH_PATH
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Handler que solo encola el registro: nunca bloquea al thread que loguea.
+    Si la cola está llena el registro se descarta y se cuenta en `dropped`.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def emit(self, record):
+        # Los logs del propio shipper (p. ej. urllib3) no vuelven a la cola
+        if record.threadName == SHIPPER_THREAD_NAME:
+            return
+        super().emit(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class LokiClient:
+    """Envía lotes de registros a la API de push de Loki, un stream por nivel."""
+    def __init__(self, url: str, auth: Optional[tuple] = None, tags: Optional[dict] = None, timeout: float = LOKI_TIMEOUT):
+        self.url = loki_push_url(url)
+        self.tags = tags or {"service": "linkedin-scraper"}
+        self.timeout = timeout
+        self._session = requests.Session()
+        if auth and auth[1]:
+            self._session.auth = auth
+
+    def push(self, lines: List[tuple]):
+        """lines: lista de (nivel, timestamp en ns, línea JSON)."""
+        streams = {}
+        for level, timestamp_ns, line in lines:
+            streams.setdefault(level, []).append([str(timestamp_ns), line])
+        payload = {
+            "streams": [
+                {"stream": {**self.tags, "severity": level}, "values": values}
+                for level, values in streams.items()
+            ]
+        }
+        response = self._session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+    def close(self):
+        self._session.close()
+
+
+class TelemetryShipper(threading.Thread):
+    """
+    Thread de fondo que vacía la cola de logs: escribe cada registro en consola y acumula
+    las líneas para Loki, que se envían cuando el lote llega a `batch_size` o pasa `flush_interval`.
+    Un envío fallido descarta el lote (se cuenta) en lugar de reintentar indefinidamente.
+    """
+    def __init__(self, log_queue: queue.Queue, console_handler: Optional[logging.Handler] = None,
+                 loki_client: Optional[LokiClient] = None, batch_size: int = LOKI_BATCH_SIZE,
+                 flush_interval: float = LOKI_FLUSH_INTERVAL):
+        super().__init__(name=SHIPPER_THREAD_NAME, daemon=True)
+        self.queue = log_queue
+        self.console_handler = console_handler
+        self.loki_client = loki_client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.formatter = LokiJsonFormatter()
+        self.shipped = 0
+        self.pushes = 0
+        self.failed_pushes = 0
+        self.dropped = 0
+        self.push_seconds = 0.0
+        self._batch: List[tuple] = []
+
+    def _ship(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        start = time.perf_counter()
+        try:
+            self.loki_client.push(batch)
+            self.shipped += len(batch)
+            self.pushes += 1
+        except Exception as e:
+            self.failed_pushes += 1
+            self.dropped += len(batch)
+            print(f"❌ Failed to push {len(batch)} log lines to Loki: {e}")
+        finally:
+            self.push_seconds += time.perf_counter() - start
+
+    def _handle(self, record: logging.LogRecord):
+        if self.console_handler is not None:
+            self.console_handler.handle(record)
+        if self.loki_client is not None:
+            self._batch.append((record.levelname.lower(), int(record.created * 1e9), self.formatter.format(record)))
+
+    def run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                record = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                record = None
+            if record is _STOP:
+                self._ship()
+                return
+            if record is not None:
+                try:
+                    self._handle(record)
+                except Exception as e:
+                    print(f"❌ Failed to handle log record: {e}")
+            if len(self._batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._ship()
+                deadline = time.monotonic() + self.flush_interval
+
+    def stop(self, timeout: float = 10):
+        """Procesa lo que quede en la cola, envía el último lote y termina el thread."""
+        self.queue.put(_STOP)
+        self.join(timeout)
+        if self.loki_client is not None:
+            self.loki_client.close()
+
+
+class EventBuffer:
+    """
+    Buffer de ScraperEvent: add() solo agrega a memoria y un thread de fondo inserta los eventos
+    en bloque (un INSERT multi-fila por lote). Con el buffer lleno los eventos se descartan.
+    """
+    def __init__(self, batch_size: int = EVENTS_BATCH_SIZE, flush_interval: float = EVENTS_FLUSH_INTERVAL,
+                 max_size: int = EVENTS_QUEUE_SIZE, session_factory=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._session_factory = session_factory
+        self._cond = threading.Condition()
+        self._pending: List[dict] = []
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def add(self, **event) -> bool:
+        event.setdefault('created_at', datetime.utcnow())
+        with self._cond:
+            if self._closed or len(self._pending) >= self.max_size:
+                self.dropped += 1
+                return False
+            self._pending.append(event)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                rows, self._pending = self._pending, []
+                closed = self._closed
+            if rows:
+                self._flush(rows)
+            if closed:
+                return
+
+    def _flush(self, rows: List[dict]):
+        try:
+            from sqlalchemy import insert
+            from models import ScraperEvent, SessionLocal
+            session_factory = self._session_factory or SessionLocal
+            with session_factory() as session:
+                session.execute(insert(ScraperEvent), rows)
+                session.commit()
+            self.written += len(rows)
+            print(f"📝 DB Events logged: {', '.join(row['event_type'] for row in rows)}")
+        except Exception as e:
+            self.failed += len(rows)
+            print(f"❌ Failed to log {len(rows)} DB events: {e}")
+
+    def close(self, timeout: float = 10):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_log_handler: Optional[DroppingQueueHandler] = None
+_shipper: Optional[TelemetryShipper] = None
+_events: Optional[EventBuffer] = None
+_lock = threading.Lock()
+
+
+def setup_loki_logging():
+    """
+    Configura el logger raíz con un único handler no bloqueante; la consola y Loki
+    se atienden desde el thread de fondo. Se puede llamar más de una vez.
+    """
+    global _log_handler, _shipper
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    with _lock:
+        if _shipper is not None:
+            return root
+
+        # Remove existing handlers
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+
+        loki_url = os.getenv('GRAFANA_LOKI_URL')
+        loki_username = os.getenv('GRAFANA_USER_ID')
+        loki_password = os.getenv('GRAFANA_API_KEY')
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(LokiJsonFormatter())
+        loki_client = None
+        if loki_url and LOKI_ENABLED:
+            # Grafana Cloud uses the API key as the basic auth password
+            loki_client = LokiClient(loki_url, auth=(loki_username or "user", loki_password))
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _log_handler = DroppingQueueHandler(log_queue)
+        _shipper = TelemetryShipper(log_queue, console_handler, loki_client)
+        _shipper.start()
+        root.addHandler(_log_handler)
+        atexit.register(shutdown_telemetry)
+
+    if loki_client is None:
+        root.warning("LOKI_URL not configured, using console logging only")
+    return root
+
+
+def _get_events() -> EventBuffer:
+    global _events
+    if _events is None:
+        with _lock:
+            if _events is None:
+                _events = EventBuffer().start()
+                atexit.register(shutdown_telemetry)
+    return _events
+
+
+def process_name(locations: Sequence[str]) -> str:
+    """Nombre del proceso en ScraperEvent: linkedin-scraper-<ubicación>, con varias ubicaciones unidas por '+'."""
+    return "linkedin-scraper-" + "+".join(location.lower() for location in locations)
+
+
+def log_db_event(process_name: str, event_type: str, records_count=0, execution_time=0.0, status="success", error_message=None,
+                 details: Optional[dict] = None):
+    """Encola un ScraperEvent; se inserta en el próximo lote del buffer. details se guarda como JSON."""
+    _get_events().add(
+        process_name=process_name,
+        event_type=event_type,
+        records_count=records_count,
+        status=status,
+        execution_time_seconds=execution_time,
+        error_message=error_message,
+        details=json.dumps(details, default=str) if details is not None else None,
+    )
+
+
+def telemetry_stats() -> dict:
+    stats = {}
+    if _log_handler is not None:
+        stats["log_records_dropped"] = _log_handler.dropped
+    if _shipper is not None:
+        stats.update({
+            "loki_lines_shipped": _shipper.shipped,
+            "loki_pushes": _shipper.pushes,
+            "loki_failed_pushes": _shipper.failed_pushes,
+            "loki_lines_dropped": _shipper.dropped,
+            "loki_push_seconds": round(_shipper.push_seconds, 3),
+        })
+    if _events is not None:
+        stats.update({
+            "db_events_written": _events.written,
+            "db_events_dropped": _events.dropped,
+            "db_events_failed": _events.failed,
+        })
+    return stats
+
+
+def shutdown_telemetry():
+    """
+    Vacía los buffers de eventos y logs. Se registra con atexit; llamarla explícitamente al final
+    de main() garantiza que los últimos eventos y líneas se envíen antes de salir.
+    """
+    global _log_handler, _shipper, _events
+    with _lock:
+        events, _events = _events, None
+        shipper, _shipper = _shipper, None
+        handler, _log_handler = _log_handler, None
+    if events is not None:
+        events.close()
+    if shipper is not None:
+        stats = {"log_records_dropped": handler.dropped if handler else 0}
+        root = logging.getLogger()
+        if handler is not None:
+            root.removeHandler(handler)
+        shipper.stop()
+        # Lo que se loguee después del cierre va directo a consola
+        if shipper.console_handler is not None:
+            root.addHandler(shipper.console_handler)
+        if stats["log_records_dropped"] or shipper.dropped:
+            print(f"⚠️ Telemetría: {stats['log_records_dropped']} registros descartados por cola llena, "
+                  f"{shipper.dropped} líneas no enviadas a Loki")
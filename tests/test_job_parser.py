@@ -0,0 +1,98 @@
+"""
+Golden fixtures de job_parser: cada backend instalado (lxml, selectolax, bs4) tiene que extraer
+exactamente los campos esperados de cada página, y no fallar con páginas rotas.
+
+Las páginas están en tests/fixtures/*.html junto a su .expected.json; la página completa es la
+misma que sirve la API falsa de los benchmarks (benchmarks/fixtures/job_posting.html).
+"""
+import json
+import os
+
+import pytest
+
+import job_parser
+from job_parser import JOB_FIELDS
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(TESTS_DIR, 'fixtures')
+FULL_PAGE = os.path.join(TESTS_DIR, '..', 'benchmarks', 'fixtures', 'job_posting.html')
+
+GOLDEN_PAGES = {
+    'full': FULL_PAGE,
+    # Clases extra o en otro orden en la ubicación y la descripción: se matchea por token de clase
+    'extra_classes': os.path.join(FIXTURES_DIR, 'job_posting_extra_classes.html'),
+    'missing_criteria': os.path.join(FIXTURES_DIR, 'job_posting_missing_criteria.html'),
+    'missing_fields': os.path.join(FIXTURES_DIR, 'job_posting_missing_fields.html'),
+}
+
+
+def read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def expected_for(path: str) -> dict:
+    with open(os.path.splitext(path)[0] + '.expected.json', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(params=sorted(job_parser.BACKENDS))
+def backend(request):
+    if request.param not in job_parser.available_backends():
+        pytest.skip(f"{request.param} no está instalado")
+    return request.param
+
+
+@pytest.mark.parametrize('page', sorted(GOLDEN_PAGES))
+def test_golden_page(backend, page):
+    path = GOLDEN_PAGES[page]
+    assert job_parser.parse_job_html(read(path), backend) == expected_for(path)
+
+
+def test_missing_criteria_keep_their_position(backend):
+    # Un item sin texto deja su campo en None sin correr los siguientes
+    fields = job_parser.parse_job_html(read(GOLDEN_PAGES['missing_criteria']), backend)
+    assert fields['seniority_level'] == 'Mid-Senior level'
+    assert fields['employment_type'] is None
+    assert fields['job_function'] is None and fields['industries'] is None
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'   \n',
+    b'<!-- sin elementos -->',
+    b'not html at all',
+    b'{"error": "rate limited"}',
+    bytes(range(256)) * 4,
+], ids=['empty', 'blank', 'comment-only', 'plain-text', 'json', 'binary'])
+def test_page_without_job_markup(backend, content):
+    assert job_parser.parse_job_html(content, backend) == dict.fromkeys(JOB_FIELDS)
+
+
+def test_truncated_page(backend):
+    # Cortada después de la tarjeta superior: lo que alcanzó a llegar se extrae, el resto queda en None
+    page = read(FULL_PAGE)
+    truncated = page[:page.index(b'<section class="core-section-container')]
+    expected = expected_for(FULL_PAGE)
+    fields = job_parser.parse_job_html(truncated, backend)
+    for name in ('job_title', 'company_name', 'location', 'posted_time', 'applicant_count'):
+        assert fields[name] == expected[name]
+    for name in ('job_description', 'seniority_level', 'employment_type', 'job_function', 'industries'):
+        assert fields[name] is None
+
+
+def test_unclosed_tags(backend):
+    # Sin los cierres de h2: los parsers los recuperan igual
+    page = read(FULL_PAGE).replace(b'</h2>', b'')
+    expected = expected_for(FULL_PAGE)
+    fields = job_parser.parse_job_html(page, backend)
+    assert fields['job_title'] == expected['job_title']
+    assert fields['job_description'] == expected['job_description']
+    assert fields['industries'] == expected['industries']
+
+
+def test_backends_agree_on_every_golden_page():
+    backends = job_parser.available_backends()
+    for path in GOLDEN_PAGES.values():
+        results = {name: job_parser.parse_job_html(read(path), name) for name in backends}
+        assert len({json.dumps(result, sort_keys=True) for result in results.values()}) == 1, results
@@ -0,0 +1,158 @@
+"""
+Spans de tiempo por etapa. Cada job de la extracción lleva un JobTrace con lo que tardó en cada
+etapa (cola del pool, espera del limitador, descarga, cola y parseo, espera del lote y escritura);
+el descubrimiento mide sus páginas con span(). Todo se acumula en el SpanRecorder de la corrida,
+que al final se resume en un ScraperEvent (details) y en la métrica span_summary, y cada etapa
+alimenta el histograma linkedin_span_seconds.
+
+Los jobs que tardan más de LINKEDIN_SLOW_JOB_SECONDS se registran uno por uno con sus spans.
+"""
+import os
+import random
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from metrics import SPAN_SECONDS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SPANS_ENABLED = os.getenv('LINKEDIN_SPANS', 'true').lower() == 'true'
+# Un job que tarda más que esto de punta a punta se registra con sus spans (0 = nunca)
+SLOW_JOB_SECONDS = float(os.getenv('LINKEDIN_SLOW_JOB_SECONDS', 30))
+# Muestras por etapa para los percentiles (reservoir sampling)
+SPAN_SAMPLE_SIZE = 5000
+
+
+class StageStats:
+    def __init__(self, sample_size: int = SPAN_SAMPLE_SIZE):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.sample_size = sample_size
+        self._samples: List[float] = []
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if len(self._samples) < self.sample_size:
+            self._samples.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.sample_size:
+                self._samples[slot] = seconds
+
+    def snapshot(self) -> dict:
+        samples = sorted(self._samples)
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total_seconds, 3),
+            "avg_seconds": round(self.total_seconds / self.count, 4) if self.count else 0.0,
+            "p50_seconds": round(samples[len(samples) // 2], 4) if samples else 0.0,
+            "p99_seconds": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 4) if samples else 0.0,
+            "max_seconds": round(self.max_seconds, 4),
+        }
+
+
+class SpanRecorder:
+    """Acumula los spans de una corrida por etapa (thread-safe)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+        self.slow_jobs = 0
+
+    def record(self, stage: str, seconds: float):
+        SPAN_SECONDS.observe(seconds, stage=stage)
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.record(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self.slow_jobs = 0
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {stage: stats.snapshot() for stage, stats in self._stages.items()}
+
+
+_recorder = SpanRecorder()
+_local = threading.local()
+
+
+def get_recorder() -> SpanRecorder:
+    return _recorder
+
+
+class JobTrace:
+    """Spans de un intento de un job. Cruza threads: se crea al enviarlo al pool y termina al persistirse."""
+    __slots__ = ('job_id', 'started', 'spans')
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+        _recorder.record(stage, seconds)
+
+    def finish(self):
+        total = time.perf_counter() - self.started
+        if SLOW_JOB_SECONDS and total >= SLOW_JOB_SECONDS:
+            _recorder.slow_jobs += 1
+            logger.info("Metric: slow_job", extra={"extra_fields": {
+                "event_type": "slow_job", "scraper_phase": "extraction", "job_id": self.job_id,
+                "total_seconds": round(total, 3), **{stage: round(seconds, 4) for stage, seconds in self.spans.items()},
+            }})
+
+
+def span_summary() -> Optional[dict]:
+    """Resumen de la corrida para el ScraperEvent span_summary; None si no hay spans."""
+    stages = _recorder.snapshot()
+    if not stages:
+        return None
+    return {"stages": stages, "slow_jobs": _recorder.slow_jobs}
+
+
+def start_trace(job_id: str) -> Optional[JobTrace]:
+    return JobTrace(job_id) if SPANS_ENABLED else None
+
+
+def current_trace() -> Optional[JobTrace]:
+    """El JobTrace del job que procesa este thread (None fuera de process_job o con los spans desactivados)."""
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def active_trace(trace: Optional[JobTrace]):
+    """Deja trace como el actual de este thread mientras dura el bloque (para el cliente HTTP)."""
+    previous = getattr(_local, 'trace', None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+@contextmanager
+def span(stage: str):
+    """Mide el bloque como una muestra de stage en el recorder (sin JobTrace: páginas del descubrimiento)."""
+    if not SPANS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _recorder.record(stage, time.perf_counter() - start)